@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of species page parsing on saved vnredlist pages.
+
+Compares the original parsing code (a full BeautifulSoup tree scanned once per field)
+with the section-index parser backends in vnredlist_parser, and checks that every
+backend extracts the same status and details as the original code.
+
+Usage:
+    python bench_parsers.py [pages_dir] [--repeat N]
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from profiling import add_profile_arguments, configure_profiling_from_args
+from vnredlist_parser import PARSER_BACKENDS, parse_species_page
+
+
+DEFAULT_PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'vnredlist_pages')
+
+
+def legacy_status(soup: BeautifulSoup) -> Optional[str]:
+    """Status lookup as previously done in fetch_conservation_status."""
+    for heading in soup.find_all(['h3', 'h4']):
+        if 'Phân hạng bảo tồn' in heading.get_text():
+            next_elem = heading.find_next_sibling(['p', 'div'])
+            if next_elem:
+                status_match = re.search(r'\b(CR|EN|VU|NT|LC|DD|EW|EX|NE)\b', next_elem.get_text().strip())
+                if status_match:
+                    return status_match.group(1)
+
+    assessment_section = soup.find('h2', string=re.compile(r'Thông tin đánh giá'))
+    if assessment_section:
+        section_content = assessment_section.find_next('div')
+        if section_content:
+            status_match = re.search(r'Phân hạng[:\s]+([A-Z]{1,2})', section_content.get_text())
+            if status_match:
+                return status_match.group(1)
+    return None
+
+
+def legacy_text_after_heading(soup: BeautifulSoup, heading_text: str) -> str:
+    """extract_text_after_heading from the extract_species_details notebook."""
+    for heading in soup.find_all(['h3', 'h4']):
+        if heading_text.lower() in heading.get_text(strip=True).lower():
+            next_elem = heading.find_next_sibling()
+            if next_elem:
+                return ' '.join(next_elem.get_text(separator=' ', strip=True).split())
+    return ""
+
+
+def legacy_details(url: str, soup: BeautifulSoup) -> Dict:
+    """extract_species_details (with extract_taxonomic_info) from the notebook."""
+    species_data = {
+        'scientific_name': {'value': '', 'note': ''},
+        'common_name': {'value': '', 'note': ''},
+        'kingdom_latin': '', 'kingdom_vi': '',
+        'phylum_latin': '', 'phylum_vi': '',
+        'class_latin': '', 'class_vi': '',
+        'order_latin': '', 'order_vi': '',
+        'family_latin': '', 'family_vi': '',
+        'note': '',
+        'laws': []
+    }
+
+    title = soup.find('h1')
+    if title:
+        parts = title.get_text(strip=True).split()
+        sci_name = title.get_text(strip=True)
+        if len(parts) >= 2:
+            sci_name = ' '.join(parts[:3] if len(parts) >= 3 and parts[2][0].islower() else parts[:2])
+        species_data['scientific_name']['value'] = sci_name
+
+    common_name = legacy_text_after_heading(soup, 'Tên việt nam')
+    if common_name:
+        species_data['common_name']['value'] = common_name
+
+    taxonomy_map = {'Giới': 'kingdom', 'Ngành': 'phylum', 'Lớp': 'class', 'Bộ': 'order', 'Họ': 'family'}
+    for heading in soup.find_all(['h3', 'h4']):
+        heading_text = heading.get_text(strip=True)
+        for vn_name, en_key in taxonomy_map.items():
+            if heading_text == vn_name:
+                next_elem = heading.find_next_sibling()
+                if next_elem:
+                    value = ' '.join(next_elem.get_text(separator=' ', strip=True).split())
+                    species_data[f'{en_key}_latin'] = value.upper()
+                break
+
+    status = legacy_text_after_heading(soup, 'Phân hạng bảo tồn')
+    if not status:
+        status = legacy_text_after_heading(soup, 'Phân hạng')
+    if status:
+        status_match = re.search(r'\b(CR|EN|VU|NT|LC|DD|EW|EX|NE)\b', status)
+        if status_match:
+            species_data['laws'].append({
+                'name': {'vi': 'Danh lục Đỏ Việt Nam', 'en': 'Vietnam Red List'},
+                'value': status_match.group(1),
+                'note': url
+            })
+    return species_data
+
+
+def parse_legacy(url: str, content: bytes) -> Tuple[Optional[str], Dict]:
+    soup = BeautifulSoup(content, 'html.parser')
+    return legacy_status(soup), legacy_details(url, soup)
+
+
+def parse_indexed(url: str, content: bytes, backend: str) -> Tuple[Optional[str], Dict]:
+    page = parse_species_page(content, backend=backend)
+    return page.conservation_status(), page.species_details(url)
+
+
+def time_per_page(func, pages: List[Tuple[str, bytes]], repeat: int) -> float:
+    """Best-of-``repeat`` average parse time per page, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for url, content in pages:
+            func(url, content)
+        best = min(best, time.perf_counter() - start)
+    return best / len(pages)
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark species page parsing.")
+    parser.add_argument('pages_dir', nargs='?', default=DEFAULT_PAGES_DIR,
+                        help="Directory of saved species pages (*.html)")
+    parser.add_argument('--repeat', type=int, default=5, help="Number of timed rounds (default: 5)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    configure_profiling_from_args(args)
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(args.pages_dir, '*.html'))):
+        with open(path, 'rb') as f:
+            pages.append((os.path.basename(path), f.read()))
+
+    if not pages:
+        print(f"✗ No .html pages found in {args.pages_dir}")
+        sys.exit(1)
+
+    print(f"Parsing {len(pages)} pages from {args.pages_dir}, best of {args.repeat} rounds\n")
+
+    # Every backend must extract exactly what the original code extracts
+    for backend in PARSER_BACKENDS:
+        for url, content in pages:
+            if parse_indexed(url, content, backend) != parse_legacy(url, content):
+                print(f"✗ {backend}: results differ from the original parser on {url}")
+                sys.exit(1)
+
+    baseline = time_per_page(parse_legacy, pages, args.repeat)
+    print(f"  {'original (bs4, one scan per field)':<38} {baseline * 1000:8.2f} ms/page")
+
+    for backend in PARSER_BACKENDS:
+        elapsed = time_per_page(lambda url, content: parse_indexed(url, content, backend), pages, args.repeat)
+        print(f"  {'index (' + backend + ')':<38} {elapsed * 1000:8.2f} ms/page  ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
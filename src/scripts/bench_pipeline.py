@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks of the data pipeline, with a baseline to catch regressions.
+
+Every benchmark runs on files in the repository, without network access:
+
+- corpus:    parsing all law data files plus iucn_status.json and vnredlist_status.json
+- names:     normalize_scientific_name and scientific_name_to_url_slug over every name
+- status:    fetch_conservation_status over the saved vnredlist pages
+             (fixtures/vnredlist_pages), served from a page archive in replay mode
+- merge:     update_iucn_with_vietnamese_names on a copy of src/lib
+- images:    images_csv_to_json.csv_to_json on new_images.csv
+
+Each benchmark reports the best and median time of ``--repeat`` rounds.
+``--save-baseline`` stores the results; later runs compare their best times with
+the baseline and exit with status 1 when any benchmark is slower by more than
+``--threshold`` (default 25%). Timings depend on the machine, so the baseline is
+kept under .cache rather than in the repository.
+
+Usage:
+    python bench_pipeline.py [--repeat N] [--only NAME ...] [--save-baseline] [--threshold 0.25]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from profiling import add_profile_arguments, configure_profiling_from_args
+from species_corpus import DECREE_FILES, DEFAULT_LIB_DIR, SpeciesCorpus, normalize_scientific_name
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(SCRIPT_DIR, '.cache', 'bench_baseline.json')
+WORK_DIR = os.path.join(SCRIPT_DIR, '.cache', 'bench')
+PAGES_DIR = os.path.join(SCRIPT_DIR, 'fixtures', 'vnredlist_pages')
+IMAGES_CSV = os.path.join(SCRIPT_DIR, 'new_images.csv')
+
+CORPUS_FILES = DECREE_FILES + ['iucn_status.json', 'vnredlist_status.json']
+
+DEFAULT_REPEAT = 5
+# Allowed slowdown of a benchmark's best time relative to the baseline
+DEFAULT_THRESHOLD = 0.25
+
+# A benchmark: prepares its input once and returns (function timed per round, items per round)
+Benchmark = Callable[[], Tuple[Callable[[], None], int]]
+
+
+def bench_corpus() -> Tuple[Callable[[], None], int]:
+    files = [name for name in CORPUS_FILES if os.path.exists(os.path.join(DEFAULT_LIB_DIR, name))]
+
+    def run():
+        SpeciesCorpus(DEFAULT_LIB_DIR, files)
+
+    return run, len(files)
+
+
+def bench_names() -> Tuple[Callable[[], None], int]:
+    from fetch_vnredlist_status import scientific_name_to_url_slug
+
+    corpus = SpeciesCorpus(DEFAULT_LIB_DIR, [name for name in CORPUS_FILES
+                                             if os.path.exists(os.path.join(DEFAULT_LIB_DIR, name))])
+    names = [entry.get('scientific_name', {}).get('value', '')
+             for entries in corpus.entries_by_file.values() for entry in entries]
+
+    def run():
+        for name in names:
+            normalize_scientific_name(name)
+            scientific_name_to_url_slug(name)
+
+    return run, len(names)
+
+
+def bench_status() -> Tuple[Callable[[], None], int]:
+    import fetch_vnredlist_status
+    import http_cache
+    from page_archive import PageArchive
+
+    # Archive the fixture pages under the URLs the fetcher requests
+    archive_path = os.path.join(WORK_DIR, 'pages.archive')
+    for path in (archive_path, f'{archive_path}.idx'):
+        if os.path.exists(path):
+            os.remove(path)
+    archive = PageArchive(archive_path)
+    names = []
+    for file_name in sorted(os.listdir(PAGES_DIR)):
+        slug = file_name[:-len('.html')]
+        url = f"{fetch_vnredlist_status.BASE_URL}/{slug}/"
+        with open(os.path.join(PAGES_DIR, file_name), 'rb') as f:
+            archive.append(http_cache.make_cache_key(url), url, 'vnredlist', 200, {}, f.read())
+        names.append(slug.replace('-', ' ').capitalize())
+
+    def run():
+        # No response cache, so every page is parsed again
+        saved = http_cache.response_cache, http_cache.page_archive, http_cache.replay_only
+        http_cache.configure_cache(None)
+        http_cache.configure_archive(archive, replay=True)
+        fetch_vnredlist_status.species_cache.clear()
+        fetch_vnredlist_status.fetch_errors.clear()
+        try:
+            for name in names:
+                fetch_vnredlist_status.fetch_conservation_status(name)
+            if fetch_vnredlist_status.fetch_errors:
+                raise RuntimeError(f"Fixture pages not served: {sorted(fetch_vnredlist_status.fetch_errors)}")
+        finally:
+            http_cache.response_cache, http_cache.page_archive, http_cache.replay_only = saved
+
+    return run, len(names)
+
+
+def bench_merge() -> Tuple[Callable[[], None], int]:
+    from pathlib import Path
+
+    from merge_common_names import update_iucn_with_vietnamese_names
+
+    lib_dir = os.path.join(WORK_DIR, 'lib')
+    os.makedirs(lib_dir, exist_ok=True)
+    for name in DECREE_FILES + ['iucn_status.json']:
+        shutil.copyfile(os.path.join(DEFAULT_LIB_DIR, name), os.path.join(lib_dir, name))
+    with open(os.path.join(DEFAULT_LIB_DIR, 'iucn_status.json'), 'rb') as f:
+        iucn = f.read()
+
+    def run():
+        # The merge rewrites iucn_status.json; start every round from the original
+        with open(os.path.join(lib_dir, 'iucn_status.json'), 'wb') as f:
+            f.write(iucn)
+        update_iucn_with_vietnamese_names(Path(lib_dir))
+
+    return run, len(json.loads(iucn))
+
+
+def bench_images() -> Tuple[Callable[[], None], int]:
+    from images_csv_to_json import csv_to_json
+
+    output = os.path.join(WORK_DIR, 'images.json')
+    with open(IMAGES_CSV, 'r', encoding='utf-8') as f:
+        rows = sum(1 for _ in f) - 1
+
+    def run():
+        csv_to_json(IMAGES_CSV, output)
+
+    return run, rows
+
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    'corpus': bench_corpus,
+    'names': bench_names,
+    'status': bench_status,
+    'merge': bench_merge,
+    'images': bench_images,
+}
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int = DEFAULT_REPEAT) -> Dict:
+    """
+    Time a benchmark.
+
+    Args:
+        benchmark: Function preparing the benchmark (see ``BENCHMARKS``)
+        repeat: Number of timed rounds
+
+    Returns:
+        Best and median seconds per round, rounds and items per round
+    """
+    # Scripts print progress; keep it out of the benchmark output
+    with contextlib.redirect_stdout(io.StringIO()):
+        run, items = benchmark()
+        run()  # warm-up: imports, lazily built indexes
+        times = []
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+    return {'best': min(times), 'median': statistics.median(times), 'rounds': len(times), 'items': items}
+
+
+def run_benchmarks(names: Optional[List[str]] = None, repeat: int = DEFAULT_REPEAT) -> Dict:
+    """Run benchmarks by name (default: all) and return the results with the environment."""
+    os.makedirs(WORK_DIR, exist_ok=True)
+    results = {}
+    for name in names or list(BENCHMARKS):
+        results[name] = run_benchmark(BENCHMARKS[name], repeat)
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'created_at': time.time(),
+        'benchmarks': results,
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Compare results with a baseline.
+
+    Args:
+        results: Output of ``run_benchmarks``
+        baseline: Earlier output of ``run_benchmarks``
+        threshold: Allowed slowdown of the best time (0.25 = 25%)
+
+    Returns:
+        One entry per benchmark present in both: name, baseline and current best time,
+        ratio, and whether it regressed
+    """
+    comparison = []
+    for name, result in results['benchmarks'].items():
+        before = baseline.get('benchmarks', {}).get(name)
+        if before is None or before['best'] <= 0:
+            continue
+        ratio = result['best'] / before['best']
+        comparison.append({'name': name, 'baseline': before['best'], 'best': result['best'],
+                           'ratio': ratio, 'regressed': ratio > 1 + threshold})
+    return comparison
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the data pipeline.")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f"Timed rounds per benchmark (default: {DEFAULT_REPEAT})")
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help=f"Baseline file (default: {DEFAULT_BASELINE})")
+    parser.add_argument('--save-baseline', action='store_true', help="Store the results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Allowed slowdown before failing, as a fraction (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--output', help="Also write the results to this file (JSON)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    configure_profiling_from_args(args, args.output)
+
+    print(f"Running {len(args.only or BENCHMARKS)} benchmarks, best of {args.repeat} rounds\n")
+    results = run_benchmarks(args.only, args.repeat)
+    for name, result in results['benchmarks'].items():
+        per_item = result['best'] / max(1, result['items'])
+        print(f"  {name:<8} {result['best'] * 1000:9.2f} ms  (median {result['median'] * 1000:.2f} ms, "
+              f"{result['items']} items, {per_item * 1e6:.1f} µs/item)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        baseline = {'benchmarks': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        # Benchmarks not run this time keep their baseline
+        baseline.update({key: value for key, value in results.items() if key != 'benchmarks'})
+        baseline.setdefault('benchmarks', {}).update(results['benchmarks'])
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\n✓ Baseline saved to: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠ No baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    comparison = compare(results, baseline, args.threshold)
+    print(f"\nCompared with {args.baseline} (threshold +{args.threshold:.0%}):")
+    for item in comparison:
+        mark = '✗' if item['regressed'] else '✓'
+        print(f"  {mark} {item['name']:<8} {item['baseline'] * 1000:9.2f} ms → {item['best'] * 1000:9.2f} ms "
+              f"({item['ratio'] - 1:+.0%})")
+
+    regressed = [item['name'] for item in comparison if item['regressed']]
+    if regressed:
+        print(f"\n✗ Slower than the baseline: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
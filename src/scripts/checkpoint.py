@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Append-only checkpoint journal for long-running fetch scripts.
+
+Each result is written as one JSON line as soon as it arrives and flushed to disk,
+so a crashed or interrupted run can be resumed without repeating finished work.
+"""
+
+import json
+import os
+from typing import Dict
+
+
+class CheckpointJournal:
+    """JSON Lines journal of per-species results, keyed by scientific name."""
+
+    def __init__(self, path: str, key: str = 'scientific_name'):
+        """
+        Args:
+            path: Path to the journal file
+            key: Record field identifying the species
+        """
+        self.path = path
+        self.key = key
+        self._file = None
+
+    def load(self) -> Dict[str, Dict]:
+        """
+        Read all records from the journal.
+
+        A partially written last line (from a crash mid-write) is ignored. Later
+        records for the same species replace earlier ones.
+
+        Returns:
+            Dictionary mapping species keys to their latest record
+        """
+        records: Dict[str, Dict] = {}
+        if not os.path.exists(self.path):
+            return records
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[record[self.key]] = record
+
+        return records
+
+    def open(self, resume: bool = False) -> None:
+        """Open the journal for appending, truncating it unless resuming."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if resume and os.path.exists(self.path):
+            self._drop_partial_line()
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def append(self, record: Dict) -> None:
+        """Write one record and flush it to disk."""
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self) -> None:
+        """Close and delete the journal, e.g. after a run completed successfully."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _drop_partial_line(self) -> None:
+        """Truncate a trailing line without newline left behind by a crash."""
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Build a compact, columnar artifact of the law corpus in src/lib.
+
+The seven data files (the law documents, iucn_status.json and vnredlist_status.json)
+repeat the same taxonomy strings and long bilingual law names in every record.
+The artifact stores every distinct string once in a table, ordered by frequency so
+that the most common strings get the shortest IDs, and stores the records as
+columns of string IDs:
+
+    {
+      "format": "columnar-law-corpus", "version": 1,
+      "strings": ["", "Nhóm", ...],
+      "files": [{"name": "nd06_2019.json", "fields": [...], "start": 0, "count": 421}, ...],
+      "columns": {"scientific_name.value": [...], "family_latin": [...], ...},
+      "law_names": [[vi, en], ...],
+      "laws": {"offsets": [...], "name": [...], "value": [...], "note": [...]}
+    }
+
+``ColumnarCorpus`` reads the artifact back and returns records identical to the
+entries of the source files (same keys, same key order).
+
+Usage:
+    python columnar_export.py [--output PATH] [--verify]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Optional
+
+from profiling import add_profile_arguments, configure_profiling_from_args
+from species_corpus import DECREE_FILES, DEFAULT_LIB_DIR, load_corpus
+
+
+FORMAT_NAME = 'columnar-law-corpus'
+FORMAT_VERSION = 1
+
+# The data files consumed by the frontend
+EXPORT_FILES = DECREE_FILES + ['iucn_status.json', 'vnredlist_status.json']
+
+DEFAULT_OUTPUT = os.path.join(DEFAULT_LIB_DIR, 'law_corpus.columnar.json')
+
+# Record fields holding {"value": ..., "note": ...} objects
+OBJECT_FIELDS = ('scientific_name', 'common_name', 'common_name_en')
+OBJECT_KEYS = ('value', 'note')
+LAW_KEYS = ('name', 'value', 'note')
+
+
+def _columns_for(field: str) -> List[str]:
+    if field in OBJECT_FIELDS:
+        return [f'{field}.{key}' for key in OBJECT_KEYS]
+    return [field]
+
+
+def build_artifact(files: Dict[str, List[Dict]]) -> Dict:
+    """
+    Encode the records of several data files into a columnar artifact.
+
+    Args:
+        files: Records of each file, by file name, in output order
+
+    Returns:
+        JSON-serializable artifact
+    """
+    # Intern every string, most frequent first
+    counts: Counter = Counter()
+    law_name_counts: Counter = Counter()
+    for records in files.values():
+        for record in records:
+            for field, value in record.items():
+                if field == 'laws':
+                    for law in value:
+                        law_name_counts[(law['name']['vi'], law['name']['en'])] += 1
+                        counts[law['value']] += 1
+                        counts[law['note']] += 1
+                elif field in OBJECT_FIELDS:
+                    counts.update(value[key] for key in OBJECT_KEYS)
+                else:
+                    counts[value] += 1
+    law_names = [name for name, _ in law_name_counts.most_common()]
+    counts.update(part for name in law_names for part in name)
+
+    strings = [string for string, _ in counts.most_common()]
+    string_ids = {string: idx for idx, string in enumerate(strings)}
+    law_name_ids = {name: idx for idx, name in enumerate(law_names)}
+
+    file_entries = []
+    columns: Dict[str, List[int]] = {}
+    laws: Dict[str, List[int]] = {'offsets': [0], 'name': [], 'value': [], 'note': []}
+    total = 0
+
+    for file_name, records in files.items():
+        fields = list(records[0]) if records else []
+        file_entries.append({'name': file_name, 'fields': fields, 'start': total, 'count': len(records)})
+
+        for record in records:
+            if list(record) != fields:
+                raise ValueError(f"{file_name}: records do not share the same fields")
+
+            for field in fields:
+                if field == 'laws':
+                    for law in record['laws']:
+                        if tuple(law) != LAW_KEYS or tuple(law['name']) != ('vi', 'en'):
+                            raise ValueError(f"{file_name}: unexpected law structure {law}")
+                        laws['name'].append(law_name_ids[(law['name']['vi'], law['name']['en'])])
+                        laws['value'].append(string_ids[law['value']])
+                        laws['note'].append(string_ids[law['note']])
+                    continue
+
+                for column in _columns_for(field):
+                    # Columns start when their field first appears; earlier rows hold ""
+                    if column not in columns:
+                        columns[column] = [string_ids.get('', 0)] * total
+                    if field in OBJECT_FIELDS:
+                        if tuple(record[field]) != OBJECT_KEYS:
+                            raise ValueError(f"{file_name}: unexpected {field} structure")
+                        value = record[field][column.split('.', 1)[1]]
+                    else:
+                        value = record[field]
+                    columns[column].append(string_ids[value])
+
+            total += 1
+            laws['offsets'].append(len(laws['name']))
+            # Pad columns of fields this file does not have
+            for column_values in columns.values():
+                if len(column_values) < total:
+                    column_values.append(string_ids.get('', 0))
+
+    return {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'strings': strings,
+        'files': file_entries,
+        'columns': columns,
+        'law_names': [[string_ids[vi], string_ids[en]] for vi, en in law_names],
+        'laws': laws,
+    }
+
+
+def write_artifact(artifact: Dict, path: str) -> int:
+    """Write an artifact as compact JSON; returns the size in bytes."""
+    data = json.dumps(artifact, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+class ColumnarCorpus:
+    """Reader for the columnar artifact, returning records in the source format."""
+
+    def __init__(self, artifact: Dict):
+        if artifact.get('format') != FORMAT_NAME or artifact.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Not a {FORMAT_NAME} v{FORMAT_VERSION} artifact")
+        self.strings: List[str] = artifact['strings']
+        self.file_entries: List[Dict] = artifact['files']
+        self.columns: Dict[str, List[int]] = artifact['columns']
+        self.laws: Dict[str, List[int]] = artifact['laws']
+        self.law_names = [{'vi': self.strings[vi], 'en': self.strings[en]} for vi, en in artifact['law_names']]
+        self._name_index: Optional[Dict[str, List[int]]] = None
+
+    @classmethod
+    def load(cls, path: str) -> 'ColumnarCorpus':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return sum(entry['count'] for entry in self.file_entries)
+
+    @property
+    def files(self) -> List[str]:
+        return [entry['name'] for entry in self.file_entries]
+
+    def _file_entry(self, index: int) -> Dict:
+        for entry in self.file_entries:
+            if entry['start'] <= index < entry['start'] + entry['count']:
+                return entry
+        raise IndexError(index)
+
+    def _decode(self, index: int, fields: List[str]) -> Dict:
+        strings = self.strings
+        columns = self.columns
+        record = {}
+        for field in fields:
+            if field == 'laws':
+                start, end = self.laws['offsets'][index], self.laws['offsets'][index + 1]
+                record['laws'] = [
+                    {
+                        'name': dict(self.law_names[self.laws['name'][i]]),
+                        'value': strings[self.laws['value'][i]],
+                        'note': strings[self.laws['note'][i]],
+                    }
+                    for i in range(start, end)
+                ]
+            elif field in OBJECT_FIELDS:
+                record[field] = {key: strings[columns[f'{field}.{key}'][index]] for key in OBJECT_KEYS}
+            else:
+                record[field] = strings[columns[field][index]]
+        return record
+
+    def record(self, index: int) -> Dict:
+        """Record at a position across all files."""
+        return self._decode(index, self._file_entry(index)['fields'])
+
+    def records(self, file_name: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Iterate over records, in source order.
+
+        Args:
+            file_name: Only the records of this file (e.g. "nd06_2019.json")
+        """
+        for entry in self.file_entries:
+            if file_name is not None and entry['name'] != file_name:
+                continue
+            for index in range(entry['start'], entry['start'] + entry['count']):
+                yield self._decode(index, entry['fields'])
+
+    def column(self, name: str) -> List[str]:
+        """All values of a column (e.g. "family_latin", "scientific_name.value")."""
+        strings = self.strings
+        return [strings[idx] for idx in self.columns[name]]
+
+    def find(self, scientific_name: str) -> List[Dict]:
+        """Records of a species in every file, by exact scientific name."""
+        if self._name_index is None:
+            self._name_index = {}
+            for index, value in enumerate(self.column('scientific_name.value')):
+                self._name_index.setdefault(value.strip(), []).append(index)
+        return [self.record(index) for index in self._name_index.get(scientific_name.strip(), [])]
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Build the columnar artifact of the law corpus.")
+    parser.add_argument('--lib-dir', default=DEFAULT_LIB_DIR, help=f"Data directory (default: {DEFAULT_LIB_DIR})")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f"Artifact path (default: {DEFAULT_OUTPUT})")
+    parser.add_argument('--verify', action='store_true',
+                        help="Check that the artifact decodes to the source records")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    configure_profiling_from_args(args, args.output)
+
+    corpus = load_corpus(args.lib_dir, EXPORT_FILES)
+    for json_file in corpus.missing_files:
+        print(f"⚠ {json_file} not found, skipping")
+    files = {name: corpus.entries_by_file[name] for name in EXPORT_FILES if name in corpus.entries_by_file}
+
+    source_bytes = sum(os.path.getsize(os.path.join(args.lib_dir, name)) for name in files)
+    artifact = build_artifact(files)
+    size = write_artifact(artifact, args.output)
+
+    print(f"✓ Wrote {args.output}")
+    print(f"  Records: {sum(len(records) for records in files.values())} from {len(files)} files")
+    print(f"  Distinct strings: {len(artifact['strings'])}")
+    print(f"  Size: {size / 1024:.0f} KB (source files: {source_bytes / 1024:.0f} KB, {source_bytes / size:.1f}x smaller)")
+
+    if args.verify:
+        start = time.perf_counter()
+        reader = ColumnarCorpus.load(args.output)
+        decoded = {name: list(reader.records(name)) for name in files}
+        elapsed = time.perf_counter() - start
+        if decoded != files or any(
+                json.dumps(decoded[name], ensure_ascii=False) != json.dumps(files[name], ensure_ascii=False)
+                for name in files):
+            print("✗ Decoded records differ from the source files")
+            sys.exit(1)
+        print(f"✓ Verified: all records decode identically ({elapsed * 1000:.0f} ms to load and decode)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Crawl species links from every category of the Vietnam Red List (vnredlist.vast.vn).
+
+The first page of every category is fetched concurrently. As soon as a first page
+arrives, its pagination is read and the remaining ``/page/N/`` pages are queued on
+the same bounded worker pool, so a full crawl takes about as long as the slowest
+category rather than the sum of all of them. Species rows are streamed to the CSV
+file as pages arrive, in category and page order, so the output matches a
+sequential crawl.
+
+Usage:
+    python crawl_animal_links.py [--workers N] [--rate R]
+"""
+
+import argparse
+import csv
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import requests
+from bs4 import BeautifulSoup
+
+from fetch_metrics import add_metrics_arguments, configure_metrics_from_args
+from http_cache import add_cache_arguments, cached_get, configure_cache_from_args, get_cache
+from http_session import add_session_arguments, configure_session_from_args
+from profiling import add_profile_arguments, configure_profiling_from_args
+from rate_limit import TokenBucket
+
+
+# VNREDLIST_BASE_URL can point at a local stand-in server (see mock_server.py)
+BASE_URL = os.environ.get("VNREDLIST_BASE_URL", "http://vnredlist.vast.vn").rstrip("/")
+
+# All categories to crawl
+CATEGORY_PATHS = [
+    "/dong-vat/dong-vat-co-day-song/lop-thu/",
+    "/dong-vat/dong-vat-co-day-song/lop-chim/",
+    "/dong-vat/dong-vat-co-day-song/lop-bo-sat/",
+    "/dong-vat/dong-vat-co-day-song/lop-luong-cu/",
+    "/dong-vat/dong-vat-co-day-song/lop-ca-xuong/",
+    "/dong-vat/dong-vat-co-day-song/lop-ca-mang-tam/",
+
+    "/dong-vat/nganh-chan-khop/lop-con-trung/",
+    "/dong-vat/nganh-chan-khop/lop-hinh-nhen/",
+    "/dong-vat/nganh-chan-khop/lop-giap-xac-lon/",
+    "/dong-vat/nganh-chan-khop/lop-mieng-dot/",
+
+    "/dong-vat/nganh-than-mem/lop-than-mem-chan-bung/",
+    "/dong-vat/nganh-than-mem/lop-than-mem-hai-manh-vo/",
+    "/dong-vat/nganh-than-mem/lop-chan-dau/",
+
+    "/dong-vat/nganh-da-gai/lop-cau-gai/",
+    "/dong-vat/nganh-da-gai/lop-hai-sam/",
+
+    "/dong-vat/nganh-san-ho/lop-octocorallia/",
+    "/dong-vat/nganh-san-ho/lop-hexacorallia/",
+
+    "/thuc-vat/nganh-moc-lan/lop-moc-lan/",
+    "/thuc-vat/nganh-moc-lan/lop-hanh/",
+
+    "/thuc-vat/nganh-thong/lop-thong/",
+    "/thuc-vat/nganh-thong/lop-tue/",
+
+    "/thuc-vat/nganh-duong-xi/lop-duong-xi/",
+
+    "/thuc-vat/nganh-thong-dat/lop-thong-dat/",
+
+    "/thuc-vat/nganh-khuyet-la-thong/lop-khuyet-la-thong/",
+
+    "/thuc-vat/nganh-rong-luc/lop-ulvophyceae/",
+
+    "/thuc-vat/nganh-rong-nau/lop-phaeophyceae/",
+
+    "/thuc-vat/nganh-rong-do/lop-bangiophyceae/",
+    "/thuc-vat/nganh-rong-do/lop-florideophyceae/",
+
+    "/thuc-vat/nganh-reu-tan/lop-jungermanniopsida/",
+
+    "/thuc-vat/nganh-nam-nang/lop-nam-dia/",
+
+    "/thuc-vat/nganh-nam-dam/lop-nam-tan/",
+    "/thuc-vat/nganh-nam-dam/lop-nam-ngan-nhi/"
+]
+TARGET_URLS = [f"{BASE_URL}{path}" for path in CATEGORY_PATHS]
+
+# Headers to mimic a browser request
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SPECIES_CSV = os.path.join(SCRIPT_DIR, 'vnredlist_all_species_links.csv')
+DEFAULT_STATS_CSV = os.path.join(SCRIPT_DIR, 'vnredlist_category_statistics.csv')
+
+SPECIES_COLUMNS = ['scientific_name', 'common_name_vi', 'url', 'category', 'category_url']
+STATS_COLUMNS = ['category', 'url', 'total_pages', 'species_count', 'status']
+
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 4.0
+
+PAGE_LINK_PATTERN = re.compile(r'/page/(\d+)/')
+
+# Rate limiter for requests that go to the network (None = unthrottled)
+request_limiter: Optional[TokenBucket] = None
+
+
+def fetch_page(url: str) -> Optional[BeautifulSoup]:
+    """
+    Fetch a web page and return BeautifulSoup object.
+
+    Args:
+        url: The URL to fetch
+
+    Returns:
+        BeautifulSoup object of the page content, None if the request failed
+    """
+    try:
+        response = cached_get(url, headers=HEADERS, timeout=10, source='vnredlist', throttle=request_limiter)
+        response.raise_for_status()
+        print(f"✓ Successfully fetched: {url}")
+        return BeautifulSoup(response.content, 'html.parser')
+    except requests.exceptions.RequestException as e:
+        print(f"✗ Error fetching {url}: {e}")
+        return None
+
+
+def extract_animal_links(soup: BeautifulSoup) -> List[Dict[str, str]]:
+    """
+    Extract animal links from a page.
+
+    Args:
+        soup: BeautifulSoup object of the page
+
+    Returns:
+        List of dictionaries containing species information
+    """
+    animals = []
+
+    # Species links are in h2 tags with anchor tags
+    for header in soup.find_all('h2'):
+        link_tag = header.find('a')
+        if link_tag and link_tag.get('href'):
+            url = link_tag.get('href')
+
+            # Only process species links (not navigation links)
+            if url.startswith(f'{BASE_URL}/') and url.count('/') > 3:
+                scientific_name = link_tag.get_text(strip=True)
+
+                # The Vietnamese common name is usually in the next element
+                common_name = ""
+                next_text = header.find_next_sibling()
+                if next_text:
+                    common_name = next_text.get_text(strip=True)
+
+                animals.append({
+                    'scientific_name': scientific_name,
+                    'common_name_vi': common_name,
+                    'url': url
+                })
+
+    return animals
+
+
+def get_total_pages(soup: BeautifulSoup) -> int:
+    """
+    Determine the total number of pages from pagination.
+
+    Args:
+        soup: BeautifulSoup object of the first page
+
+    Returns:
+        Total number of pages
+    """
+    max_page = 1
+    for link in soup.find_all('a', href=True):
+        # Look for pattern like /page/2/, /page/3/, etc.
+        match = PAGE_LINK_PATTERN.search(link.get('href', ''))
+        if match:
+            max_page = max(max_page, int(match.group(1)))
+    return max_page
+
+
+def get_category_name(url: str) -> str:
+    """
+    Extract category name from URL for labeling.
+
+    Args:
+        url: The category URL
+
+    Returns:
+        A readable category name
+    """
+    parts = url.rstrip('/').split('/')
+    if len(parts) >= 2:
+        return f"{parts[-2]}/{parts[-1]}"
+    return url
+
+
+def page_url(category_url: str, page_num: int) -> str:
+    return category_url if page_num == 1 else f"{category_url}page/{page_num}/"
+
+
+class OrderedRowWriter:
+    """
+    Streams species rows to a CSV file in (category, page) order.
+
+    Pages finish in any order; each one is buffered until every page before it has
+    been written, then written and flushed immediately.
+    """
+
+    def __init__(self, path: Optional[str], num_categories: int,
+                 on_rows: Optional[Callable[[List[Dict[str, str]]], None]] = None):
+        self.num_categories = num_categories
+        self.on_rows = on_rows
+        self.total_pages: Dict[int, int] = {}
+        self.pending: Dict[Tuple[int, int], List[Dict[str, str]]] = {}
+        self.rows: List[Dict[str, str]] = []
+        self.position = (0, 1)
+        self.file = None
+        self.writer = None
+        if path:
+            self.file = open(path, 'w', encoding='utf-8-sig', newline='')
+            self.writer = csv.DictWriter(self.file, fieldnames=SPECIES_COLUMNS, lineterminator='\n')
+            self.writer.writeheader()
+
+    def set_total_pages(self, category_idx: int, total_pages: int) -> None:
+        self.total_pages[category_idx] = total_pages
+        self._drain()
+
+    def add_page(self, category_idx: int, page_num: int, rows: List[Dict[str, str]]) -> None:
+        self.pending[(category_idx, page_num)] = rows
+        self._drain()
+
+    def _drain(self) -> None:
+        category_idx, page_num = self.position
+        while category_idx < self.num_categories:
+            total_pages = self.total_pages.get(category_idx)
+            if total_pages is not None and page_num > total_pages:
+                category_idx, page_num = category_idx + 1, 1
+                continue
+            if (category_idx, page_num) not in self.pending:
+                break
+
+            rows = self.pending.pop((category_idx, page_num))
+            if self.on_rows is not None:
+                self.on_rows(rows)
+            else:
+                self.rows.extend(rows)
+            if self.writer is not None:
+                self.writer.writerows(rows)
+                self.file.flush()
+            page_num += 1
+        self.position = (category_idx, page_num)
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+
+
+def crawl_categories(target_urls: List[str], workers: int = DEFAULT_WORKERS,
+                     rate: Optional[float] = DEFAULT_RATE,
+                     species_csv: Optional[str] = None,
+                     on_rows: Optional[Callable[[List[Dict[str, str]]], None]] = None
+                     ) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Crawl the species links of every category, fetching pages concurrently.
+
+    Args:
+        target_urls: Category URLs to crawl
+        workers: Number of concurrent requests
+        rate: Maximum requests per second to the server (None = keep the current
+            ``request_limiter``, unthrottled by default)
+        species_csv: CSV file rows are streamed to as pages arrive (optional)
+        on_rows: Called with the rows of each page, in category and page order, as
+            soon as they can be emitted; rows are then not collected in memory
+
+    Returns:
+        Tuple of (species rows, category statistics), in category and page order
+        (the species rows are empty when ``on_rows`` is given)
+    """
+    global request_limiter
+    if rate is not None:
+        request_limiter = TokenBucket(rate=rate, capacity=workers)
+
+    output = OrderedRowWriter(species_csv, len(target_urls), on_rows)
+    category_names = [get_category_name(url) for url in target_urls]
+    total_pages: Dict[int, int] = {}
+    species_counts: Dict[int, int] = {}
+
+    def fetch(category_idx: int, page_num: int) -> Tuple[int, int, Optional[BeautifulSoup]]:
+        return category_idx, page_num, fetch_page(page_url(target_urls[category_idx], page_num))
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures: Set[Future] = {executor.submit(fetch, idx, 1) for idx in range(len(target_urls))}
+
+            while futures:
+                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    category_idx, page_num, soup = future.result()
+                    category_name = category_names[category_idx]
+                    category_url = target_urls[category_idx]
+
+                    if page_num == 1:
+                        if soup is None:
+                            print(f"✗ Failed to fetch first page of {category_name}")
+                            total_pages[category_idx] = 0
+                            output.set_total_pages(category_idx, 0)
+                            continue
+
+                        # Fan out: queue the remaining pages of this category
+                        total_pages[category_idx] = get_total_pages(soup)
+                        print(f"  {category_name}: {total_pages[category_idx]} pages")
+                        output.set_total_pages(category_idx, total_pages[category_idx])
+                        for next_page in range(2, total_pages[category_idx] + 1):
+                            futures.add(executor.submit(fetch, category_idx, next_page))
+
+                    rows = []
+                    if soup is not None:
+                        for species in extract_animal_links(soup):
+                            species['category'] = category_name
+                            species['category_url'] = category_url
+                            rows.append(species)
+                        print(f"  {category_name} page {page_num}: Found {len(rows)} species")
+                    else:
+                        print(f"  {category_name} page {page_num}: Failed to fetch")
+
+                    species_counts[category_idx] = species_counts.get(category_idx, 0) + len(rows)
+                    output.add_page(category_idx, page_num, rows)
+    finally:
+        output.close()
+
+    category_stats = []
+    for category_idx, url in enumerate(target_urls):
+        failed = total_pages.get(category_idx, 0) == 0
+        category_stats.append({
+            'category': category_names[category_idx],
+            'url': url,
+            'total_pages': total_pages.get(category_idx, 0),
+            'species_count': species_counts.get(category_idx, 0),
+            'status': 'Failed' if failed else 'Success'
+        })
+
+    return output.rows, category_stats
+
+
+def write_stats_csv(category_stats: List[Dict], path: str) -> None:
+    """Save category statistics in the format of vnredlist_category_statistics.csv."""
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=STATS_COLUMNS, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(category_stats)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Crawl species links from all Vietnam Red List categories.")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"Number of concurrent requests (default: {DEFAULT_WORKERS})")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f"Maximum requests per second (default: {DEFAULT_RATE})")
+    parser.add_argument('--output', default=DEFAULT_SPECIES_CSV,
+                        help=f"Species links CSV (default: {DEFAULT_SPECIES_CSV})")
+    parser.add_argument('--stats-output', default=DEFAULT_STATS_CSV,
+                        help=f"Category statistics CSV (default: {DEFAULT_STATS_CSV})")
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
+    add_profile_arguments(parser)
+    add_session_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main entry point."""
+    args = parse_args()
+    configure_cache_from_args(args, 'vnredlist')
+    configure_metrics_from_args(args)
+    configure_profiling_from_args(args, args.output)
+    configure_session_from_args(args, pool_size=args.workers)
+
+    print(f"Crawling {len(TARGET_URLS)} categories with {args.workers} workers...")
+    print("=" * 80)
+
+    all_species, category_stats = crawl_categories(TARGET_URLS, workers=args.workers, rate=args.rate,
+                                                   species_csv=args.output)
+    write_stats_csv(category_stats, args.stats_output)
+
+    print("\n" + "=" * 80)
+    print(f"✓ COMPLETE! Total species collected: {len(all_species)}")
+    print(f"  Species links saved to: {args.output}")
+    print(f"  Category statistics saved to: {args.stats_output}")
+    print(f"  Successful categories: {sum(1 for stats in category_stats if stats['status'] == 'Success')}")
+    print(f"  Failed categories: {sum(1 for stats in category_stats if stats['status'] == 'Failed')}")
+
+    cache = get_cache()
+    if cache is not None:
+        print(f"  Responses served from cache: {cache.stats['hits']}")
+        print(f"  Pages unchanged since last fetch (HTTP 304): {cache.stats['not_modified']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,46 +5,75 @@ This script reads all species data from JSON files, queries the IUCN Red List AP
 and saves the conservation status to a JSON file.
 """
 
-import json
+import argparse
 import os
-import time
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
+from urllib.parse import quote
 import requests
 from dotenv import load_dotenv
 
+from checkpoint import CheckpointJournal
+from fetch_metrics import add_metrics_arguments, configure_metrics_from_args
+from http_cache import DEFAULT_CACHE_DIR, add_cache_arguments, cached_get, configure_cache_from_args, get_cache
+from http_session import add_session_arguments, configure_session_from_args
+from json_stream import JsonArrayWriter, add_output_arguments, output_indent
+from profiling import add_profile_arguments, configure_profiling_from_args
+from rate_limit import TokenBucket
+from refresh_manifest import (RefreshManifest, add_refresh_arguments, compute_source_hashes,
+                              is_incremental, load_existing_records, stale_after_from_args)
+from snapshot_diff import add_change_arguments, index_snapshot, report_changes
+from species_corpus import DECREE_FILES, load_corpus
+
 load_dotenv()  # Load environment variables from .env file
-# IUCN Red List API v4 configuration
-IUCN_API_BASE_URL = "https://api.iucnredlist.org/api/v4"
+# IUCN Red List API v4 configuration (IUCN_API_BASE_URL can point at a local stand-in server,
+# see mock_server.py)
+IUCN_API_BASE_URL = os.environ.get("IUCN_API_BASE_URL", "https://api.iucnredlist.org/api/v4")
 # You'll need to get a free API token from https://api.iucnredlist.org/users/sign_up
 # For now, using a placeholder - user should replace this
 IUCN_API_TOKEN = os.environ.get("IUCN_API_TOKEN", "YOUR_API_TOKEN_HERE")
 print(IUCN_API_TOKEN)
-def read_species_from_json(file_path: str) -> List[str]:
-    """
-    Read species scientific names from a JSON file.
-    
-    Args:
-        file_path: Path to the JSON file
-        
-    Returns:
-        List of scientific names
-    """
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-        scientific_names = []
-        for species in data:
-            if 'scientific_name' in species and 'value' in species['scientific_name']:
-                name = species['scientific_name']['value'].strip()
-                if name:
-                    scientific_names.append(name)
-        
-        return scientific_names
-    except Exception as e:
-        print(f"Error reading {file_path}: {e}")
-        return []
+
+# Rate limiting: IUCN API allows reasonable request rates
+# Keep at most 2 requests per second to be respectful (cached responses are not throttled)
+request_limiter = TokenBucket(rate=2.0)
+
+# Journal of per-species results for --resume
+DEFAULT_CHECKPOINT = Path(DEFAULT_CACHE_DIR) / "iucn_checkpoint.jsonl"
+
+# Results worth keeping on resume; errors (e.g. HTTP 429) are retried
+RESUMABLE_STATUSES = {"success", "not_found"}
+
+# Last fetch time and source hash per species, for --incremental runs
+DEFAULT_MANIFEST = Path(__file__).parent / "iucn_manifest.json"
+
+# The JSON files species are read from
+SOURCE_FILES = DECREE_FILES
+
+# Bulk mode: only list families with at least this many species to resolve
+DEFAULT_BULK_MIN_GROUP = 3
+# Bulk mode: most listing pages fetched per family
+DEFAULT_BULK_MAX_PAGES = 20
+
+# Scope code of global (as opposed to regional) assessments
+GLOBAL_SCOPE_CODE = "1"
+
+
+def api_headers() -> Dict[str, str]:
+    """Request headers for the IUCN API (Bearer token authentication, API v4 requirement)."""
+    return {
+        "Authorization": f"Bearer {IUCN_API_TOKEN}"
+    }
+
+
+def select_assessment(assessments: List[Dict]) -> Dict:
+    """Pick the latest assessment of a taxon, preferring the global one over regional ones."""
+    latest = [assessment for assessment in assessments if assessment.get('latest', False)] or assessments
+    for assessment in latest:
+        if any(scope.get('code') == GLOBAL_SCOPE_CODE for scope in assessment.get('scopes', [])):
+            return assessment
+    return latest[0]
+
 
 def get_iucn_status(scientific_name: str) -> Dict:
     """
@@ -82,12 +111,8 @@ def get_iucn_status(scientific_name: str) -> Dict:
         if infra_name:
             params["infra_name"] = infra_name
         
-        # Use Bearer token authentication in header (API v4 requirement)
-        headers = {
-            "Authorization": f"Bearer {IUCN_API_TOKEN}"
-        }
-        
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = cached_get(url, params=params, headers=api_headers(), timeout=10, source='iucn',
+                              throttle=request_limiter)
         
         if response.status_code == 200:
             data = response.json()
@@ -96,16 +121,8 @@ def get_iucn_status(scientific_name: str) -> Dict:
             # - 'taxon' object contains species info
             # - 'assessments' array contains assessment data
             if 'assessments' in data and len(data['assessments']) > 0:
-                # Get the latest assessment (should have latest=True)
-                latest = None
-                for assessment in data['assessments']:
-                    if assessment.get('latest', False):
-                        latest = assessment
-                        break
-                
-                # If no latest found, use first one
-                if latest is None:
-                    latest = data['assessments'][0]
+                # Same choice as in bulk mode: the latest assessment, global scope first
+                latest = select_assessment(data['assessments'])
                 
                 # Get common name from taxon object
                 common_name = ''
@@ -179,40 +196,237 @@ def get_iucn_status(scientific_name: str) -> Dict:
             "status": "error"
         }
 
+def fetch_family_assessments(family_name: str, wanted: Set[str], max_pages: int) -> Optional[Dict[str, Dict]]:
+    """
+    List the latest assessments of a family with the paged /taxa/family endpoint.
+
+    Paging stops as soon as every wanted species was seen, on the last page, or after
+    ``max_pages`` pages.
+
+    Args:
+        family_name: Family name (e.g., "Felidae")
+        wanted: Scientific names to look for
+        max_pages: Maximum number of pages to fetch
+
+    Returns:
+        Dictionary mapping wanted scientific names to their selected assessment, or
+        None if the listing failed
+    """
+    url = f"{IUCN_API_BASE_URL}/taxa/family/{quote(family_name)}"
+    found: Dict[str, List[Dict]] = {}
+
+    for page in range(1, max_pages + 1):
+        try:
+            response = cached_get(url, params={"latest": "true", "page": page}, headers=api_headers(),
+                                  timeout=30, source='iucn', throttle=request_limiter)
+        except requests.exceptions.RequestException as e:
+            print(f"  ✗ Error listing {family_name}: {e}")
+            return None
+
+        if response.status_code == 404:
+            break
+        if response.status_code != 200:
+            print(f"  ✗ Error listing {family_name}: HTTP {response.status_code}")
+            return None
+
+        assessments = response.json().get('assessments', [])
+        for assessment in assessments:
+            taxon_name = assessment.get('taxon_scientific_name', '')
+            if taxon_name in wanted:
+                found.setdefault(taxon_name, []).append(assessment)
+
+        total_pages = response.headers.get('Total-Pages')
+        if not assessments or len(found) == len(wanted) or (total_pages and page >= int(total_pages)):
+            break
+
+    return {name: select_assessment(assessments) for name, assessments in found.items()}
+
+
+def status_from_assessment(scientific_name: str, assessment: Dict, previous: Dict) -> Dict:
+    """
+    Build a lookup result from a listed assessment.
+
+    Listings carry no taxonomy or common names, so these are taken from the
+    species' previous entry in iucn_status.json.
+
+    Args:
+        scientific_name: Scientific name of the species
+        assessment: Assessment from a family listing
+        previous: Previous output entry of the species
+
+    Returns:
+        Dictionary in the format returned by get_iucn_status
+    """
+    scope = ''
+    if assessment.get('scopes'):
+        scope = assessment['scopes'][0].get('description', {}).get('en', '')
+
+    name_parts = scientific_name.split()
+    return {
+        "scientific_name": scientific_name,
+        "assessment_id": assessment.get('assessment_id'),
+        "category": assessment.get('red_list_category_code', 'Unknown'),
+        "common_name": previous.get('common_name_en', {}).get('value', ''),
+        "sis_id": assessment.get('sis_taxon_id', ''),
+        "year_published": assessment.get('year_published', ''),
+        "scope": scope,
+        "url": assessment.get('url', ''),
+        "kingdom_name": previous.get('kingdom_latin', ''),
+        "phylum_name": previous.get('phylum_latin', ''),
+        "class_name": previous.get('class_latin', ''),
+        "order_name": previous.get('order_latin', ''),
+        "family_name": previous.get('family_latin', ''),
+        "genus_name": name_parts[0],
+        "species_name": name_parts[1] if len(name_parts) > 1 else '',
+        "status": "success"
+    }
+
+
+def resolve_in_bulk(names: List[str], existing_records: Dict[str, Dict],
+                    min_group: int = DEFAULT_BULK_MIN_GROUP,
+                    max_pages: int = DEFAULT_BULK_MAX_PAGES) -> Dict[str, Dict]:
+    """
+    Resolve many species per request by listing the assessments of their families.
+
+    Species are grouped by the family of their previous IUCN entry. Families with at
+    least ``min_group`` species are listed, with at most as many pages as they have
+    species so that a listing never costs more requests than per-species lookups.
+    Species that are not resolved this way (no previous entry, small family, not in
+    the listing) are left to per-species lookups.
+
+    Args:
+        names: Scientific names to resolve
+        existing_records: Previous output entries, keyed by scientific name
+        min_group: Minimum number of species for a family to be listed
+        max_pages: Maximum number of listing pages per family
+
+    Returns:
+        Dictionary mapping resolved scientific names to lookup results
+    """
+    families: Dict[str, List[str]] = {}
+    for scientific_name in names:
+        family = existing_records.get(scientific_name, {}).get('family_latin', '').strip()
+        if family:
+            families.setdefault(family.capitalize(), []).append(scientific_name)
+
+    resolved: Dict[str, Dict] = {}
+    for family, members in sorted(families.items()):
+        if len(members) < min_group:
+            continue
+
+        assessments = fetch_family_assessments(family, set(members), min(max_pages, len(members)))
+        if assessments is None:
+            continue
+
+        for scientific_name, assessment in assessments.items():
+            resolved[scientific_name] = status_from_assessment(
+                scientific_name, assessment, existing_records[scientific_name])
+        print(f"  {family}: {len(assessments)} of {len(members)} species resolved")
+
+    return resolved
+
+
+def format_iucn_entry(status_data: Dict) -> Dict:
+    """Format a successful IUCN lookup in the structure of the other data files."""
+    return {
+        "scientific_name": {
+            "value": status_data['scientific_name'],
+            "note": ""
+        },
+        "common_name": {
+            "value": "",  # Will be filled by merge_common_names.py
+            "note": ""
+        },
+        "common_name_en": {
+            "value": status_data.get('common_name', ''),  # IUCN English name
+            "note": ""
+        },
+        "kingdom_latin": status_data.get('kingdom_name', ''),
+        "kingdom_vi": "",
+        "phylum_latin": status_data.get('phylum_name', ''),
+        "phylum_vi": "",
+        "class_latin": status_data.get('class_name', ''),
+        "class_vi": "",
+        "order_latin": status_data.get('order_name', ''),
+        "order_vi": "",
+        "family_latin": status_data.get('family_name', ''),
+        "family_vi": "",
+        "note": "",
+        "laws": [
+            {
+                "name": {
+                    "vi": "IUCN",
+                    "en": "IUCN"
+                },
+                "value": status_data['category'],
+                "note": status_data.get('url', '')
+            }
+        ]
+    }
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Fetch IUCN Red List status for species.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume an interrupted run, skipping species already in the checkpoint")
+    parser.add_argument("--checkpoint", default=str(DEFAULT_CHECKPOINT),
+                        help=f"Checkpoint journal path (default: {DEFAULT_CHECKPOINT})")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Resolve species by listing the assessments of their families, "
+                             "falling back to per-species lookups")
+    parser.add_argument("--bulk-min-group", type=int, default=DEFAULT_BULK_MIN_GROUP,
+                        help=f"Smallest family listed in bulk mode (default: {DEFAULT_BULK_MIN_GROUP})")
+    parser.add_argument("--bulk-max-pages", type=int, default=DEFAULT_BULK_MAX_PAGES,
+                        help=f"Most listing pages per family in bulk mode (default: {DEFAULT_BULK_MAX_PAGES})")
+    add_output_arguments(parser)
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
+    add_profile_arguments(parser)
+    add_session_arguments(parser)
+    add_refresh_arguments(parser, str(DEFAULT_MANIFEST))
+    add_change_arguments(parser)
+    return parser.parse_args(argv)
+
 def main():
     """Main function to process all species and fetch IUCN status."""
+    args = parse_args()
+    configure_cache_from_args(args, 'iucn')
+    configure_metrics_from_args(args)
+    configure_session_from_args(args)
     
     # Get the project root directory
     script_dir = Path(__file__).parent
     # Go up from scripts to src, then to lib
     lib_dir = script_dir.parent / "lib"
-    
-    # Define the JSON files to read
-    json_files = [
-        "nd06_2019.json",
-        "nd160_2013.json",
-        "nd64_2019.json",
-        "nd84_2021.json",
-        "tt27_2025.json"
-    ]
+    output_file = lib_dir / "iucn_status.json"
+    configure_profiling_from_args(args, str(output_file))
     
     # Collect all unique scientific names
-    all_species: Set[str] = set()
-    
     print("Reading species data from JSON files...")
-    for json_file in json_files:
-        file_path = lib_dir / json_file
-        if file_path.exists():
-            species_names = read_species_from_json(str(file_path))
-            all_species.update(species_names)
-            print(f"  {json_file}: {len(species_names)} species")
-        else:
+    corpus = load_corpus(str(lib_dir), SOURCE_FILES)
+    for json_file in SOURCE_FILES:
+        if json_file in corpus.missing_files:
             print(f"  Warning: {json_file} not found")
+        else:
+            print(f"  {json_file}: {len(corpus.file_names(json_file))} species")
     
-    print(f"\nTotal unique species: {len(all_species)}")
+    print(f"\nTotal unique species: {len(corpus)}")
     
-    # Check if API token is set
-    if IUCN_API_TOKEN == "YOUR_API_TOKEN_HERE":
+    # In incremental mode only new, changed or stale species are queried
+    names = sorted(corpus.names())
+    to_fetch = names
+    existing_records: Dict[str, Dict] = {}
+    source_hashes = compute_source_hashes(str(lib_dir), SOURCE_FILES)
+    manifest = RefreshManifest(args.manifest)
+    if is_incremental(args):
+        existing_records = load_existing_records(str(output_file))
+        refresh_names = set(manifest.select_for_refresh(
+            source_hashes, stale_after=stale_after_from_args(args), since=args.since))
+        to_fetch = [name for name in names if name in refresh_names]
+        print(f"Incremental refresh: {len(to_fetch)} of {len(names)} species to fetch")
+    
+    # Check if API token is set (not needed when serving from the cache only)
+    if IUCN_API_TOKEN == "YOUR_API_TOKEN_HERE" and not args.cache_only:
         print("\n⚠️  WARNING: IUCN_API_TOKEN is not set!")
         print("Please set the IUCN_API_TOKEN environment variable or update the script.")
         print("You can get a free token at: https://api.iucnredlist.org/users/sign_up")
@@ -220,80 +434,83 @@ def main():
         if response.lower() != 'y':
             return
     
+    # Results are journaled as they arrive so an interrupted run can be resumed
+    journal = CheckpointJournal(args.checkpoint)
+    done: Dict[str, Dict] = {}
+    if args.resume:
+        done = {
+            name: record for name, record in journal.load().items()
+            if record.get('status') in RESUMABLE_STATUSES
+        }
+        print(f"\nResuming: {len(done)} species already done in {args.checkpoint}")
+    journal.open(resume=args.resume)
+    
+    # In bulk mode, species of the same family are resolved from one paged listing
+    bulk_results: Dict[str, Dict] = {}
+    if args.bulk:
+        print("\nResolving species in bulk by family...")
+        bulk_results = resolve_in_bulk(
+            [name for name in to_fetch if name not in done],
+            existing_records or load_existing_records(str(output_file)),
+            min_group=args.bulk_min_group, max_pages=args.bulk_max_pages
+        )
+        print(f"Resolved in bulk: {len(bulk_results)} species")
+    
     # Fetch IUCN status for each species
     iucn_data = []
-    formatted_data = []
-    total = len(all_species)
+    total = len(to_fetch)
     
     print(f"\nFetching IUCN status for {total} species...")
     print("This may take a while. Please be patient.\n")
     
-    for i, scientific_name in enumerate(sorted(all_species), 1):
-        print(f"[{i}/{total}] Querying: {scientific_name}")
-        
-        status_data = get_iucn_status(scientific_name)
-        iucn_data.append(status_data)
-        
-        # Print the result
-        if status_data['status'] == 'success':
-            print(f"  ✓ Status: {status_data['category']}")
+    for i, scientific_name in enumerate(to_fetch, 1):
+        if scientific_name in done:
+            status_data = done[scientific_name]
+        elif scientific_name in bulk_results:
+            status_data = bulk_results[scientific_name]
+            journal.append(status_data)
+        else:
+            print(f"[{i}/{total}] Querying: {scientific_name}")
             
-            # Format the data in the required structure
-            formatted_entry = {
-                "scientific_name": {
-                    "value": status_data['scientific_name'],
-                    "note": ""
-                },
-                "common_name": {
-                    "value": "",  # Will be filled by merge_common_names.py
-                    "note": ""
-                },
-                "common_name_en": {
-                    "value": status_data.get('common_name', ''),  # IUCN English name
-                    "note": ""
-                },
-                "kingdom_latin": status_data.get('kingdom_name', ''),
-                "kingdom_vi": "",
-                "phylum_latin": status_data.get('phylum_name', ''),
-                "phylum_vi": "",
-                "class_latin": status_data.get('class_name', ''),
-                "class_vi": "",
-                "order_latin": status_data.get('order_name', ''),
-                "order_vi": "",
-                "family_latin": status_data.get('family_name', ''),
-                "family_vi": "",
-                "note": "",
-                "laws": [
-                    {
-                        "name": {
-                            "vi": "IUCN",
-                            "en": "IUCN"
-                        },
-                        "value": status_data['category'],
-                        "note": status_data.get('url', '')
-                    }
-                ]
-            }
-            formatted_data.append(formatted_entry)
+            status_data = get_iucn_status(scientific_name)
+            journal.append(status_data)
             
-        elif status_data['status'] == 'not_found':
-            print(f"  ⚠ Not found in IUCN database")
-        else:
-            print(f"  ✗ Error: {status_data.get('error', 'Unknown error')}")
+            # Print the result
+            if status_data['status'] == 'success':
+                print(f"  ✓ Status: {status_data['category']}")
+            elif status_data['status'] == 'not_found':
+                print(f"  ⚠ Not found in IUCN database")
+            else:
+                print(f"  ✗ Error: {status_data.get('error', 'Unknown error')}")
         
-        # Rate limiting: IUCN API allows reasonable request rates
-        # Add a small delay to be respectful
-        time.sleep(0.5)
+        iucn_data.append(status_data)
     
-    # Save the formatted results to a JSON file
-    output_file = lib_dir / "iucn_status.json"
+    # Format the data in the required structure, keeping previous entries for
+    # species that were not queried again or whose query failed. Entries are
+    # streamed to a temporary file that replaces the output once complete.
+    results = {item['scientific_name']: item for item in iucn_data}
+    previous = index_snapshot(str(output_file))
+    with JsonArrayWriter(output_file, indent=output_indent(args, 4)) as writer:
+        for scientific_name in names:
+            status_data = results.get(scientific_name)
+            if status_data is not None and status_data['status'] == 'success':
+                writer.write(format_iucn_entry(status_data))
+            elif scientific_name in existing_records and (status_data is None or status_data['status'] == 'error'):
+                writer.write(existing_records[scientific_name])
+    
+    # The run is complete, so the checkpoint is no longer needed
+    journal.remove()
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(formatted_data, f, indent=4, ensure_ascii=False)
+    manifest.mark_fetched(
+        [item['scientific_name'] for item in iucn_data if item['status'] in RESUMABLE_STATUSES],
+        source_hashes
+    )
+    manifest.prune(source_hashes)
+    manifest.save()
     
     print(f"\n✓ IUCN status data saved to: {output_file}")
     print(f"  Format: Structured JSON matching existing data format")
-    print(f"  Species with IUCN status: {len(formatted_data)}")
+    print(f"  Species with IUCN status: {writer.count}")
     
     # Print summary statistics
     categories = {}
@@ -307,8 +524,15 @@ def main():
         print(f"  {category}: {count}")
     print("-" * 50)
     print(f"  Total queried: {len(iucn_data)}")
-    print(f"  Successfully found: {len(formatted_data)}")
+    print(f"  Successfully found: {sum(1 for item in iucn_data if item['status'] == 'success')}")
     print(f"  Not found: {categories.get('Not Found', 0)}")
+    
+    report_changes(previous, str(output_file), args)
+    
+    cache = get_cache()
+    if cache is not None:
+        print(f"  Responses served from cache: {cache.stats['hits']}")
+        print(f"  Unchanged since last fetch (HTTP 304): {cache.stats['not_modified']}")
 
 if __name__ == "__main__":
     main()
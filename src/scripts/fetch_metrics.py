@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Per-request metrics and a JSON Lines trace for fetch runs.
+
+When metrics are enabled (``--metrics`` or ``--trace PATH`` on any fetcher),
+``cached_get`` records every request and ``cached_parse`` every parse:
+
+- request: source, URL, where the response came from (network, cache,
+  revalidated, replay), HTTP status, total seconds (including retries), server
+  seconds (until the response headers of the last attempt), seconds spent
+  waiting for the rate limiter, bytes and number of retries
+- parse: parse name, seconds, and whether a stored result was reused
+
+Events are appended to the trace as they happen, one JSON object per line. At
+the end of the run a summary is printed (and appended to the trace). It has
+p50/p95/p99 latencies, the cache hit ratio, bytes, retries and the split of
+time between network, rate limiting and parsing.
+"""
+
+import argparse
+import atexit
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """q-th percentile of values (linear interpolation between closest ranks), 0 if empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def distribution(values: List[float]) -> Dict[str, float]:
+    """Count, mean and percentiles of a list of durations."""
+    summary = {'count': len(values), 'mean': sum(values) / len(values) if values else 0.0}
+    for q in PERCENTILES:
+        summary[f'p{q}'] = percentile(values, q)
+    summary['max'] = max(values) if values else 0.0
+    return summary
+
+
+class FetchMetrics:
+    """Collects request and parse events, optionally writing them to a trace file."""
+
+    def __init__(self, trace_path: Optional[str] = None):
+        """
+        Args:
+            trace_path: JSON Lines file receiving every event (None = summary only)
+        """
+        self.trace_path = trace_path
+        self._trace = open(trace_path, 'w', encoding='utf-8') if trace_path else None
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests: List[Dict] = []
+        self.parses: List[Dict] = []
+
+    def _write(self, event: Dict) -> None:
+        if self._trace is not None:
+            self._trace.write(json.dumps(event, ensure_ascii=False) + '\n')
+            self._trace.flush()
+
+    def record_request(self, source: str, url: str, origin: str, status_code: int, seconds: float,
+                       bytes_received: int = 0, retries: int = 0, server_seconds: Optional[float] = None,
+                       throttle_seconds: float = 0.0) -> None:
+        """
+        Record a request answered by cached_get.
+
+        Args:
+            source: Cache source name (e.g. "vnredlist")
+            url: Requested URL
+            origin: 'network', 'revalidated' (HTTP 304), 'cache' or 'replay'
+            status_code: HTTP status code
+            seconds: Time from the request until the response body was read, retries included
+            bytes_received: Size of the response body (0 for responses served locally)
+            retries: Attempts retried by the session's retry policy
+            server_seconds: Time until the headers of the last attempt were received
+            throttle_seconds: Time spent waiting for the rate limiter before the request
+        """
+        event = {'event': 'request', 'time': time.time(), 'source': source, 'url': url, 'origin': origin,
+                 'status': status_code, 'seconds': seconds, 'server_seconds': server_seconds,
+                 'throttle_seconds': throttle_seconds, 'bytes': bytes_received, 'retries': retries}
+        with self._lock:
+            self.requests.append(event)
+            self._write(event)
+
+    def record_parse(self, name: str, seconds: float, reused: bool) -> None:
+        """Record a parse (or the reuse of a stored parse result) by cached_parse."""
+        event = {'event': 'parse', 'time': time.time(), 'name': name, 'seconds': seconds, 'reused': reused}
+        with self._lock:
+            self.parses.append(event)
+            self._write(event)
+
+    def summary(self) -> Dict:
+        """Totals and latency distributions of the events recorded so far."""
+        with self._lock:
+            requests = list(self.requests)
+            parses = list(self.parses)
+
+        origins: Dict[str, int] = {}
+        statuses: Dict[str, int] = {}
+        for event in requests:
+            origins[event['origin']] = origins.get(event['origin'], 0) + 1
+            statuses[str(event['status'])] = statuses.get(str(event['status']), 0) + 1
+        network = [event for event in requests if event['origin'] in ('network', 'revalidated')]
+        local = origins.get('cache', 0) + origins.get('replay', 0)
+        cacheable = local + len(network)
+        parsed = [event for event in parses if not event['reused']]
+
+        return {
+            'event': 'summary',
+            'elapsed_seconds': time.time() - self.started,
+            'requests': len(requests),
+            'origins': origins,
+            'statuses': statuses,
+            # Responses served without downloading the body (fresh entries and 304s)
+            'cache_hit_ratio': ((local + origins.get('revalidated', 0)) / cacheable) if cacheable else 0.0,
+            'bytes': sum(event['bytes'] for event in requests),
+            'retries': sum(event['retries'] for event in requests),
+            'network_seconds': sum(event['seconds'] for event in network),
+            'throttle_seconds': sum(event['throttle_seconds'] for event in requests),
+            'parse_seconds': sum(event['seconds'] for event in parsed),
+            'network_latency': distribution([event['seconds'] for event in network]),
+            'server_latency': distribution([event['server_seconds'] for event in network
+                                            if event['server_seconds'] is not None]),
+            'parse_time': distribution([event['seconds'] for event in parsed]),
+            'parses_reused': len(parses) - len(parsed),
+        }
+
+    def close(self) -> Dict:
+        """Append the summary to the trace, close it and return the summary."""
+        summary = self.summary()
+        with self._lock:
+            self._write(summary)
+            if self._trace is not None:
+                self._trace.close()
+                self._trace = None
+        return summary
+
+
+def print_summary(summary: Dict) -> None:
+    """Print an end-of-run summary."""
+    def ms(values: Dict[str, float]) -> str:
+        return ', '.join(f"p{q} {values[f'p{q}'] * 1000:.0f} ms" for q in PERCENTILES)
+
+    print(f"\nFetch metrics ({summary['elapsed_seconds']:.1f}s):")
+    origins = ', '.join(f"{count} {origin}" for origin, count in sorted(summary['origins'].items()))
+    print(f"  Requests: {summary['requests']} ({origins or 'none'}), cache hit ratio "
+          f"{summary['cache_hit_ratio']:.0%}")
+    print(f"  Statuses: {', '.join(f'{status}: {count}' for status, count in sorted(summary['statuses'].items()))}")
+    print(f"  Downloaded: {summary['bytes'] / (1024 * 1024):.1f} MB, retries: {summary['retries']}")
+    if summary['network_latency']['count']:
+        print(f"  Network latency: {ms(summary['network_latency'])}")
+    if summary['server_latency']['count']:
+        print(f"  Server latency (to headers): {ms(summary['server_latency'])}")
+    if summary['parse_time']['count']:
+        print(f"  Parse time: {ms(summary['parse_time'])} ({summary['parses_reused']} reused)")
+    print(f"  Time in network: {summary['network_seconds']:.1f}s, rate limiter: {summary['throttle_seconds']:.1f}s, "
+          f"parsing: {summary['parse_seconds']:.1f}s")
+
+
+# Metrics recorded by cached_get and cached_parse; None disables recording
+fetch_metrics: Optional[FetchMetrics] = None
+
+
+def configure_metrics(metrics: Optional[FetchMetrics]) -> None:
+    """Set the metrics collector used by cached_get and cached_parse."""
+    global fetch_metrics
+    fetch_metrics = metrics
+
+
+def get_metrics() -> Optional[FetchMetrics]:
+    """Return the metrics collector, if any."""
+    return fetch_metrics
+
+
+def add_metrics_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the request metrics options to a script's argument parser."""
+    group = parser.add_argument_group('metrics')
+    group.add_argument('--metrics', action='store_true',
+                       help="Print request and parse latency metrics at the end of the run")
+    group.add_argument('--trace', metavar='PATH',
+                       help="Write every request and parse to this JSON Lines file (implies --metrics)")
+
+
+def configure_metrics_from_args(args: argparse.Namespace) -> Optional[FetchMetrics]:
+    """Install the metrics collector described by parsed command line options."""
+    if not (args.metrics or args.trace):
+        configure_metrics(None)
+        return None
+
+    metrics = FetchMetrics(args.trace)
+    configure_metrics(metrics)
+
+    def report():
+        print_summary(metrics.close())
+        if metrics.trace_path:
+            print(f"  Trace saved to: {metrics.trace_path}")
+
+    atexit.register(report)
+    return metrics
@@ -8,36 +8,62 @@ website (vnredlist.vast.vn) for species listed in the project's JSON data files.
 Output format matches the structure of other conservation law files in src/lib/
 """
 
-import json
+import argparse
+import csv
 import os
-import re
 import sys
-import time
-from typing import Dict, List, Optional, Set
-from urllib.parse import quote
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import quote, urlsplit
 
 import requests
-from bs4 import BeautifulSoup
 
+from fetch_metrics import add_metrics_arguments, configure_metrics_from_args
+from http_cache import add_cache_arguments, cached_get, cached_parse, configure_cache_from_args, get_cache
+from http_session import add_session_arguments, configure_session_from_args
+from json_stream import JsonArrayWriter, add_output_arguments, output_indent
+from name_matching import NameMatcher, spelling_variant
+from profiling import add_profile_arguments, configure_profiling_from_args
+from rate_limit import TokenBucket
+from refresh_manifest import (RefreshManifest, add_refresh_arguments, compute_source_hashes,
+                              is_incremental, load_existing_records, stale_after_from_args)
+from snapshot_diff import add_change_arguments, index_snapshot, report_changes
+from species_corpus import DECREE_FILES, load_corpus, normalize_scientific_name
+from vnredlist_parser import DEFAULT_BACKEND, PARSER_BACKENDS, PARSER_VERSION, parse_species_page
 
-BASE_URL = "http://vnredlist.vast.vn"
+
+# VNREDLIST_BASE_URL can point at a local stand-in server (see mock_server.py)
+BASE_URL = os.environ.get("VNREDLIST_BASE_URL", "http://vnredlist.vast.vn").rstrip("/")
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
 }
 
-# Cache to avoid duplicate requests
-species_cache: Dict[str, Optional[str]] = {}
+# Source files species are read from, in priority order
+SOURCE_FILES = DECREE_FILES + ['iucn_status.json']
+
+# Cache to avoid duplicate requests: scientific name -> (status, URL of the page it was read from)
+species_cache: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+
+# Species whose lookup failed with a network or server error (rather than "not listed")
+fetch_errors: Set[str] = set()
+
+# Rate limiter for requests that go to the network (None = unthrottled)
+request_limiter: Optional[TokenBucket] = None
+
+# HTML parser backend for species pages (None = fastest available)
+parser_backend: Optional[str] = None
 
+# Last fetch time and source hash per species, for --incremental runs
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vnredlist_manifest.json')
 
-def normalize_scientific_name(name: str) -> str:
-    """Normalize scientific name for URL construction."""
-    # Remove author names and years (e.g., "Linnaeus, 1758")
-    name = re.sub(r'\s+[A-Z][a-z]+.*\d{4}.*$', '', name)
-    # Remove subspecies indicators and extra info
-    name = re.sub(r'\s+(var\.|subsp\.|f\.).*$', '', name)
-    # Clean up extra whitespace
-    name = ' '.join(name.split())
-    return name.strip()
+# Species pages found by crawl_animal_links.py, for names whose slug does not exist
+SPECIES_LINKS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vnredlist_all_species_links.csv')
+
+# Scientific name -> page URL from SPECIES_LINKS_CSV, and its name index (loaded on first use)
+species_links: Optional[Dict[str, str]] = None
+species_links_matcher: Optional[NameMatcher] = None
+_species_links_lock = threading.Lock()
 
 
 def scientific_name_to_url_slug(scientific_name: str) -> str:
@@ -48,6 +74,50 @@ def scientific_name_to_url_slug(scientific_name: str) -> str:
     return slug
 
 
+def load_species_links(csv_path: str = SPECIES_LINKS_CSV) -> Dict[str, str]:
+    """
+    Load the species page URLs found by the category crawl.
+
+    Returns:
+        Dictionary mapping scientific names (as listed on vnredlist) to page URLs
+    """
+    links = {}
+    if not os.path.exists(csv_path):
+        return links
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            name = row.get('scientific_name', '').strip()
+            if name and row.get('url') and name not in links:
+                links[name] = row['url']
+    return links
+
+
+def find_species_page(scientific_name: str) -> Optional[str]:
+    """
+    Find the page of a species listed on vnredlist under a variant of its name
+    (subspecies, other spelling).
+
+    Args:
+        scientific_name: Scientific name as written in the source files
+
+    Returns:
+        URL of the matching species page on BASE_URL, None if no listed name matches
+    """
+    global species_links, species_links_matcher
+    with _species_links_lock:
+        if species_links_matcher is None:
+            species_links = load_species_links(SPECIES_LINKS_CSV)
+            species_links_matcher = NameMatcher(species_links)
+
+    # Fuzzy matches must be the same species: a near name of the genus may be another one
+    match = species_links_matcher.match(scientific_name,
+                                        accept=lambda name, known: spelling_variant(name, known, genus_edits=1))
+    if match is None:
+        return None
+    # The crawl recorded vnredlist.vast.vn URLs; keep requests on a VNREDLIST_BASE_URL override
+    return f"{BASE_URL}{urlsplit(species_links[match.name]).path}"
+
+
 def fetch_conservation_status(scientific_name: str) -> Optional[str]:
     """
     Fetch conservation status for a species from Vietnam Red List website.
@@ -58,6 +128,22 @@ def fetch_conservation_status(scientific_name: str) -> Optional[str]:
     Returns:
         Conservation status code (e.g., "CR", "EN", "VU", "NT", "LC") or None if not found
     """
+    return fetch_species_status(scientific_name)[0]
+
+
+def fetch_species_status(scientific_name: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Fetch conservation status for a species, with the page it was read from.
+    
+    The page is not always at the slug of the name: it may be found by the genus
+    retry or, for name variants, among the species links of the crawl.
+    
+    Args:
+        scientific_name: Scientific name of the species
+        
+    Returns:
+        (status code, page URL), or (None, None) if not found
+    """
     # Check cache first
     if scientific_name in species_cache:
         return species_cache[scientific_name]
@@ -67,7 +153,8 @@ def fetch_conservation_status(scientific_name: str) -> Optional[str]:
         url = f"{BASE_URL}/{slug}/"
         
         print(f"  Fetching: {url}")
-        response = requests.get(url, headers=HEADERS, timeout=30)
+        response = cached_get(url, headers=HEADERS, timeout=30, source='vnredlist',
+                              throttle=request_limiter)
         
         # If not found, try without the species epithet (for some edge cases)
         if response.status_code == 404:
@@ -77,53 +164,46 @@ def fetch_conservation_status(scientific_name: str) -> Optional[str]:
                 genus_slug = parts[0].lower()
                 url = f"{BASE_URL}/{genus_slug}-{parts[1].lower()}/"
                 print(f"  Retry: {url}")
-                response = requests.get(url, headers=HEADERS, timeout=30)
+                response = cached_get(url, headers=HEADERS, timeout=30, source='vnredlist',
+                                      throttle=request_limiter)
+        
+        # Still not found: look the name up among the species pages found by the crawl
+        if response.status_code == 404:
+            page_url = find_species_page(scientific_name)
+            if page_url and page_url != url:
+                url = page_url
+                print(f"  Retry (matched name): {url}")
+                response = cached_get(url, headers=HEADERS, timeout=30, source='vnredlist',
+                                      throttle=request_limiter)
         
         if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Look for the conservation status section
-            # The structure is: <h3>Phân hạng bảo tồn</h3> followed by <p>STATUS</p>
-            headings = soup.find_all(['h3', 'h4'])
-            for heading in headings:
-                if 'Phân hạng bảo tồn' in heading.get_text():
-                    # Get the next sibling element
-                    next_elem = heading.find_next_sibling(['p', 'div'])
-                    if next_elem:
-                        status_text = next_elem.get_text().strip()
-                        # Extract status code (CR, EN, VU, NT, LC, DD, etc.)
-                        status_match = re.search(r'\b(CR|EN|VU|NT|LC|DD|EW|EX|NE)\b', status_text)
-                        if status_match:
-                            status = status_match.group(1)
-                            species_cache[scientific_name] = status
-                            print(f"    ✓ Found: {status}")
-                            return status
-            
-            # Alternative: Look in the assessment information section
-            assessment_section = soup.find('h2', string=re.compile(r'Thông tin đánh giá'))
-            if assessment_section:
-                # Look for "Phân hạng" subsection
-                section_content = assessment_section.find_next('div')
-                if section_content:
-                    status_text = section_content.get_text()
-                    status_match = re.search(r'Phân hạng[:\s]+([A-Z]{1,2})', status_text)
-                    if status_match:
-                        status = status_match.group(1)
-                        species_cache[scientific_name] = status
-                        print(f"    ✓ Found: {status}")
-                        return status
+            # The page is parsed once into a section index; the status is read from the
+            # "Phân hạng bảo tồn" heading or, failing that, the assessment information section.
+            # Unchanged pages (HTTP 304 or fresh cache entries) reuse the stored result.
+            status = cached_parse(
+                response, f'vnredlist_status:{PARSER_VERSION}',
+                lambda: parse_species_page(response.content, backend=parser_backend).conservation_status()
+            )
+            if status:
+                species_cache[scientific_name] = (status, url)
+                print(f"    ✓ Found: {status}")
+                return status, url
             
             print(f"    ✗ No status found on page")
         else:
             print(f"    ✗ HTTP {response.status_code}")
+            if response.status_code != 404:
+                fetch_errors.add(scientific_name)
             
     except requests.exceptions.RequestException as e:
         print(f"    ✗ Error: {e}")
+        fetch_errors.add(scientific_name)
     except Exception as e:
         print(f"    ✗ Unexpected error: {e}")
+        fetch_errors.add(scientific_name)
     
-    species_cache[scientific_name] = None
-    return None
+    species_cache[scientific_name] = (None, None)
+    return None, None
 
 
 def load_species_from_json_files(lib_dir: str) -> List[Dict]:
@@ -136,66 +216,104 @@ def load_species_from_json_files(lib_dir: str) -> List[Dict]:
     Returns:
         List of unique species with their scientific names and taxonomic info
     """
-    species_set: Set[str] = set()
+    corpus = load_corpus(lib_dir, SOURCE_FILES)
+    for json_file in corpus.missing_files:
+        print(f"Warning: {json_file} not found, skipping...")
+    
     species_list: List[Dict] = []
+    for sci_name in corpus.names():
+        # Taxonomic information comes from the first file listing the species
+        entry = corpus.first_entry(sci_name)
+        species_info = {
+            'scientific_name': {
+                'value': sci_name,
+                'note': entry.get('scientific_name', {}).get('note', '')
+            },
+            'common_name': entry.get('common_name', {
+                'value': '',
+                'note': ''
+            }),
+            'kingdom_latin': entry.get('kingdom_latin', ''),
+            'kingdom_vi': entry.get('kingdom_vi', ''),
+            'phylum_latin': entry.get('phylum_latin', ''),
+            'phylum_vi': entry.get('phylum_vi', ''),
+            'class_latin': entry.get('class_latin', ''),
+            'class_vi': entry.get('class_vi', ''),
+            'order_latin': entry.get('order_latin', ''),
+            'order_vi': entry.get('order_vi', ''),
+            'family_latin': entry.get('family_latin', ''),
+            'family_vi': entry.get('family_vi', ''),
+            'note': entry.get('note', ''),
+        }
+        species_list.append(species_info)
     
-    json_files = [
-        'nd06_2019.json',
-        'nd160_2013.json',
-        'nd64_2019.json',
-        'nd84_2021.json',
-        'tt27_2025.json',
-        'iucn_status.json'
+    return species_list
+
+
+def build_vnredlist_entry(species: Dict, status: str, page_url: Optional[str] = None) -> Dict:
+    """Build an output entry for a species with a Vietnam Red List status read from page_url."""
+    sci_name = species['scientific_name']['value']
+    species_entry = species.copy()
+    species_entry['laws'] = [
+        {
+            'name': {
+                'vi': 'Danh lục Đỏ Việt Nam',
+                'en': 'Vietnam Red List'
+            },
+            'value': status,
+            'note': page_url or f"{BASE_URL}/{scientific_name_to_url_slug(sci_name)}/"
+        }
     ]
+    return species_entry
+
+
+def fetch_statuses(species_list: List[Dict], delay: float = 1.0, workers: int = 1,
+                   rate: Optional[float] = None):
+    """
+    Fetch conservation statuses for a list of species, yielding them in input order.
     
-    for json_file in json_files:
-        file_path = os.path.join(lib_dir, json_file)
-        if not os.path.exists(file_path):
-            print(f"Warning: {json_file} not found, skipping...")
-            continue
-            
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            for entry in data:
-                sci_name = entry.get('scientific_name', {}).get('value', '').strip()
-                if sci_name and sci_name not in species_set:
-                    species_set.add(sci_name)
-                    
-                    # Extract taxonomic information
-                    species_info = {
-                        'scientific_name': {
-                            'value': sci_name,
-                            'note': entry.get('scientific_name', {}).get('note', '')
-                        },
-                        'common_name': entry.get('common_name', {
-                            'value': '',
-                            'note': ''
-                        }),
-                        'kingdom_latin': entry.get('kingdom_latin', ''),
-                        'kingdom_vi': entry.get('kingdom_vi', ''),
-                        'phylum_latin': entry.get('phylum_latin', ''),
-                        'phylum_vi': entry.get('phylum_vi', ''),
-                        'class_latin': entry.get('class_latin', ''),
-                        'class_vi': entry.get('class_vi', ''),
-                        'order_latin': entry.get('order_latin', ''),
-                        'order_vi': entry.get('order_vi', ''),
-                        'family_latin': entry.get('family_latin', ''),
-                        'family_vi': entry.get('family_vi', ''),
-                        'note': entry.get('note', ''),
-                    }
-                    species_list.append(species_info)
-                    
-        except json.JSONDecodeError as e:
-            print(f"Error reading {json_file}: {e}")
-        except Exception as e:
-            print(f"Error processing {json_file}: {e}")
+    Requests run on a thread pool of ``workers`` threads. A token bucket caps the
+    overall request rate at ``rate`` requests per second (defaulting to one request
+    every ``delay`` seconds). Responses served from the cache are not throttled.
     
-    return species_list
+    Args:
+        species_list: List of species to fetch data for
+        delay: Minimum delay in seconds between requests when no rate is given
+        workers: Number of requests allowed in flight at once
+        rate: Maximum requests per second
+        
+    Yields:
+        (status code, page URL) or (None, None), one per species
+    """
+    global request_limiter
+    
+    total = len(species_list)
+    workers = max(1, workers)
+    
+    if rate is None and delay > 0:
+        rate = 1.0 / delay
+    request_limiter = TokenBucket(rate, capacity=workers) if rate else None
+    
+    def fetch_one(item):
+        idx, species = item
+        sci_name = species['scientific_name']['value']
+        print(f"[{idx}/{total}] {sci_name}")
+        return fetch_species_status(sci_name)
+    
+    if workers == 1:
+        yield from map(fetch_one, enumerate(species_list, 1))
+        return
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map() returns results in submission order, so output order is unchanged
+        yield from executor.map(fetch_one, enumerate(species_list, 1))
 
 
-def create_vnredlist_json(species_list: List[Dict], output_path: str, delay: float = 1.0):
+def create_vnredlist_json(species_list: List[Dict], output_path: str, delay: float = 1.0,
+                          workers: int = 1, rate: Optional[float] = None,
+                          existing_records: Optional[Dict[str, Dict]] = None,
+                          refresh_names: Optional[Set[str]] = None,
+                          indent: Optional[int] = 2) -> List[str]:
     """
     Fetch conservation status for all species and create output JSON file.
     
@@ -203,50 +321,84 @@ def create_vnredlist_json(species_list: List[Dict], output_path: str, delay: flo
         species_list: List of species to fetch data for
         output_path: Path to save the output JSON file
         delay: Delay in seconds between requests to avoid overwhelming the server
+        workers: Number of concurrent requests (1 fetches sequentially)
+        rate: Maximum requests per second (overrides delay)
+        existing_records: Previous output entries by scientific name, kept for species
+            that are not fetched again (or whose fetch fails)
+        refresh_names: Scientific names to fetch; None fetches every species
+        indent: JSON indentation, None for compact output
+        
+    Returns:
+        Scientific names that were fetched without network or server errors
     """
-    results = []
+    existing_records = existing_records or {}
     total = len(species_list)
     
-    print(f"\nFetching Vietnam Red List status for {total} species...\n")
+    to_fetch = species_list
+    if refresh_names is not None:
+        to_fetch = [s for s in species_list if s['scientific_name']['value'] in refresh_names]
     
-    for idx, species in enumerate(species_list, 1):
-        sci_name = species['scientific_name']['value']
-        print(f"[{idx}/{total}] {sci_name}")
-        
-        status = fetch_conservation_status(sci_name)
-        
-        if status:
-            species_entry = species.copy()
-            species_entry['laws'] = [
-                {
-                    'name': {
-                        'vi': 'Danh lục Đỏ Việt Nam',
-                        'en': 'Vietnam Red List'
-                    },
-                    'value': status,
-                    'note': f"{BASE_URL}/{scientific_name_to_url_slug(sci_name)}/"
-                }
-            ]
-            results.append(species_entry)
-        
-        # Be polite to the server
-        if idx < total:
-            time.sleep(delay)
+    print(f"\nFetching Vietnam Red List status for {len(to_fetch)} species...\n")
+    
+    names = [s['scientific_name']['value'] for s in to_fetch]
+    fetched_names = set(names)
+    # Statuses arrive in the order of to_fetch, which follows species_list
+    statuses = fetch_statuses(to_fetch, delay=delay, workers=workers, rate=rate)
     
-    # Save results
-    print(f"\n\nSaving {len(results)} entries to {output_path}...")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    # Entries are written as their status arrives; the file is only replaced once complete
+    with JsonArrayWriter(output_path, indent=indent) as writer:
+        for species in species_list:
+            sci_name = species['scientific_name']['value']
+            fetched = sci_name in fetched_names
+            status, page_url = next(statuses) if fetched else (None, None)
+            
+            if status:
+                writer.write(build_vnredlist_entry(species, status, page_url))
+            elif sci_name in existing_records and (not fetched or sci_name in fetch_errors):
+                # Not re-fetched, or the re-fetch failed: keep the previous entry
+                writer.write(existing_records[sci_name])
     
-    print(f"✓ Done! Found status for {len(results)} out of {total} species.")
+    print(f"\n\nSaved {writer.count} entries to {output_path}")
+    print(f"✓ Done! Found status for {writer.count} out of {total} species.")
     print(f"\nSummary:")
-    print(f"  - Total species checked: {total}")
-    print(f"  - Species with status: {len(results)}")
-    print(f"  - Species without status: {total - len(results)}")
+    print(f"  - Total species checked: {len(to_fetch)}")
+    print(f"  - Species with status: {writer.count}")
+    print(f"  - Species without status: {total - writer.count}")
+    
+    cache = get_cache()
+    if cache is not None:
+        print(f"  - Responses served from cache: {cache.stats['hits']}")
+        print(f"  - Pages unchanged since last fetch (HTTP 304): {cache.stats['not_modified']}")
+        print(f"  - Parse results reused: {cache.stats['parse_hits']}")
+    
+    return [name for name in names if name not in fetch_errors]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Fetch Vietnam Red List conservation status for species.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of concurrent requests (default: 1, sequential)")
+    parser.add_argument('--rate', type=float, default=None,
+                        help="Maximum requests per second (default: 1/--delay)")
+    parser.add_argument('--delay', type=float, default=1.5,
+                        help="Minimum delay in seconds between requests when --rate is not given (default: 1.5)")
+    parser.add_argument('--parser', choices=sorted(PARSER_BACKENDS), default=DEFAULT_BACKEND,
+                        help=f"HTML parser backend for species pages (default: {DEFAULT_BACKEND})")
+    add_output_arguments(parser)
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
+    add_profile_arguments(parser)
+    add_session_arguments(parser)
+    add_refresh_arguments(parser, DEFAULT_MANIFEST)
+    add_change_arguments(parser)
+    return parser.parse_args(argv)
 
 
 def main():
     """Main entry point."""
+    args = parse_args()
+    
     # Determine paths
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.dirname(script_dir)
@@ -268,6 +420,14 @@ def main():
         print("  pip install requests beautifulsoup4")
         sys.exit(1)
     
+    configure_cache_from_args(args, 'vnredlist')
+    configure_metrics_from_args(args)
+    configure_profiling_from_args(args, output_path)
+    configure_session_from_args(args, pool_size=args.workers)
+    
+    global parser_backend
+    parser_backend = args.parser
+    
     # Load species from existing JSON files
     species_list = load_species_from_json_files(lib_dir)
     
@@ -275,8 +435,30 @@ def main():
         print("\n✗ No species found in JSON files.")
         sys.exit(1)
     
+    source_hashes = compute_source_hashes(lib_dir, SOURCE_FILES)
+    manifest = RefreshManifest(args.manifest)
+    
+    existing_records: Dict[str, Dict] = {}
+    refresh_names: Optional[Set[str]] = None
+    if is_incremental(args):
+        existing_records = load_existing_records(output_path)
+        refresh_names = set(manifest.select_for_refresh(
+            source_hashes, stale_after=stale_after_from_args(args), since=args.since))
+        print(f"\nIncremental refresh: {len(refresh_names)} of {len(species_list)} species to fetch")
+    
+    # Index the current output so the run's changes can be reported
+    previous = index_snapshot(output_path)
+    
     # Fetch data and create output file
-    create_vnredlist_json(species_list, output_path, delay=1.5)
+    fetched = create_vnredlist_json(species_list, output_path, delay=args.delay,
+                                    workers=args.workers, rate=args.rate,
+                                    existing_records=existing_records, refresh_names=refresh_names,
+                                    indent=output_indent(args, 2))
+    report_changes(previous, output_path, args)
+    
+    manifest.mark_fetched(fetched, source_hashes)
+    manifest.prune(source_hashes)
+    manifest.save()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk HTTP response cache shared by the fetch scripts.
+
+Responses are stored in a SQLite database keyed by URL and query parameters. Each
+source (e.g. "vnredlist", "iucn") has its own time-to-live, the total size of the
+cache is capped with least-recently-used eviction, and an offline "cache-only"
+mode serves everything from disk without touching the network.
+
+Expired entries are revalidated with a conditional GET (If-None-Match /
+If-Modified-Since) when the server sent an ETag or Last-Modified header. On
+304 Not Modified the cached body, and any parse result stored for it, is reused.
+
+With ``--archive`` every response body used is also kept in an append-only page
+archive (page_archive.py), and ``--replay`` serves responses from such an archive
+only, so parsers can be re-run without network access.
+
+Requests and parses are recorded in the fetch metrics (fetch_metrics.py) when
+those are enabled.
+"""
+
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from fetch_metrics import get_metrics
+from http_session import get_session
+from page_archive import PageArchive
+from rate_limit import TokenBucket
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+DAY = 24 * 60 * 60
+
+# Time-to-live in seconds per source
+DEFAULT_TTLS: Dict[str, float] = {
+    'vnredlist': 30 * DAY,
+    'iucn': 7 * DAY,
+}
+DEFAULT_TTL = 7 * DAY
+
+# Only cache responses that describe the resource itself, not transient failures
+CACHEABLE_STATUS_CODES = {200, 404}
+
+# Headers refreshed from a 304 Not Modified response
+REVALIDATION_HEADERS = ('ETag', 'Last-Modified', 'Date', 'Expires', 'Cache-Control')
+
+T = TypeVar('T')
+
+
+class CacheMiss(requests.exceptions.RequestException):
+    """Raised in cache-only mode when a response is not in the cache."""
+
+
+class CachedResponse:
+    """Minimal stand-in for ``requests.Response`` built from a cache entry."""
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes,
+                 cache_key: Optional[str] = None, stale: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.cache_key = cache_key
+        self.stale = stale
+        self.from_cache = True
+        # True when the server confirmed the cached copy with 304 Not Modified
+        self.not_modified = False
+        self.encoding = get_encoding_from_headers(self.headers) or 'utf-8'
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Validator headers for revalidating this response with a conditional GET."""
+        headers = {}
+        if self.headers.get('ETag'):
+            headers['If-None-Match'] = self.headers['ETag']
+        if self.headers.get('Last-Modified'):
+            headers['If-Modified-Since'] = self.headers['Last-Modified']
+        return headers
+
+
+def make_cache_key(url: str, params: Optional[Dict] = None) -> str:
+    """Build a stable cache key from a URL and its query parameters."""
+    if params:
+        url = f"{url}?{urlencode(sorted(params.items()))}"
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response store with per-source TTL and LRU size cap."""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttls: Optional[Dict[str, float]] = None, offline: bool = False):
+        """
+        Args:
+            path: Path to the SQLite database file
+            max_bytes: Maximum total size of cached response bodies
+            ttls: Time-to-live in seconds per source, merged over DEFAULT_TTLS
+            offline: Serve only from the cache, ignoring TTLs and never using the network
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.offline = offline
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'stores': 0, 'evictions': 0,
+                      'parse_hits': 0}
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        # Parse results derived from a cached response body, dropped when the body changes
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS parsed (
+                key TEXT NOT NULL,
+                name TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (key, name)
+            )
+        """)
+        self._conn.commit()
+
+    def ttl_for(self, source: str) -> float:
+        return self.ttls.get(source, DEFAULT_TTL)
+
+    def record(self, stat: str) -> None:
+        """Increment a statistics counter."""
+        with self._lock:
+            self.stats[stat] += 1
+
+    def lookup(self, url: str, params: Optional[Dict] = None, source: str = 'default') -> Optional[CachedResponse]:
+        """
+        Return the cached response for a request whatever its age, or None if missing.
+
+        The returned response has ``stale`` set when it is older than the source TTL
+        (never in offline mode).
+        """
+        key = make_cache_key(url, params)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, headers, body, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+
+        cached_url, status, headers, body, fetched_at = row
+        stale = not self.offline and time.time() - fetched_at > self.ttl_for(source)
+        return CachedResponse(cached_url, status, json.loads(headers), bytes(body), cache_key=key, stale=stale)
+
+    def get(self, url: str, params: Optional[Dict] = None, source: str = 'default') -> Optional[CachedResponse]:
+        """Return the cached response for a request, or None if missing or expired."""
+        cached = self.lookup(url, params, source)
+        if cached is None or cached.stale:
+            self.record('misses')
+            return None
+
+        self.record('hits')
+        return cached
+
+    def revalidated(self, cached: CachedResponse, response) -> CachedResponse:
+        """
+        Refresh a cached response after the server answered 304 Not Modified.
+
+        Args:
+            cached: The stale cached response that was revalidated
+            response: The 304 response
+
+        Returns:
+            The cached response, now fresh
+        """
+        for name in REVALIDATION_HEADERS:
+            if response.headers.get(name):
+                cached.headers[name] = response.headers[name]
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET headers = ?, fetched_at = ?, accessed_at = ? WHERE key = ?",
+                (json.dumps(dict(cached.headers)), now, now, cached.cache_key)
+            )
+            self._conn.commit()
+            self.stats['not_modified'] += 1
+
+        cached.stale = False
+        cached.not_modified = True
+        return cached
+
+    def put(self, url: str, params: Optional[Dict], source: str, response) -> None:
+        """Store a response if its status code is cacheable."""
+        if response.status_code not in CACHEABLE_STATUS_CODES:
+            return
+
+        key = make_cache_key(url, params)
+        body = response.content
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, source, response.url, response.status_code, json.dumps(dict(response.headers)),
+                 body, len(body), now, now)
+            )
+            self._conn.execute("DELETE FROM parsed WHERE key = ?", (key,))
+            self.stats['stores'] += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.execute("DELETE FROM parsed WHERE key = ?", (key,))
+            self.stats['evictions'] += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self, source: Optional[str] = None) -> None:
+        """Remove all entries, or only those of one source."""
+        with self._lock:
+            if source:
+                self._conn.execute(
+                    "DELETE FROM parsed WHERE key IN (SELECT key FROM responses WHERE source = ?)", (source,)
+                )
+                self._conn.execute("DELETE FROM responses WHERE source = ?", (source,))
+            else:
+                self._conn.execute("DELETE FROM parsed")
+                self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def get_parsed(self, key: str, name: str) -> Tuple[bool, Any]:
+        """
+        Look up a parse result stored for a cached response.
+
+        Args:
+            key: Cache key of the response
+            name: Name of the parse result (should include a parser version)
+
+        Returns:
+            Tuple of (found, value)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM parsed WHERE key = ? AND name = ?", (key, name)
+            ).fetchone()
+            if row is None:
+                return False, None
+            self.stats['parse_hits'] += 1
+        return True, json.loads(row[0])
+
+    def put_parsed(self, key: str, name: str, value: Any) -> None:
+        """Store a JSON-serializable parse result for a cached response."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parsed VALUES (?, ?, ?)",
+                (key, name, json.dumps(value, ensure_ascii=False))
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# Cache used by cached_get; None disables caching
+response_cache: Optional[ResponseCache] = None
+
+
+def configure_cache(cache: Optional[ResponseCache]) -> None:
+    """Set the cache used by cached_get."""
+    global response_cache
+    response_cache = cache
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """Return the cache used by cached_get, if any."""
+    return response_cache
+
+
+# Archive receiving every response used, and whether responses come from it only
+page_archive: Optional[PageArchive] = None
+replay_only = False
+
+
+def configure_archive(archive: Optional[PageArchive], replay: bool = False) -> None:
+    """Set the page archive used by cached_get; with replay, no request goes to the network."""
+    global page_archive, replay_only
+    page_archive = archive
+    replay_only = replay and archive is not None
+
+
+def _archived_response(url: str, params: Optional[Dict]) -> CachedResponse:
+    key = make_cache_key(url, params)
+    entry = page_archive.lookup(key)
+    if entry is None:
+        raise CacheMiss(f"Not in archive (replay mode): {url}")
+    return CachedResponse(url, entry.status_code, entry.headers, page_archive.body(entry))
+
+
+def _archive(url: str, params: Optional[Dict], source: str, response):
+    """Keep a response in the page archive (if any) and return it."""
+    if page_archive is not None and response.status_code in CACHEABLE_STATUS_CODES:
+        page_archive.append(make_cache_key(url, params), url, source, response.status_code,
+                            dict(response.headers), response.content)
+    return response
+
+
+def cached_get(url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+               timeout: float = 30, source: str = 'default',
+               throttle: Optional[TokenBucket] = None):
+    """
+    GET a URL through the response cache, using the shared pooled session.
+
+    Args:
+        url: URL to fetch
+        params: Query parameters (part of the cache key)
+        headers: Request headers (not part of the cache key)
+        timeout: Request timeout in seconds
+        source: Cache source name, selects the TTL
+        throttle: Rate limiter acquired before requests that go to the network
+
+    Returns:
+        A ``requests.Response`` or a ``CachedResponse``
+
+    Raises:
+        CacheMiss: In cache-only mode when the response is not cached, in replay mode
+            when it is not archived
+    """
+    metrics = get_metrics()
+    start = time.perf_counter()
+    if replay_only:
+        response = _archived_response(url, params)
+        if metrics is not None:
+            metrics.record_request(source, url, 'replay', response.status_code, time.perf_counter() - start)
+        return response
+
+    cache = response_cache
+    cached = None
+    if cache is not None:
+        cached = cache.lookup(url, params, source)
+        if cached is not None and not cached.stale:
+            cache.record('hits')
+            if metrics is not None:
+                metrics.record_request(source, url, 'cache', cached.status_code, time.perf_counter() - start)
+            return _archive(url, params, source, cached)
+        if cache.offline:
+            raise CacheMiss(f"Not in cache (cache-only mode): {url}")
+        cache.record('misses')
+
+    throttle_seconds = 0.0
+    if throttle is not None:
+        throttle_start = time.perf_counter()
+        throttle.acquire()
+        throttle_seconds = time.perf_counter() - throttle_start
+
+    # Revalidate an expired entry instead of downloading it again
+    request_headers = dict(headers or {})
+    if cached is not None:
+        request_headers.update(cached.conditional_headers())
+
+    request_start = time.perf_counter()
+    response = get_session().get(url, params=params, headers=request_headers, timeout=timeout)
+    if metrics is not None:
+        # Retries made by the session's retry policy, and time to the last attempt's headers
+        retries = getattr(getattr(getattr(response, 'raw', None), 'retries', None), 'history', None) or ()
+        elapsed = getattr(response, 'elapsed', None)
+        metrics.record_request(source, url, 'revalidated' if cached is not None and response.status_code == 304
+                               else 'network', response.status_code, time.perf_counter() - request_start,
+                               bytes_received=len(response.content), retries=len(retries),
+                               server_seconds=elapsed.total_seconds() if elapsed is not None else None,
+                               throttle_seconds=throttle_seconds)
+
+    if cached is not None and response.status_code == 304:
+        return _archive(url, params, source, cache.revalidated(cached, response))
+
+    response.from_cache = False
+    response.not_modified = False
+    response.cache_key = None
+    if cache is not None:
+        cache.put(url, params, source, response)
+        if response.status_code in CACHEABLE_STATUS_CODES:
+            response.cache_key = make_cache_key(url, params)
+
+    return _archive(url, params, source, response)
+
+
+def stored_parse(response, name: str) -> Tuple[bool, Any]:
+    """
+    Look up the stored parse result for a response body.
+
+    Returns:
+        Tuple of (found, value); never found for uncached responses
+    """
+    key = getattr(response, 'cache_key', None)
+    if response_cache is None or key is None:
+        return False, None
+    return response_cache.get_parsed(key, name)
+
+
+def store_parse(response, name: str, value: Any) -> None:
+    """Store a parse result for a cached response (ignored for uncached responses)."""
+    key = getattr(response, 'cache_key', None)
+    if response_cache is not None and key is not None:
+        response_cache.put_parsed(key, name, value)
+
+
+def cached_parse(response, name: str, parse: Callable[[], T]) -> T:
+    """
+    Parse a response, reusing the stored result if this exact body was parsed before.
+
+    Args:
+        response: Response returned by cached_get
+        name: Name of the parse result; include a parser version so that changed
+            parsing logic does not reuse old results
+        parse: Function computing the (JSON-serializable) parse result
+
+    Returns:
+        The parse result
+    """
+    metrics = get_metrics()
+    start = time.perf_counter()
+    found, value = stored_parse(response, name)
+    if not found:
+        value = parse()
+        store_parse(response, name, value)
+    if metrics is not None:
+        metrics.record_parse(name, time.perf_counter() - start, reused=found)
+    return value
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the shared cache command line options to a script's argument parser."""
+    group = parser.add_argument_group('response cache')
+    group.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                       help=f"Directory for the HTTP response cache (default: {DEFAULT_CACHE_DIR})")
+    group.add_argument('--cache-ttl', type=float, default=None,
+                       help="Time-to-live in days for this script's cached responses")
+    group.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                       help="Maximum cache size in MB before least recently used entries are evicted")
+    group.add_argument('--cache-only', action='store_true',
+                       help="Offline mode: serve responses only from the cache")
+    group.add_argument('--no-cache', action='store_true',
+                       help="Disable the response cache")
+    group.add_argument('--archive', metavar='PATH',
+                       help="Also keep every response in this append-only page archive")
+    group.add_argument('--replay', metavar='PATH',
+                       help="Serve responses only from this page archive, without network access")
+
+
+def configure_cache_from_args(args: argparse.Namespace, source: str) -> Optional[ResponseCache]:
+    """Create and install the response cache (and page archive) described by parsed command line options."""
+    if args.archive and args.replay:
+        raise SystemExit("--archive cannot be combined with --replay")
+    archive_path = args.archive or args.replay
+    if archive_path:
+        if args.replay and not os.path.exists(archive_path):
+            raise SystemExit(f"Page archive not found: {archive_path}")
+        archive = PageArchive(archive_path)
+        atexit.register(archive.close)
+        configure_archive(archive, replay=bool(args.replay))
+    else:
+        configure_archive(None)
+
+    if args.no_cache:
+        if args.cache_only:
+            raise SystemExit("--cache-only cannot be combined with --no-cache")
+        configure_cache(None)
+        return None
+
+    ttls = {source: args.cache_ttl * DAY} if args.cache_ttl is not None else None
+    cache = ResponseCache(
+        os.path.join(args.cache_dir, 'http_cache.sqlite'),
+        max_bytes=int(args.cache_max_mb * 1024 * 1024),
+        ttls=ttls,
+        offline=args.cache_only,
+    )
+    configure_cache(cache)
+    return cache
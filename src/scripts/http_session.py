@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP session factory for the fetch scripts.
+
+All fetchers go through one ``requests.Session`` so TCP connections (and TLS sessions
+for api.iucnredlist.org) are pooled and kept alive between requests instead of being
+re-opened for every species. Failed requests are retried with exponential backoff on
+connection errors, HTTP 429 and 5xx responses, honouring ``Retry-After`` headers.
+"""
+
+import argparse
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_FACTOR = 1.0
+# Longest wait between retries, in seconds (Retry-After values are always honoured)
+DEFAULT_BACKOFF_MAX = 60
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE, max_retries: int = DEFAULT_MAX_RETRIES,
+                   backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                   headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """
+    Create a session with a connection pool and retry policy.
+
+    Args:
+        pool_size: Number of connections kept alive per host
+        max_retries: Maximum number of retries per request
+        backoff_factor: Base of the exponential backoff, in seconds
+            (waits backoff_factor * 2 ** (retry - 1) between attempts)
+        headers: Default headers sent with every request
+
+    Returns:
+        Configured requests.Session
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        backoff_max=DEFAULT_BACKOFF_MAX,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        # Return the last response instead of raising once retries are exhausted,
+        # so callers still see e.g. HTTP 429 as a status code
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Return the shared session, creating it with default settings on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def configure_session(**kwargs) -> requests.Session:
+    """Replace the shared session with one created by ``create_session(**kwargs)``."""
+    global _session
+    session = create_session(**kwargs)
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = session
+    return session
+
+
+def add_session_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the shared connection and retry options to a script's argument parser."""
+    group = parser.add_argument_group('connections')
+    group.add_argument('--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+                       help=f"Retries on connection errors, HTTP 429 and 5xx (default: {DEFAULT_MAX_RETRIES})")
+    group.add_argument('--backoff', type=float, default=DEFAULT_BACKOFF_FACTOR,
+                       help=f"Exponential backoff factor in seconds (default: {DEFAULT_BACKOFF_FACTOR})")
+
+
+def configure_session_from_args(args: argparse.Namespace, pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """Install the shared session described by parsed command line options."""
+    return configure_session(pool_size=max(pool_size, DEFAULT_POOL_SIZE), max_retries=args.max_retries,
+                             backoff_factor=args.backoff)
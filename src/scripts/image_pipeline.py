@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Validation and thumbnails for the species images listed in new_images.csv.
+
+images.json hotlinks iNaturalist ``medium.jpg`` URLs that nothing checks. This
+stage probes every image URL with a bounded pool of workers sharing the pooled
+session (http_session.py) and an optional request rate limit:
+
+- a HEAD request gives the status and byte size,
+- a ranged GET of the first ``PROBE_BYTES`` gives the width and height, read from
+  the JPEG, PNG, GIF or WebP header without downloading the whole image.
+
+With a thumbnail directory, the whole image is downloaded instead and a small
+WebP thumbnail is written, named after the SHA-256 of the original image, so an
+image shared by several species (or several runs) gets one file. Thumbnails need
+Pillow; without it the images are only probed.
+
+Results are kept in a state file by URL. URLs already probed successfully (with
+a thumbnail, if thumbnails are requested) are skipped on the next run; broken
+links are checked again.
+
+Usage:
+    python image_pipeline.py new_images.csv [--state PATH] [--thumbnails DIR] [--workers N]
+
+images_csv_to_json.py runs the same stage with ``--check-images``.
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from http_session import add_session_arguments, configure_session_from_args, get_session
+from profiling import add_profile_arguments, configure_profiling_from_args
+from rate_limit import TokenBucket
+
+# Pillow is optional: without it images are validated but no thumbnails are made
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STATE = os.path.join(SCRIPT_DIR, '.cache', 'image_state.json')
+
+# Bytes requested to read the image dimensions; JPEG EXIF blocks can push the
+# frame header past the first few KB
+PROBE_BYTES = 64 * 1024
+DEFAULT_WORKERS = 8
+DEFAULT_TIMEOUT = 30
+DEFAULT_THUMBNAIL_SIZE = 160
+DEFAULT_THUMBNAIL_QUALITY = 80
+THUMBNAIL_URL_PREFIX = '/thumbnails/'
+
+# JPEG start-of-frame markers (SOF0-SOF15 except DHT, JPG and DAC)
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# Statuses recorded for a URL
+STATUS_OK = 'ok'
+STATUS_DEAD = 'dead'              # HTTP error (e.g. 404)
+STATUS_NOT_IMAGE = 'not_image'    # responds, but not with an image we can read
+STATUS_ERROR = 'error'            # network error or timeout
+
+
+def image_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Width and height of an image from the first bytes of the file.
+
+    Args:
+        data: Start of a JPEG, PNG, GIF or WebP file
+
+    Returns:
+        (width, height), None if the format is unknown or the header is incomplete
+    """
+    if data.startswith(b'\x89PNG\r\n\x1a\n') and len(data) >= 24 and data[12:16] == b'IHDR':
+        return struct.unpack('>II', data[16:24])
+
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        return struct.unpack('<HH', data[6:10])
+
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP' and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', data[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L':
+            bits = int.from_bytes(data[21:25], 'little')
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+        return None
+
+    if data[:2] == b'\xff\xd8':
+        offset = 2
+        while offset + 4 <= len(data):
+            if data[offset] != 0xFF:
+                return None
+            marker = data[offset + 1]
+            if marker == 0xFF:
+                # Fill byte
+                offset += 1
+                continue
+            if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+                # Markers without a length
+                offset += 2
+                continue
+            length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+            if marker in JPEG_SOF_MARKERS:
+                if offset + 9 > len(data):
+                    return None
+                height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+                return width, height
+            offset += 2 + length
+    return None
+
+
+def thumbnail_name(content: bytes) -> str:
+    """File name of the thumbnail of an image: a hash of the original image."""
+    return f"{hashlib.sha256(content).hexdigest()[:20]}.webp"
+
+
+def make_thumbnail(content: bytes, path: str, size: int = DEFAULT_THUMBNAIL_SIZE,
+                   quality: int = DEFAULT_THUMBNAIL_QUALITY) -> None:
+    """
+    Write a WebP thumbnail of an image that fits in a size × size box.
+
+    Raises:
+        RuntimeError: If Pillow is not installed
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is required for thumbnails (pip install Pillow)")
+    with Image.open(io.BytesIO(content)) as image:
+        image.thumbnail((size, size))
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGB')
+        tmp_path = f"{path}.tmp"
+        image.save(tmp_path, 'WEBP', quality=quality)
+    os.replace(tmp_path, path)
+
+
+def _content_length(response) -> Optional[int]:
+    """Full size of a resource from a (possibly partial) response's headers."""
+    content_range = response.headers.get('Content-Range', '')
+    if '/' in content_range and not content_range.endswith('/*'):
+        return int(content_range.rsplit('/', 1)[1])
+    length = response.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+def _read_prefix(url: str, limit: int, timeout: float):
+    """GET the first ``limit`` bytes of a URL; servers ignoring Range are cut off after them."""
+    headers = {'Range': f'bytes=0-{limit - 1}'}
+    with get_session().get(url, headers=headers, timeout=timeout, stream=True) as response:
+        data = b''
+        if response.status_code < 400:
+            for chunk in response.iter_content(chunk_size=16 * 1024):
+                data += chunk
+                if len(data) >= limit:
+                    break
+        return response, data[:limit]
+
+
+def probe_image(url: str, thumbnail_dir: Optional[str] = None,
+                thumbnail_size: int = DEFAULT_THUMBNAIL_SIZE, timeout: float = DEFAULT_TIMEOUT) -> Dict:
+    """
+    Check that an image URL resolves and record its dimensions and size.
+
+    Args:
+        url: Image URL
+        thumbnail_dir: Directory to write a thumbnail to (downloads the whole image)
+        thumbnail_size: Largest side of the thumbnail, in pixels
+        timeout: Request timeout in seconds
+
+    Returns:
+        State entry: status, HTTP status code, content type, width, height, bytes,
+        thumbnail file name (when made) and the time of the check
+    """
+    info: Dict = {'status': STATUS_ERROR, 'checked_at': time.time()}
+    try:
+        if thumbnail_dir:
+            response = get_session().get(url, timeout=timeout)
+            data = response.content if response.status_code < 400 else b''
+            size = len(data) if data else _content_length(response)
+        else:
+            response = get_session().head(url, timeout=timeout, allow_redirects=True)
+            size = _content_length(response)
+            data = b''
+            # Some servers refuse HEAD; the ranged GET below settles it
+            if response.status_code < 400 or response.status_code in (403, 405):
+                response, data = _read_prefix(url, PROBE_BYTES, timeout)
+                size = _content_length(response) or size
+                dimensions = image_dimensions(data)
+                if dimensions is None and size and size > len(data) and response.status_code < 400:
+                    # Frame header beyond the probe: fetch the rest
+                    response, data = _read_prefix(url, size, timeout)
+    except requests.RequestException as e:
+        info['error'] = str(e)
+        return info
+
+    info['http_status'] = response.status_code
+    info['content_type'] = response.headers.get('Content-Type', '')
+    if response.status_code >= 400:
+        info['status'] = STATUS_DEAD
+        return info
+
+    dimensions = image_dimensions(data)
+    if dimensions is None:
+        info['status'] = STATUS_NOT_IMAGE
+        return info
+    info.update(status=STATUS_OK, width=dimensions[0], height=dimensions[1], bytes=size)
+
+    if thumbnail_dir:
+        name = thumbnail_name(data)
+        path = os.path.join(thumbnail_dir, name)
+        try:
+            if not os.path.exists(path):
+                make_thumbnail(data, path, thumbnail_size)
+            info['thumbnail'] = name
+        except (OSError, RuntimeError) as e:
+            info['thumbnail_error'] = str(e)
+    return info
+
+
+def load_state(path: str) -> Dict[str, Dict]:
+    """Results of earlier runs by URL (empty if there is no state file yet)."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠ Could not read {path}: {e}; checking every image again")
+        return {}
+
+
+def save_state(path: str, state: Dict[str, Dict]) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def needs_check(entry: Optional[Dict], thumbnail_dir: Optional[str]) -> bool:
+    """Whether a URL must be (re)checked given its state entry."""
+    if entry is None or entry.get('status') != STATUS_OK:
+        return True
+    if thumbnail_dir:
+        name = entry.get('thumbnail')
+        return not name or not os.path.exists(os.path.join(thumbnail_dir, name))
+    return False
+
+
+def run_image_stage(urls: Iterable[str], state_path: str = DEFAULT_STATE, workers: int = DEFAULT_WORKERS,
+                    rate: Optional[float] = None, thumbnail_dir: Optional[str] = None,
+                    thumbnail_size: int = DEFAULT_THUMBNAIL_SIZE) -> Dict[str, Dict]:
+    """
+    Probe every image URL not already processed, with a bounded pool of workers.
+
+    Args:
+        urls: Image URLs (duplicates are checked once)
+        state_path: State file with the results of earlier runs, updated in place
+        workers: Number of requests in flight at once
+        rate: Maximum requests per second (None = unlimited)
+        thumbnail_dir: Directory for WebP thumbnails (None = no thumbnails)
+        thumbnail_size: Largest side of the thumbnails, in pixels
+
+    Returns:
+        State entries of the given URLs
+    """
+    urls = list(dict.fromkeys(url.strip() for url in urls if url and url.strip()))
+    state = load_state(state_path)
+    if thumbnail_dir:
+        if Image is None:
+            print("⚠ Pillow is not installed; checking images without making thumbnails")
+            thumbnail_dir = None
+        else:
+            os.makedirs(thumbnail_dir, exist_ok=True)
+
+    pending = [url for url in urls if needs_check(state.get(url), thumbnail_dir)]
+    print(f"Images: {len(urls)} ({len(urls) - len(pending)} already checked, {len(pending)} to check)")
+
+    limiter = TokenBucket(rate, capacity=max(1, workers)) if rate else None
+
+    def check(url: str) -> Dict:
+        if limiter is not None:
+            limiter.acquire()
+        return probe_image(url, thumbnail_dir, thumbnail_size)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {executor.submit(check, url): url for url in pending}
+            for done, future in enumerate(as_completed(futures), 1):
+                url = futures[future]
+                info = future.result()
+                state[url] = info
+                if info['status'] == STATUS_OK:
+                    print(f"[{done}/{len(pending)}] ✓ {info['width']}x{info['height']}, "
+                          f"{(info['bytes'] or 0) / 1024:.0f} KB  {url}")
+                else:
+                    reason = info.get('http_status') or info.get('error', '')
+                    print(f"[{done}/{len(pending)}] ✗ {info['status']} ({reason})  {url}")
+    finally:
+        # Keep what was checked even if the run is interrupted
+        save_state(state_path, state)
+
+    return {url: state[url] for url in urls if url in state}
+
+
+def broken_images(results: Dict[str, Dict]) -> List[str]:
+    """URLs whose last check failed."""
+    return [url for url, info in results.items() if info.get('status') != STATUS_OK]
+
+
+def print_summary(results: Dict[str, Dict]) -> None:
+    """Print totals and the broken links."""
+    ok = [info for info in results.values() if info.get('status') == STATUS_OK]
+    total_bytes = sum(info.get('bytes') or 0 for info in ok)
+    thumbnails = sum(1 for info in ok if info.get('thumbnail'))
+    print(f"\n✓ {len(ok)}/{len(results)} images OK, {total_bytes / (1024 * 1024):.1f} MB in total")
+    if thumbnails:
+        print(f"  Thumbnails: {thumbnails}")
+    broken = broken_images(results)
+    if broken:
+        print(f"✗ {len(broken)} broken image links:")
+        for url in broken:
+            info = results[url]
+            print(f"  {info['status']} ({info.get('http_status') or info.get('error', '')}): {url}")
+
+
+def image_fields(info: Optional[Dict], thumbnail_url_prefix: str = THUMBNAIL_URL_PREFIX) -> Dict:
+    """Fields added to an images.json entry from its state entry."""
+    if not info or info.get('status') != STATUS_OK:
+        return {}
+    fields = {'width': info['width'], 'height': info['height']}
+    if info.get('bytes'):
+        fields['bytes'] = info['bytes']
+    if info.get('thumbnail'):
+        fields['thumbnail'] = f"{thumbnail_url_prefix}{info['thumbnail']}"
+    return fields
+
+
+def add_image_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the image check options to a script's argument parser."""
+    group = parser.add_argument_group('image checks')
+    group.add_argument('--state', default=DEFAULT_STATE, help=f"Image state file (default: {DEFAULT_STATE})")
+    group.add_argument('--thumbnails', metavar='DIR', help="Write WebP thumbnails to this directory (needs Pillow)")
+    group.add_argument('--thumbnail-size', type=int, default=DEFAULT_THUMBNAIL_SIZE,
+                       help=f"Largest side of the thumbnails in pixels (default: {DEFAULT_THUMBNAIL_SIZE})")
+    group.add_argument('--thumbnail-url-prefix', default=THUMBNAIL_URL_PREFIX,
+                       help=f"URL prefix of the thumbnails in images.json (default: {THUMBNAIL_URL_PREFIX})")
+    group.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                       help=f"Concurrent image requests (default: {DEFAULT_WORKERS})")
+    group.add_argument('--rate', type=float, help="Maximum image requests per second")
+    add_session_arguments(parser)
+
+
+def check_images_from_args(urls: Iterable[str], args: argparse.Namespace) -> Dict[str, Dict]:
+    """Run the image stage with parsed command line options."""
+    configure_session_from_args(args, pool_size=args.workers)
+    return run_image_stage(urls, state_path=args.state, workers=args.workers, rate=args.rate,
+                           thumbnail_dir=args.thumbnails, thumbnail_size=args.thumbnail_size)
+
+
+def read_image_urls(csv_path: str) -> List[str]:
+    """Image URLs of an images CSV (column "URL ảnh")."""
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        return [row['URL ảnh'].strip() for row in csv.DictReader(f) if row.get('URL ảnh', '').strip()]
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Check species image links and make thumbnails.")
+    parser.add_argument('csv', help="Images CSV (e.g. new_images.csv)")
+    add_image_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    configure_profiling_from_args(args, args.state)
+
+    results = check_images_from_args(read_image_urls(args.csv), args)
+    print_summary(results)
+    if broken_images(results):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,13 +2,22 @@
 """
 Script to convert CSV file to JSON format similar to images.json
 with an additional 'source' field.
+
+With --check-images, every image URL is checked first (see image_pipeline.py):
+entries get their width, height and size in bytes (and a thumbnail path with
+--thumbnails), and broken links are reported. --drop-broken leaves them out.
 """
 
+import argparse
 import csv
 import json
 import sys
 
-def csv_to_json(csv_file_path, output_json_path=None):
+from image_pipeline import add_image_arguments, check_images_from_args, image_fields, print_summary, read_image_urls
+from profiling import add_profile_arguments, configure_profiling_from_args
+
+def csv_to_json(csv_file_path, output_json_path=None, image_info=None, drop_broken=False,
+                thumbnail_url_prefix='/thumbnails/'):
     """
     Convert CSV file to JSON format with structure:
     {
@@ -24,6 +33,10 @@ def csv_to_json(csv_file_path, output_json_path=None):
     Args:
         csv_file_path: Path to input CSV file
         output_json_path: Path to output JSON file (optional)
+        image_info: Image check results by URL (optional, see image_pipeline.run_image_stage);
+            adds width, height, bytes and thumbnail to the entries
+        drop_broken: Leave out images whose check failed
+        thumbnail_url_prefix: URL prefix of the thumbnail files
     """
     # Dictionary to store the data
     species_data = {}
@@ -44,6 +57,11 @@ def csv_to_json(csv_file_path, output_json_path=None):
                 "attribute": author,
                 "source": source
             }
+            if image_info is not None:
+                info = image_info.get(image_url)
+                if drop_broken and info is not None and info.get('status') != 'ok':
+                    continue
+                image_data.update(image_fields(info, thumbnail_url_prefix))
             
             # Add to species_data dictionary
             if species_name in species_data:
@@ -67,19 +85,27 @@ def csv_to_json(csv_file_path, output_json_path=None):
     return species_data
 
 if __name__ == "__main__":
-    # Get file paths from command line arguments
-    if len(sys.argv) < 2:
-        print("Usage: python csv_to_json.py <input_csv_file> [output_json_file]")
-        print("Example: python csv_to_json.py 'Rùa - Luật.csv' output.json")
-        sys.exit(1)
-    
-    input_csv = sys.argv[1]
-    output_json = sys.argv[2] if len(sys.argv) > 2 else None
+    parser = argparse.ArgumentParser(description="Convert an images CSV to images.json format.")
+    parser.add_argument('input_csv', help="Input CSV file (e.g. 'Rùa - Luật.csv')")
+    parser.add_argument('output_json', nargs='?', help="Output JSON file (default: print to stdout)")
+    parser.add_argument('--check-images', action='store_true',
+                        help="Check every image URL and add its dimensions and size")
+    parser.add_argument('--drop-broken', action='store_true',
+                        help="Leave out images whose URL does not resolve (with --check-images)")
+    add_image_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    configure_profiling_from_args(args, args.output_json)
     
     try:
-        csv_to_json(input_csv, output_json)
+        image_info = None
+        if args.check_images:
+            image_info = check_images_from_args(read_image_urls(args.input_csv), args)
+            print_summary(image_info)
+        csv_to_json(args.input_csv, args.output_json, image_info=image_info, drop_broken=args.drop_broken,
+                    thumbnail_url_prefix=args.thumbnail_url_prefix)
     except FileNotFoundError:
-        print(f"Error: File '{input_csv}' not found.")
+        print(f"Error: File '{args.input_csv}' not found.")
         sys.exit(1)
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Incremental JSON array writer for the output data files.
+
+Records are written one at a time instead of building the whole list and calling
+``json.dump`` at the end, so memory use does not grow with the output. The array is
+written to a temporary file next to the target and renamed over it only once it is
+complete; an interrupted run never replaces a good file with a truncated one.
+
+In pretty mode the output is byte-identical to ``json.dump(records, f, indent=N,
+ensure_ascii=False)``. Compact mode writes no whitespace at all, for production
+artifacts.
+
+``iter_json_array`` is the reading counterpart: it yields the elements of a JSON
+array file one at a time, reading the file in chunks.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+from typing import Any, Iterable, Iterator, Optional
+
+
+# Permissions of newly created output files
+DEFAULT_FILE_MODE = 0o644
+
+# Characters read at a time by iter_json_array
+READ_CHUNK_SIZE = 1 << 16
+
+
+class JsonArrayWriter:
+    """
+    Writes a JSON array element by element and atomically replaces the target file.
+
+    Use as a context manager; the file is only replaced if the block completes::
+
+        with JsonArrayWriter(path, indent=2) as writer:
+            for record in records:
+                writer.write(record)
+    """
+
+    def __init__(self, path: str, indent: Optional[int] = 2, ensure_ascii: bool = False):
+        """
+        Args:
+            path: Output file path
+            indent: Indentation of pretty output, None for compact output
+            ensure_ascii: Escape non-ASCII characters (as in json.dump)
+        """
+        self.path = str(path)
+        self.indent = indent
+        self.ensure_ascii = ensure_ascii
+        self.count = 0
+        self._file = None
+        self._tmp_path = None
+
+        if indent is None:
+            self._separator = ','
+            self._prefix = ''
+        else:
+            self._separator = ',\n' + ' ' * indent
+            self._prefix = '\n' + ' ' * indent
+
+    def open(self) -> 'JsonArrayWriter':
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, self._tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(self.path)}.",
+                                              suffix='.tmp')
+        self._file = os.fdopen(fd, 'w', encoding='utf-8')
+        self._file.write('[')
+        return self
+
+    def write(self, record: Any) -> None:
+        """Append one element to the array."""
+        if self.indent is None:
+            text = json.dumps(record, ensure_ascii=self.ensure_ascii, separators=(',', ':'))
+        else:
+            text = json.dumps(record, ensure_ascii=self.ensure_ascii, indent=self.indent)
+            text = text.replace('\n', self._prefix)
+        self._file.write((self._prefix if self.count == 0 else self._separator) + text)
+        self.count += 1
+
+    def write_all(self, records: Iterable[Any]) -> None:
+        for record in records:
+            self.write(record)
+
+    def commit(self) -> None:
+        """Finish the array and move it over the target file."""
+        if self.count and self.indent is not None:
+            self._file.write('\n')
+        self._file.write(']')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        # mkstemp creates the file private to the user; keep the permissions of the file it replaces
+        mode = os.stat(self.path).st_mode if os.path.exists(self.path) else DEFAULT_FILE_MODE
+        os.chmod(self._tmp_path, mode & 0o777)
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        """Discard the partial output, leaving the target file untouched."""
+        self._file.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self) -> 'JsonArrayWriter':
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+def write_json_array(path: str, records: Iterable[Any], indent: Optional[int] = 2) -> int:
+    """
+    Write records as a JSON array, atomically.
+
+    Returns:
+        Number of records written
+    """
+    with JsonArrayWriter(path, indent=indent) as writer:
+        writer.write_all(records)
+    return writer.count
+
+
+def iter_json_array(path: str, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yield the elements of a JSON array file without loading the whole file.
+
+    Args:
+        path: JSON file containing an array
+        chunk_size: Characters read at a time
+
+    Raises:
+        ValueError: If the file is not a well-formed JSON array
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{path}: not a JSON array")
+        buffer = buffer[1:]
+        eof = False
+        expect_element = True
+        first = True
+        while True:
+            buffer = buffer.lstrip()
+            # Keep enough text buffered to decode the next element or reach the end
+            while not eof and len(buffer) < chunk_size:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    eof = True
+                buffer = (buffer + chunk).lstrip()
+            if buffer.startswith(']'):
+                if expect_element and not first:
+                    raise ValueError(f"{path}: trailing comma in array")
+                return
+            if not expect_element:
+                if not buffer.startswith(','):
+                    raise ValueError(f"{path}: expected ',' or ']' in array")
+                buffer = buffer[1:]
+                expect_element = True
+                continue
+            try:
+                element, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError(f"{path}: truncated or malformed JSON array")
+                # The element continues past the buffer: read more and retry
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            yield element
+            buffer = buffer[end:]
+            expect_element = False
+            first = False
+
+
+def add_output_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the shared output format options to a script's argument parser."""
+    parser.add_argument('--compact', action='store_true',
+                        help="Write compact JSON without indentation (for production artifacts)")
+
+
+def output_indent(args: argparse.Namespace, pretty_indent: int) -> Optional[int]:
+    """Indentation to write with: the script's pretty indent, or None with --compact."""
+    return None if args.compact else pretty_indent
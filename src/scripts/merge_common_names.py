@@ -7,9 +7,15 @@ This script:
 3. Keeps IUCN English common names in common_name_en field
 """
 
+import argparse
 import json
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
+
+from json_stream import add_output_arguments, output_indent, write_json_array
+from name_matching import NameMatcher, corpus_taxonomy, spelling_variant, taxonomy_of
+from profiling import add_profile_arguments, configure_profiling_from_args
+from species_corpus import load_corpus
 
 def read_common_names_from_files(lib_dir: Path) -> Dict[str, str]:
     """
@@ -18,42 +24,18 @@ def read_common_names_from_files(lib_dir: Path) -> Dict[str, str]:
     Returns:
         Dictionary mapping scientific names to Vietnamese common names
     """
-    json_files = [
-        "nd06_2019.json",
-        "nd160_2013.json",
-        "nd64_2019.json",
-        "nd84_2021.json",
-        "tt27_2025.json"
-    ]
-    
-    common_names_map = {}
-    
     print("Reading Vietnamese common names from existing data files...")
-    for json_file in json_files:
-        file_path = lib_dir / json_file
-        if file_path.exists():
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            for species in data:
-                if 'scientific_name' in species and 'value' in species['scientific_name']:
-                    sci_name = species['scientific_name']['value'].strip()
-                    
-                    if 'common_name' in species and 'value' in species['common_name']:
-                        common_name = species['common_name']['value'].strip()
-                        
-                        # Only add if we don't have it yet or if current one is empty
-                        if sci_name not in common_names_map or not common_names_map[sci_name]:
-                            if common_name:
-                                common_names_map[sci_name] = common_name
-            
-            print(f"  {json_file}: Found {len([s for s in data if s.get('common_name', {}).get('value')])} names")
+    corpus = load_corpus(str(lib_dir))
+    for json_file, data in corpus.entries_by_file.items():
+        print(f"  {json_file}: Found {len([s for s in data if s.get('common_name', {}).get('value')])} names")
+    
+    common_names_map = corpus.common_names()
     
     print(f"\nTotal unique Vietnamese common names: {len(common_names_map)}")
     return common_names_map
 
-def update_iucn_with_vietnamese_names(lib_dir: Path):
-    """Update IUCN status file with Vietnamese common names."""
+def update_iucn_with_vietnamese_names(lib_dir: Path, indent: Optional[int] = 4):
+    """Update IUCN status file with Vietnamese common names (indent=None writes compact JSON)."""
     
     # Read Vietnamese common names from existing files
     vietnamese_names = read_common_names_from_files(lib_dir)
@@ -72,14 +54,31 @@ def update_iucn_with_vietnamese_names(lib_dir: Path):
     print(f"\nUpdating IUCN status file with Vietnamese common names...")
     print(f"Total IUCN entries: {len(iucn_data)}")
     
+    # IUCN names that differ from the law documents (authors, subspecies, spelling)
+    # are resolved to the nearest law document name. Fuzzy matches must be spellings of
+    # the same species; other near names could be a different species of the genus and
+    # are only reported for review.
+    matcher = NameMatcher(vietnamese_names, corpus_taxonomy(load_corpus(str(lib_dir))))
+    
     updated_count = 0
     no_match_count = 0
+    fuzzy_matches = []
+    needs_review = []
     
     for entry in iucn_data:
         sci_name = entry['scientific_name']['value']
         
         # Get Vietnamese common name from existing data
         vietnamese_name = vietnamese_names.get(sci_name, '')
+        if not vietnamese_name:
+            match = matcher.match(sci_name, taxonomy_of(entry), accept=spelling_variant)
+            if match is not None:
+                vietnamese_name = vietnamese_names[match.name]
+                fuzzy_matches.append((sci_name, match))
+            else:
+                candidates = matcher.candidates(sci_name)
+                if candidates:
+                    needs_review.append((sci_name, candidates))
         
         if vietnamese_name:
             # Update the common_name field with Vietnamese name
@@ -103,15 +102,24 @@ def update_iucn_with_vietnamese_names(lib_dir: Path):
                 "note": ""
             }
     
-    # Save updated data
-    with open(iucn_file, 'w', encoding='utf-8') as f:
-        json.dump(iucn_data, f, indent=4, ensure_ascii=False)
+    # Save updated data (atomically: the file is replaced only once fully written)
+    write_json_array(iucn_file, iucn_data, indent=indent)
     
     print(f"\n✓ Updated IUCN status file")
     print(f"  Entries with Vietnamese names: {updated_count}")
     print(f"  Entries without Vietnamese names: {no_match_count}")
     print(f"  Total entries: {len(iucn_data)}")
     
+    if fuzzy_matches:
+        print(f"\nMatched by name variant ({len(fuzzy_matches)}):")
+        for sci_name, match in fuzzy_matches:
+            print(f"  {sci_name} -> {match.name} ({match.method})")
+    
+    if needs_review:
+        print(f"\n⚠ Near names not merged, check manually ({len(needs_review)}):")
+        for sci_name, candidates in needs_review:
+            print(f"  {sci_name} ~ {', '.join(candidate.name for candidate in candidates)}")
+    
     # Show some examples
     print(f"\nExamples of merged entries:")
     for i, entry in enumerate(iucn_data[:3]):
@@ -122,14 +130,20 @@ def update_iucn_with_vietnamese_names(lib_dir: Path):
 
 def main():
     """Main function."""
+    parser = argparse.ArgumentParser(description="Merge Vietnamese common names into the IUCN status file.")
+    add_output_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    
     script_dir = Path(__file__).parent
     lib_dir = script_dir.parent / "lib"
+    configure_profiling_from_args(args, str(lib_dir / "iucn_status.json"))
     
     print("=" * 60)
     print("IUCN Status - Vietnamese Common Names Merger")
     print("=" * 60)
     
-    update_iucn_with_vietnamese_names(lib_dir)
+    update_iucn_with_vietnamese_names(lib_dir, indent=output_indent(args, 4))
     
     print(f"\n" + "=" * 60)
     print("Done!")
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Batch merge of the law documents, IUCN and vnredlist into one corpus, with a diff report.
+
+Every source file is loaded into a column table (one list per field plus a join
+key column). The tables are joined in a single hash-join pass on the normalized
+scientific name (``normalize_scientific_name``, case-insensitive), and every
+group of joined rows is resolved the same way the website merges species:
+
+- Species fields come from the most recent document listing the species
+  (year from the file name, ties in ``DOCUMENT_ORDER``). Fields that document
+  lacks (e.g. common_name_en) are taken from the next one that has them.
+- Laws are merged by category; a category listed by several documents takes the
+  entry of the most recent one.
+- Domestic species with varieties (``DOMESTIC_SPECIES``) are also keyed by common
+  name, so each variety stays a separate record.
+
+The diff report lists, for each category of law, how the listing of each species
+changed between consecutive documents covering that category, e.g. "Manis
+javanica: Nhóm IIB → IB (nd06_2019 → nd84_2021)".
+
+Output is deterministic: records are sorted by scientific name and the report
+records the SHA-256 of every source file.
+
+Usage:
+    python merge_engine.py [--output PATH] [--report PATH]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from json_stream import add_output_arguments, output_indent, write_json_array
+from profiling import add_profile_arguments, configure_profiling_from_args
+from species_corpus import DEFAULT_LIB_DIR, load_corpus, normalize_scientific_name
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(SCRIPT_DIR, 'merged_species.json')
+DEFAULT_REPORT = os.path.join(SCRIPT_DIR, 'merge_report.json')
+
+# Sources in the order the website lists them (src/data/legalDocuments.ts)
+DOCUMENT_ORDER = [
+    'nd160_2013.json',
+    'nd06_2019.json',
+    'nd64_2019.json',
+    'nd84_2021.json',
+    'tt27_2025.json',
+    'iucn_status.json',
+    'vnredlist_status.json',
+]
+
+# Species keyed by scientific name and common name, as on the website
+DOMESTIC_SPECIES = {'Oryza sativa', 'Colocasia esculenta', 'Sus scrofa'}
+
+# Law names that denote the same list in different documents
+LAW_CATEGORIES = {
+    'Loài thực vật rừng, động vật rừng nguy cấp, quý, hiếm': 'Nhóm',
+}
+
+
+def document_id(file_name: str) -> str:
+    return os.path.splitext(file_name)[0]
+
+
+def document_year(file_name: str) -> int:
+    """Year of a document from its file name (e.g. nd06_2019.json → 2019), 0 if none."""
+    match = re.search(r'_(\d{4})$', document_id(file_name))
+    return int(match.group(1)) if match else 0
+
+
+def law_category(law: Dict) -> str:
+    """Category of a law entry: its Vietnamese name, with aliases resolved."""
+    name = law['name']['vi'] if isinstance(law['name'], dict) else law['name']
+    return LAW_CATEGORIES.get(name, name)
+
+
+def join_key(entry: Dict) -> Optional[Tuple[str, str]]:
+    """Key a record is merged on, None for records without a scientific name."""
+    sci_name = entry.get('scientific_name', {}).get('value', '').strip()
+    if not sci_name:
+        return None
+    key = normalize_scientific_name(sci_name).lower()
+    if sci_name in DOMESTIC_SPECIES:
+        return key, entry.get('common_name', {}).get('value', '').strip()
+    return key, ''
+
+
+class SourceTable:
+    """Records of one source file as columns."""
+
+    def __init__(self, file_name: str, records: List[Dict]):
+        self.file_name = file_name
+        self.document = document_id(file_name)
+        self.year = document_year(file_name)
+        self.fields: List[str] = []
+        for record in records:
+            for field in record:
+                if field not in self.fields:
+                    self.fields.append(field)
+        self.columns: Dict[str, List] = {
+            field: [record.get(field) for record in records] for field in self.fields
+        }
+        self.keys = [join_key(record) for record in records]
+        # Law categories covered by this source, with the laws of each row by category
+        self.laws: List[Dict[str, Dict]] = [
+            {law_category(law): law for law in record.get('laws', [])} for record in records
+        ]
+        self.categories = sorted({category for row in self.laws for category in row})
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def row(self, index: int) -> Dict:
+        """Record at a row, with the fields it was loaded with."""
+        return {field: self.columns[field][index] for field in self.fields
+                if self.columns[field][index] is not None}
+
+
+def load_tables(lib_dir: str, files: List[str] = DOCUMENT_ORDER) -> List[SourceTable]:
+    """Load the source files that exist, in website order, through the shared corpus loader."""
+    corpus = load_corpus(lib_dir, files)
+    for file_name in corpus.missing_files:
+        print(f"⚠ {file_name} not found, skipping")
+    return [SourceTable(file_name, corpus.entries_by_file[file_name])
+            for file_name in files if file_name in corpus.entries_by_file]
+
+
+def _listing(law: Optional[Dict]) -> str:
+    return law['value'].strip() if law else ''
+
+
+def merge_tables(tables: List[SourceTable]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Join the tables on the normalized scientific name and resolve every species.
+
+    Args:
+        tables: Source tables, in website order
+
+    Returns:
+        (merged records sorted by scientific name, changes between documents)
+    """
+    # Hash join: key -> [(table index, row)] in website order
+    groups: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+    for table_index, table in enumerate(tables):
+        for row, key in enumerate(table.keys):
+            if key is not None:
+                groups.setdefault(key, []).append((table_index, row))
+
+    # Most recent first; stable, so same-year documents keep website order
+    recency = sorted(range(len(tables)), key=lambda i: -tables[i].year)
+    rank = {table_index: position for position, table_index in enumerate(recency)}
+    # Documents covering each category, oldest first
+    coverage: Dict[str, List[int]] = {}
+    for table_index in sorted(range(len(tables)), key=lambda i: tables[i].year):
+        for category in tables[table_index].categories:
+            coverage.setdefault(category, []).append(table_index)
+
+    merged = []
+    changes = []
+    for key, members in groups.items():
+        by_recency = sorted(members, key=lambda member: rank[member[0]])
+        latest_table, latest_row = by_recency[0]
+        record = tables[latest_table].row(latest_row)
+        for table_index, row in by_recency[1:]:
+            for field, value in tables[table_index].row(row).items():
+                record.setdefault(field, value)
+
+        # Laws: first appearance in website order, entry from the most recent document
+        laws: Dict[str, Dict] = {}
+        for table_index, row in members:
+            for category in tables[table_index].laws[row]:
+                laws.setdefault(category, None)
+        for table_index, row in reversed(by_recency):
+            laws.update(tables[table_index].laws[row])
+        # Laws last, after any fields filled in from older sources
+        record.pop('laws', None)
+        record['laws'] = list(laws.values())
+        record['documents'] = [tables[table_index].document
+                               for table_index in sorted({member[0] for member in members})]
+        merged.append(record)
+
+        # Listings per category in each covering document, oldest first
+        rows_by_table = {}
+        for table_index, row in members:
+            rows_by_table.setdefault(table_index, row)
+        sci_name = record['scientific_name']['value']
+        for category in laws:
+            previous: Optional[Tuple[int, str]] = None
+            for table_index in coverage.get(category, []):
+                row = rows_by_table.get(table_index)
+                value = _listing(tables[table_index].laws[row].get(category)) if row is not None else ''
+                if previous is not None and value != previous[1]:
+                    change = 'changed' if value and previous[1] else ('added' if value else 'removed')
+                    changes.append({
+                        'scientific_name': sci_name,
+                        'category': category,
+                        'change': change,
+                        'from_document': tables[previous[0]].document,
+                        'from': previous[1],
+                        'to_document': tables[table_index].document,
+                        'to': value,
+                    })
+                if previous is not None or value:
+                    previous = (table_index, value)
+
+    merged.sort(key=lambda record: (record['scientific_name']['value'], record.get('common_name', {}).get('value', '')))
+    changes.sort(key=lambda change: (change['scientific_name'], change['category'],
+                                     document_year(change['to_document'] + '.json'), change['to_document']))
+    return merged, changes
+
+
+def describe_change(change: Dict) -> str:
+    """One-line description of a change."""
+    before = change['from'] or 'not listed'
+    after = change['to'] or 'not listed'
+    return (f"{change['scientific_name']}: {change['category']} {before} → {after} "
+            f"({change['from_document']} → {change['to_document']})")
+
+
+def build_report(lib_dir: str, tables: List[SourceTable], merged: List[Dict], changes: List[Dict]) -> Dict:
+    """Diff report with the sources it was built from."""
+    sources = []
+    for table in tables:
+        with open(os.path.join(lib_dir, table.file_name), 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        sources.append({'document': table.document, 'year': table.year, 'records': len(table),
+                        'sha256': digest})
+
+    summary = {'changed': 0, 'added': 0, 'removed': 0}
+    for change in changes:
+        summary[change['change']] += 1
+    return {'sources': sources, 'species': len(merged), 'summary': summary, 'changes': changes}
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Merge all data sources and report listing changes.")
+    parser.add_argument('--lib-dir', default=DEFAULT_LIB_DIR, help=f"Data directory (default: {DEFAULT_LIB_DIR})")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f"Merged species JSON (default: {DEFAULT_OUTPUT})")
+    parser.add_argument('--report', default=DEFAULT_REPORT, help=f"Diff report JSON (default: {DEFAULT_REPORT})")
+    add_output_arguments(parser)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    configure_profiling_from_args(args, args.output)
+
+    tables = load_tables(args.lib_dir)
+    merged, changes = merge_tables(tables)
+    report = build_report(args.lib_dir, tables, merged, changes)
+
+    write_json_array(args.output, merged, indent=output_indent(args, 2))
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=output_indent(args, 2))
+
+    print(f"✓ Merged {sum(len(table) for table in tables)} records from {len(tables)} sources "
+          f"into {len(merged)} species -> {args.output}")
+    print(f"✓ Listing changes: {report['summary']['changed']} changed, {report['summary']['added']} added, "
+          f"{report['summary']['removed']} removed -> {args.report}")
+    for change in [change for change in changes if change['change'] == 'changed'][:10]:
+        print(f"  {describe_change(change)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for vnredlist.vast.vn and the IUCN Red List API v4.
+
+Serves recorded responses so the fetchers' concurrency, retries and backoff can
+be exercised without touching the real servers:
+
+- vnredlist species pages (``/<slug>/``) from fixtures/vnredlist_pages, and from
+  a page archive (see page_archive.py) with ``--archive``
+- vnredlist category listings (``/dong-vat/<phylum>/<class>/[page/N/]``), each
+  listing the recorded species pages, a few per page, for crawl_animal_links.py
+- IUCN API v4 responses (``/api/v4/...``) recorded in fixtures/iucn_api/responses.json
+
+With ``--synthesize``, species that were not recorded get a generated page or
+``/taxa/scientific_name`` response (built from a recorded one, with a status
+derived from the name), so runs can use many more species than were recorded.
+
+Every response can be delayed (``--latency``, ``--jitter``), a fraction of
+requests fail with HTTP 503 (``--error-rate``), and requests beyond
+``--rate-limit`` per second get HTTP 429 with a Retry-After header. Request
+counts by status are served at ``/__stats``.
+
+Point the fetchers at the server with their base-URL overrides::
+
+    python mock_server.py serve --port 8765 --synthesize --rate-limit 20
+    VNREDLIST_BASE_URL=http://127.0.0.1:8765 python fetch_vnredlist_status.py --workers 8 --rate 50
+    VNREDLIST_BASE_URL=http://127.0.0.1:8765 python crawl_animal_links.py --workers 4
+    IUCN_API_BASE_URL=http://127.0.0.1:8765/api/v4 IUCN_API_TOKEN=test python fetch_iucn_status.py
+
+``load`` runs a fetcher in-process against an in-process server, with the
+species of the data files repeated ``--scale`` times, and reports throughput
+and how the server was hit::
+
+    python mock_server.py load --target vnredlist --scale 10 --workers 16 --rate-limit 50
+
+Usage:
+    python mock_server.py serve [--host HOST] [--port PORT] [options]
+    python mock_server.py load [--target vnredlist|iucn] [--scale N] [--workers N] [options]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from profiling import add_profile_arguments, configure_profiling_from_args
+from rate_limit import TokenBucket
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PAGES_DIR = os.path.join(SCRIPT_DIR, 'fixtures', 'vnredlist_pages')
+IUCN_RESPONSES = os.path.join(SCRIPT_DIR, 'fixtures', 'iucn_api', 'responses.json')
+
+IUCN_PREFIX = '/api/v4'
+STATS_PATH = '/__stats'
+
+# Statuses given to synthesized species
+SYNTHETIC_CATEGORIES = ['CR', 'EN', 'VU', 'NT', 'LC', 'DD']
+CATEGORY_PATTERN = re.compile(rb'\b(CR|EN|VU|NT|LC|DD)\b')
+
+# Category listings (crawl_animal_links.CATEGORY_PATHS), with the page number of later pages
+LISTING_PATH = re.compile(r'(/(?:dong-vat|thuc-vat)/[^/]+/[^/]+/)(?:page/(\d+)/)?')
+# Species per listing page
+LISTING_PAGE_SIZE = 3
+
+RequestKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def request_key(path: str, params: Dict[str, str]) -> RequestKey:
+    return path, tuple(sorted((name, str(value)) for name, value in params.items()))
+
+
+def slug_to_name(slug: str) -> str:
+    """Scientific name of a species page slug (e.g. "panthera-tigris" → "Panthera tigris")."""
+    return slug.replace('-', ' ').capitalize()
+
+
+def synthetic_category(name: str) -> str:
+    """Stable status of a synthesized species."""
+    return SYNTHETIC_CATEGORIES[zlib.crc32(name.lower().encode('utf-8')) % len(SYNTHETIC_CATEGORIES)]
+
+
+class MockServer:
+    """Threaded HTTP server answering vnredlist page and IUCN API requests."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, rate_limit: Optional[float] = None, synthesize: bool = False,
+                 pages_dir: str = PAGES_DIR, iucn_responses: str = IUCN_RESPONSES,
+                 archive_path: Optional[str] = None, seed: int = 0):
+        """
+        Args:
+            host, port: Address to listen on (port 0 picks a free port)
+            latency: Mean delay before each response, in seconds
+            jitter: Maximum deviation from the mean delay, in seconds
+            error_rate: Fraction of requests answered with HTTP 503
+            rate_limit: Requests per second served before answering HTTP 429 (None = unlimited)
+            synthesize: Generate responses for species that were not recorded
+            pages_dir: Directory of recorded vnredlist pages (<slug>.html)
+            iucn_responses: Recorded IUCN API responses (path, params, status, headers, body)
+            archive_path: Page archive with more recorded vnredlist pages
+            seed: Seed of the random latency and errors
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.synthesize = synthesize
+        self.limiter = TokenBucket(rate_limit, capacity=rate_limit) if rate_limit else None
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, int] = {'requests': 0}
+
+        self.pages: Dict[str, bytes] = {}
+        if pages_dir and os.path.isdir(pages_dir):
+            for file_name in sorted(os.listdir(pages_dir)):
+                if file_name.endswith('.html'):
+                    with open(os.path.join(pages_dir, file_name), 'rb') as f:
+                        self.pages[f"/{file_name[:-len('.html')]}/"] = f.read()
+        if archive_path:
+            from page_archive import PageArchive
+            archive = PageArchive(archive_path)
+            for entry in archive.entries(source='vnredlist'):
+                if entry.status_code == 200:
+                    self.pages[urlsplit(entry.url).path] = archive.body(entry)
+            archive.close()
+        # Synthesized pages are built from the recorded ones that carry a status
+        self._templates = [self.pages[path] for path in sorted(self.pages)
+                           if CATEGORY_PATTERN.search(self.pages[path])]
+
+        self.iucn: Dict[RequestKey, Dict] = {}
+        if iucn_responses and os.path.exists(iucn_responses):
+            with open(iucn_responses, 'r', encoding='utf-8') as f:
+                for item in json.load(f):
+                    self.iucn[request_key(item['path'], item['params'])] = item
+
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL replacing http://vnredlist.vast.vn."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def iucn_base_url(self) -> str:
+        """Base URL replacing https://api.iucnredlist.org/api/v4."""
+        return f"{self.base_url}{IUCN_PREFIX}"
+
+    def start(self) -> 'MockServer':
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'MockServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def record(self, stat: str) -> None:
+        with self._stats_lock:
+            self.stats[stat] = self.stats.get(stat, 0) + 1
+
+    def snapshot(self) -> Dict[str, int]:
+        """Request counts: total, and by response status."""
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def delay(self) -> float:
+        with self._random_lock:
+            offset = self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        return max(0.0, self.latency + offset)
+
+    def fails(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._random_lock:
+            return self._random.random() < self.error_rate
+
+    # -- Responses -----------------------------------------------------------------
+
+    def respond(self, path: str, params: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """Status, headers and body for a request that was not throttled or failed."""
+        if path.startswith(IUCN_PREFIX):
+            return self.iucn_response(path, params)
+        return self.page_response(path)
+
+    def page_response(self, path: str) -> Tuple[int, Dict[str, str], bytes]:
+        html = {'Content-Type': 'text/html; charset=UTF-8'}
+        content = self.pages.get(path)
+        listing = LISTING_PATH.fullmatch(path)
+        if content is None and listing:
+            content = self.listing_page(listing.group(1), int(listing.group(2) or 1))
+        if content is None and self.synthesize and self._templates and re.fullmatch(r'/[^/]+/', path):
+            content = self.synthetic_page(path.strip('/'))
+        if content is None:
+            return 404, html, b'<html><body><h1>Not Found</h1></body></html>'
+        return 200, html, content
+
+    def listing_page(self, category_path: str, page_num: int) -> Optional[bytes]:
+        """A page of a category listing: species links in h2 headings and links to every page."""
+        species = sorted(self.pages)
+        total_pages = max(1, math.ceil(len(species) / LISTING_PAGE_SIZE))
+        if page_num > total_pages:
+            return None
+        start = (page_num - 1) * LISTING_PAGE_SIZE
+        items = ''.join(f'<h2><a href="{self.base_url}{path}">{slug_to_name(path.strip("/"))}</a></h2><p></p>'
+                        for path in species[start:start + LISTING_PAGE_SIZE])
+        pages = ''.join(f'<a href="{self.base_url}{category_path}page/{n}/">{n}</a>'
+                        for n in range(2, total_pages + 1))
+        return f'<html><body>{items}<nav>{pages}</nav></body></html>'.encode('utf-8')
+
+    def synthetic_page(self, slug: str) -> bytes:
+        """A recorded page with the title and status of another species."""
+        name = slug_to_name(slug)
+        template = self._templates[zlib.crc32(slug.encode('utf-8')) % len(self._templates)].decode('utf-8')
+        page = re.sub(r'(<h1[^>]*>).*?(</h1>)', lambda m: f"{m.group(1)}{name}{m.group(2)}", template, count=1)
+        return CATEGORY_PATTERN.sub(synthetic_category(name).encode('utf-8'), page.encode('utf-8'))
+
+    def iucn_response(self, path: str, params: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        recorded = self.iucn.get(request_key(path, params))
+        if recorded is not None:
+            status, headers, body = recorded['status'], dict(recorded['headers']), recorded['body']
+        elif self.synthesize and path == f'{IUCN_PREFIX}/taxa/scientific_name' and 'genus_name' in params:
+            status, headers = 200, {}
+            body = self.synthetic_taxon(' '.join(params[part] for part in ('genus_name', 'species_name', 'infra_name')
+                                                 if params.get(part)))
+        else:
+            status, headers, body = 404, {}, {'error': 'Not found'}
+        headers['Content-Type'] = 'application/json'
+        return status, headers, json.dumps(body).encode('utf-8')
+
+    @staticmethod
+    def synthetic_taxon(name: str) -> Dict:
+        """A /taxa/scientific_name response for a species that was not recorded."""
+        sis_id = zlib.crc32(name.encode('utf-8')) % 10 ** 8
+        parts = name.split()
+        return {
+            'taxon': {
+                'sis_id': sis_id,
+                'scientific_name': name,
+                'kingdom_name': 'ANIMALIA', 'phylum_name': 'CHORDATA', 'class_name': 'MAMMALIA',
+                'order_name': 'PRIMATES', 'family_name': 'CERCOPITHECIDAE',
+                'genus_name': parts[0], 'species_name': parts[1] if len(parts) > 1 else '',
+                'common_names': [{'main': True, 'name': f'{name} (synthetic)', 'language': 'eng'}],
+            },
+            'assessments': [{
+                'assessment_id': sis_id + 1,
+                'latest': True,
+                'year_published': '2024',
+                'red_list_category_code': synthetic_category(name),
+                'url': f'https://www.iucnredlist.org/species/{sis_id}/{sis_id + 1}',
+                'scopes': [{'description': {'en': 'Global'}, 'code': '1'}],
+            }],
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, headers: Dict[str, str], body: bytes, include_body: bool = True) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def _handle(self, include_body: bool) -> None:
+        mock: MockServer = self.server.mock
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+
+        if path == STATS_PATH:
+            self._send(200, {'Content-Type': 'application/json'}, json.dumps(mock.snapshot()).encode('utf-8'),
+                       include_body)
+            return
+
+        mock.record('requests')
+        delay = mock.delay()
+        if delay:
+            time.sleep(delay)
+
+        if mock.limiter is not None:
+            wait = mock.limiter.try_acquire()
+            if wait:
+                mock.record('429')
+                self._send(429, {'Retry-After': str(max(1, math.ceil(wait))), 'Content-Type': 'text/plain'},
+                           b'Too Many Requests', include_body)
+                return
+        if mock.fails():
+            mock.record('503')
+            self._send(503, {'Content-Type': 'text/plain'}, b'Service Unavailable', include_body)
+            return
+
+        status, headers, body = mock.respond(path, dict(parse_qsl(url.query)))
+        mock.record(str(status))
+        self._send(status, headers, body, include_body)
+
+    def do_GET(self):
+        self._handle(True)
+
+    def do_HEAD(self):
+        self._handle(False)
+
+
+def load_test_names(scale: int) -> List[str]:
+    """Scientific names of the data files, repeated ``scale`` times with distinct names."""
+    from species_corpus import DECREE_FILES, load_corpus
+
+    names = sorted(load_corpus(files=DECREE_FILES).names())
+    return [name if copy == 0 else f"{name} x{copy}" for copy in range(max(1, scale)) for name in names]
+
+
+def run_load_test(server: MockServer, target: str, names: List[str], workers: int,
+                  rate: Optional[float]) -> Dict:
+    """
+    Fetch every name through one of the fetchers against a running mock server.
+
+    Args:
+        server: Running server (started with ``synthesize`` for names that were not recorded)
+        target: 'vnredlist' or 'iucn'
+        names: Scientific names to fetch
+        workers: Requests in flight at once
+        rate: Client-side request rate limit (None = unlimited)
+
+    Returns:
+        Species, seconds, species per second, results by outcome and the server's request counts
+    """
+    import fetch_iucn_status
+    import fetch_vnredlist_status
+    import http_cache
+
+    saved = (http_cache.response_cache, fetch_vnredlist_status.BASE_URL, fetch_iucn_status.IUCN_API_BASE_URL)
+    http_cache.configure_cache(None)
+    try:
+        if target == 'vnredlist':
+            fetcher = fetch_vnredlist_status
+            fetcher.BASE_URL = server.base_url
+            fetcher.species_cache.clear()
+            fetcher.fetch_errors.clear()
+            species = [{'scientific_name': {'value': name, 'note': ''}} for name in names]
+            start = time.perf_counter()
+            statuses = [status for status, _ in fetcher.fetch_statuses(species, delay=0, workers=workers,
+                                                                       rate=rate)]
+            elapsed = time.perf_counter() - start
+            outcomes = {'found': sum(1 for status in statuses if status),
+                        'errors': len(fetcher.fetch_errors)}
+            outcomes['not_found'] = len(statuses) - outcomes['found'] - outcomes['errors']
+        else:
+            fetcher = fetch_iucn_status
+            fetcher.IUCN_API_BASE_URL = server.iucn_base_url
+            fetcher.request_limiter = TokenBucket(rate, capacity=workers) if rate else None
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                results = list(executor.map(fetcher.get_iucn_status, names))
+            elapsed = time.perf_counter() - start
+            outcomes: Dict[str, int] = {}
+            for result in results:
+                outcomes[result['status']] = outcomes.get(result['status'], 0) + 1
+    finally:
+        # The fetchers are pointed back at the servers they were using before
+        http_cache.configure_cache(saved[0])
+        fetch_vnredlist_status.BASE_URL, fetch_iucn_status.IUCN_API_BASE_URL = saved[1:]
+
+    return {
+        'species': len(names),
+        'seconds': elapsed,
+        'species_per_second': len(names) / max(elapsed, 1e-9),
+        'outcomes': outcomes,
+        'server': server.snapshot(),
+    }
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the mock server behaviour options to an argument parser."""
+    group = parser.add_argument_group('server behaviour')
+    group.add_argument('--latency', type=float, default=0.0, help="Mean response delay in seconds (default: 0)")
+    group.add_argument('--jitter', type=float, default=0.0, help="Maximum deviation from --latency in seconds")
+    group.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with HTTP 503")
+    group.add_argument('--rate-limit', type=float, help="Requests per second served before answering HTTP 429")
+    group.add_argument('--synthesize', action='store_true', help="Generate responses for species not recorded")
+    group.add_argument('--archive', help="Page archive with more recorded vnredlist pages")
+    group.add_argument('--seed', type=int, default=0, help="Seed of the random latency and errors (default: 0)")
+
+
+def server_from_args(args: argparse.Namespace, host: str = '127.0.0.1', port: int = 0) -> MockServer:
+    return MockServer(host=host, port=port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                      rate_limit=args.rate_limit, synthesize=args.synthesize, archive_path=args.archive,
+                      seed=args.seed)
+
+
+def main():
+    """Main entry point."""
+    from http_session import add_session_arguments, configure_session_from_args
+
+    parser = argparse.ArgumentParser(description="Local stand-in server for vnredlist and the IUCN API.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help="Run the server until interrupted")
+    serve_parser.add_argument('--host', default='127.0.0.1', help="Address to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument('--port', type=int, default=8765, help="Port to listen on (default: 8765)")
+    add_server_arguments(serve_parser)
+
+    load_parser = commands.add_parser('load', help="Run a fetcher against an in-process server")
+    load_parser.add_argument('--target', choices=['vnredlist', 'iucn'], default='vnredlist',
+                             help="Fetcher to run (default: vnredlist)")
+    load_parser.add_argument('--scale', type=int, default=1,
+                             help="Times the species of the data files are repeated (default: 1)")
+    load_parser.add_argument('--workers', type=int, default=8, help="Requests in flight at once (default: 8)")
+    load_parser.add_argument('--rate', type=float, help="Client-side requests per second (default: unlimited)")
+    add_server_arguments(load_parser)
+    add_session_arguments(load_parser)
+    for command_parser in (serve_parser, load_parser):
+        add_profile_arguments(command_parser)
+    args = parser.parse_args()
+    configure_profiling_from_args(args)
+
+    if args.command == 'serve':
+        server = server_from_args(args, args.host, args.port)
+        print(f"✓ Serving on {server.base_url}")
+        print(f"  VNREDLIST_BASE_URL={server.base_url}")
+        print(f"  IUCN_API_BASE_URL={server.iucn_base_url}")
+        print(f"  Recorded: {len(server.pages)} pages, {len(server.iucn)} IUCN responses"
+              f"{' (synthesizing the rest)' if server.synthesize else ''}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            print(f"\nRequests: {server.snapshot()}")
+            server.stop()
+        return
+
+    # Unrecorded species are the point of a load test
+    args.synthesize = True
+    configure_session_from_args(args, pool_size=args.workers)
+    names = load_test_names(args.scale)
+    with server_from_args(args) as server:
+        print(f"Load test: {len(names)} species ({args.scale}x), {args.workers} workers, target {args.target}")
+        # Per-species progress lines would dominate the run
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_load_test(server, args.target, names, args.workers, args.rate)
+
+    print(f"✓ {result['species']} species in {result['seconds']:.2f}s ({result['species_per_second']:.1f}/s)")
+    print(f"  Outcomes: {result['outcomes']}")
+    server_stats = result['server']
+    print(f"  Server: {server_stats['requests']} requests, "
+          f"{server_stats.get('429', 0)} throttled (429), {server_stats.get('503', 0)} failed (503)")
+
+
+if __name__ == '__main__':
+    main()
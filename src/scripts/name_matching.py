@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Fuzzy matching of scientific and taxon names across data sources.
+
+The law documents, IUCN and vnredlist spell the same taxon differently: author
+suffixes ("Manis javanica Desmarest, 1822"), subspecies ("Panthera tigris
+corbetti"), case, and plain typos ("PINOSIDA" for "PINOPSIDA"). ``NameMatcher``
+indexes a list of known names and resolves a name in increasingly loose steps:
+
+1. the exact string
+2. the normalized name (``normalize_scientific_name``, case-insensitive)
+3. the binomial (genus and species), ignoring infraspecific names on either side
+4. the nearest name by edit distance
+
+Fuzzy candidates come from a trigram index: a name within edit distance k of the
+query shares all but at most 3·k of its trigrams, so only names sharing enough
+trigrams are compared, and matching a whole list of names never compares every
+pair. Candidates are ranked by edit distance, then by how many of family, order
+and class disagree, so that among equally close names the one from the same
+family wins. A fuzzy match that stays tied after that is rejected as ambiguous.
+
+Edit distance alone cannot tell a misspelling from a different species of the
+same genus ("Paphiopedilum villosum" and "Paphiopedilum callosum" are two edits
+apart). Callers that copy data between species restrict fuzzy matches with
+``spelling_variant``: same genus, and epithets that differ only in gender
+ending or doubled letters ("oldhamii"/"oldhami", "nigrum"/"nigra"). Looking up
+pages, where misspelt genera occur ("Rheinardia"/"Rheinartia"), allows one edit
+in the genus.
+"""
+
+import re
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+
+from species_corpus import _taxon_key, normalize_scientific_name
+
+
+NGRAM_SIZE = 3
+
+# Taxonomy fields of a data file entry, by rank
+TAXONOMY_FIELDS = {'family': 'family_latin', 'order': 'order_latin', 'class': 'class_latin'}
+
+# Gender and genitive endings of Latin epithets, longest first (-us/-a/-um, -is/-e, -er/-ra, -i)
+EPITHET_ENDINGS = ('us', 'um', 'is', 'er', 'ra', 'a', 'e', 'i')
+
+
+class NameMatch(NamedTuple):
+    """A known name matched to a query."""
+    name: str
+    # 'exact', 'normalized', 'binomial' or 'fuzzy'
+    method: str
+    distance: int
+
+
+def levenshtein(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """
+    Edit distance between two strings.
+
+    Args:
+        a, b: Strings to compare
+        max_distance: Stop early once the distance is known to exceed this
+
+    Returns:
+        The distance, or max_distance + 1 if it is larger than max_distance
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def name_key(name: str) -> str:
+    """Comparison key of a name: normalized, lower-case, single-spaced."""
+    return normalize_scientific_name(name).lower()
+
+
+def binomial_key(name: str) -> str:
+    """Genus and species of a name (the whole key for uninomials such as families)."""
+    return ' '.join(name_key(name).split()[:2])
+
+
+def trigrams(key: str) -> Set[str]:
+    padded = f' {key} '
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+
+def taxonomy_of(entry: Dict) -> Dict[str, str]:
+    """Family, order and class of a data file entry, as comparison keys."""
+    taxonomy = {}
+    for rank, field in TAXONOMY_FIELDS.items():
+        value = entry.get(field, '')
+        if value and value.strip():
+            taxonomy[rank] = _taxon_key(value)
+    return taxonomy
+
+
+def corpus_taxonomy(corpus) -> Dict[str, Dict[str, str]]:
+    """Taxonomy of every species of a SpeciesCorpus, from its first entry with one."""
+    taxonomy = {}
+    for sci_name in corpus.names():
+        for _, entry in corpus.entries(sci_name):
+            found = taxonomy_of(entry)
+            if found:
+                taxonomy[sci_name] = found
+                break
+    return taxonomy
+
+
+def epithet_stem(epithet: str) -> str:
+    """Epithet without doubled letters and its gender ending ("oldhamii" -> "oldham")."""
+    stem = re.sub(r'(.)\1+', r'\1', epithet.lower())
+    for ending in EPITHET_ENDINGS:
+        if stem.endswith(ending) and len(stem) > len(ending) + 2:
+            return stem[:-len(ending)]
+    return stem
+
+
+def spelling_variant(name: str, other: str, genus_edits: int = 0) -> bool:
+    """
+    Whether two names are spellings of the same species: the genus is identical (or
+    within ``genus_edits`` edits) and the epithets differ only in gender ending or
+    doubled letters.
+    """
+    parts, other_parts = binomial_key(name).split(), binomial_key(other).split()
+    if len(parts) != 2 or len(other_parts) != 2:
+        return False
+    if levenshtein(parts[0], other_parts[0], genus_edits) > genus_edits:
+        return False
+    return epithet_stem(parts[1]) == epithet_stem(other_parts[1])
+
+
+def default_max_distance(key: str) -> int:
+    """Edits tolerated for a name: one per 10 characters, between 1 and 2."""
+    return min(2, max(1, len(key) // 10))
+
+
+class NameMatcher:
+    """Index of known names for resolving name variants."""
+
+    def __init__(self, names: Iterable[str], taxonomy: Optional[Dict[str, Dict[str, str]]] = None):
+        """
+        Args:
+            names: Known names, in priority order
+            taxonomy: Family/order/class keys of known names (see ``taxonomy_of``), for tie-breaks
+        """
+        self.names: List[str] = []
+        self.taxonomy = taxonomy or {}
+        self._exact: Dict[str, int] = {}
+        self._by_key: Dict[str, List[int]] = {}
+        self._by_binomial: Dict[str, List[int]] = {}
+        self._keys: List[str] = []
+        self._grams: Dict[str, List[int]] = {}
+
+        for name in names:
+            name = name.strip()
+            if not name or name in self._exact:
+                continue
+            idx = len(self.names)
+            self.names.append(name)
+            self._exact[name] = idx
+            key = name_key(name)
+            self._keys.append(key)
+            self._by_key.setdefault(key, []).append(idx)
+            self._by_binomial.setdefault(binomial_key(name), []).append(idx)
+            for gram in trigrams(key):
+                self._grams.setdefault(gram, []).append(idx)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _taxonomy_mismatches(self, idx: int, taxonomy: Optional[Dict[str, str]]) -> int:
+        known = self.taxonomy.get(self.names[idx], {})
+        if not taxonomy or not known:
+            return 0
+        return sum(1 for rank, value in taxonomy.items() if rank in known and known[rank] != value)
+
+    def _best(self, indices: List[int], taxonomy: Optional[Dict[str, str]]) -> Optional[int]:
+        """Index with the fewest taxonomy mismatches, None if several are tied."""
+        ranked = sorted((self._taxonomy_mismatches(idx, taxonomy), idx) for idx in indices)
+        if len(ranked) > 1 and ranked[0][0] == ranked[1][0]:
+            return None
+        return ranked[0][1]
+
+    def candidates(self, name: str, max_distance: Optional[int] = None) -> List[NameMatch]:
+        """
+        Known names within an edit distance of a name, nearest first.
+
+        Args:
+            name: Name to look up
+            max_distance: Most edits allowed (default: ``default_max_distance``)
+        """
+        key = name_key(name)
+        if max_distance is None:
+            max_distance = default_max_distance(key)
+
+        query_grams = trigrams(key)
+        shared: Counter = Counter()
+        for gram in query_grams:
+            shared.update(self._grams.get(gram, ()))
+        # Each edit changes at most NGRAM_SIZE of the query's trigrams
+        min_shared = len(query_grams) - NGRAM_SIZE * max_distance
+
+        matches = []
+        for idx, count in shared.items():
+            if count < min_shared:
+                continue
+            distance = levenshtein(key, self._keys[idx], max_distance)
+            if distance <= max_distance:
+                matches.append(NameMatch(self.names[idx], 'fuzzy', distance))
+        return sorted(matches, key=lambda match: (match.distance, self._exact[match.name]))
+
+    def match(self, name: str, taxonomy: Optional[Dict[str, str]] = None,
+              max_distance: Optional[int] = None,
+              accept: Optional[Callable[[str, str], bool]] = None) -> Optional[NameMatch]:
+        """
+        Resolve a name to a known name.
+
+        Args:
+            name: Name as written in any source
+            taxonomy: Family/order/class keys of the name, to break ties between candidates
+            max_distance: Most edits allowed for fuzzy matches (default: ``default_max_distance``)
+            accept: Only fuzzy candidates for which ``accept(name, candidate)`` holds are
+                considered (e.g. ``spelling_variant``)
+
+        Returns:
+            The matched name with how it was found, None if nothing (unambiguous) matches
+        """
+        name = name.strip()
+        if name in self._exact:
+            return NameMatch(name, 'exact', 0)
+
+        key = name_key(name)
+        for method, index, lookup in (('normalized', self._by_key, key),
+                                      ('binomial', self._by_binomial, binomial_key(name))):
+            indices = index.get(lookup)
+            if indices:
+                # A known name that is itself the binomial beats its subspecies
+                exact_binomial = [idx for idx in indices if self._keys[idx] == lookup]
+                best = self._best(exact_binomial or indices, taxonomy)
+                if best is not None:
+                    return NameMatch(self.names[best], method, 0)
+
+        candidates = self.candidates(name, max_distance)
+        if accept is not None:
+            candidates = [candidate for candidate in candidates if accept(name, candidate.name)]
+        if not candidates:
+            return None
+        nearest = [self._exact[c.name] for c in candidates if c.distance == candidates[0].distance]
+        best = self._best(nearest, taxonomy)
+        if best is None:
+            return None
+        return NameMatch(self.names[best], 'fuzzy', candidates[0].distance)
+
+
+def reconcile(names: Iterable[str], matcher: NameMatcher,
+              taxonomy: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, Optional[NameMatch]]:
+    """
+    Match every name of one source against the known names of another.
+
+    Args:
+        names: Names to resolve
+        matcher: Index of the other source's names
+        taxonomy: Family/order/class keys of the names being resolved
+
+    Returns:
+        Dictionary mapping each name to its match (None if unmatched)
+    """
+    taxonomy = taxonomy or {}
+    return {name: matcher.match(name, taxonomy.get(name)) for name in names}
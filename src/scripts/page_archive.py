@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Append-only archive of raw HTTP responses, replayed through a memory map.
+
+The response cache (http_cache.py) expires and evicts entries; the archive keeps
+every distinct response body the fetchers receive, so changed extraction logic
+can be re-run over the exact pages it was written for without scraping again.
+
+File format: an 8-byte file header, then one record per response::
+
+    b'PGR1' | header length (uint32, big-endian) | body length (uint64) | header JSON | body
+
+The header holds the URL, cache key, source, status code, response headers,
+fetch time and SHA-256 of the body. A body identical to the latest one archived
+for the same URL is not appended again. An offset index (``<archive>.idx``) maps
+each cache key to its latest record; it is rebuilt from the records if missing,
+and extended when the archive has grown past it.
+
+In replay mode the fetchers read responses from the archive only (see
+``--replay`` in http_cache.py); bodies are sliced from a memory map of the file.
+
+Usage:
+    python page_archive.py info ARCHIVE
+    python page_archive.py replay ARCHIVE [--output PATH] [--parser lxml|bs4]
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from profiling import add_profile_arguments, configure_profiling_from_args
+
+
+FILE_HEADER = b'PGARCH1\n'
+RECORD_MAGIC = b'PGR1'
+RECORD_PREFIX = struct.Struct('>4sIQ')
+INDEX_VERSION = 1
+
+
+class ArchivedResponse(NamedTuple):
+    """Metadata of an archived response and where its body is stored."""
+    key: str
+    url: str
+    source: str
+    status_code: int
+    headers: Dict[str, str]
+    fetched_at: float
+    sha256: str
+    body_offset: int
+    body_length: int
+
+
+class PageArchive:
+    """Append-only response archive with an offset index of the latest record per key."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Archive file (created on first append)
+        """
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self._lock = threading.Lock()
+        self._latest: Dict[str, ArchivedResponse] = {}
+        self._order: List[str] = []
+        self._records = 0
+        self._size = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._mmap_file = None
+        self._append_file = None
+        self._index_dirty = False
+        self._load_index()
+
+    # -- Index -------------------------------------------------------------------
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('version') != INDEX_VERSION or index['size'] > os.path.getsize(self.path):
+                raise ValueError("stale index")
+            for item in index['entries']:
+                entry = ArchivedResponse(*item)
+                self._latest[entry.key] = entry
+            self._order = [entry[0] for entry in index['entries']]
+            self._records = index['records']
+            self._size = index['size']
+        except (OSError, ValueError, KeyError, TypeError):
+            self._latest, self._order, self._records, self._size = {}, [], 0, 0
+        # Records appended after the index was written
+        self._scan()
+
+    def _scan(self) -> None:
+        """Index the records after the indexed size, stopping at a truncated record."""
+        with open(self.path, 'rb') as f:
+            end = os.fstat(f.fileno()).st_size
+            if end == 0:
+                # Created by a run interrupted before the header was written; the
+                # header is written on the first append
+                return
+            if self._size == 0:
+                if f.read(len(FILE_HEADER)) != FILE_HEADER:
+                    raise ValueError(f"{self.path}: not a page archive")
+                self._size = len(FILE_HEADER)
+            offset = self._size
+            while offset + RECORD_PREFIX.size <= end:
+                f.seek(offset)
+                magic, header_length, body_length = RECORD_PREFIX.unpack(f.read(RECORD_PREFIX.size))
+                body_offset = offset + RECORD_PREFIX.size + header_length
+                if magic != RECORD_MAGIC or body_offset + body_length > end:
+                    break
+                header = json.loads(f.read(header_length).decode('utf-8'))
+                self._add(header, body_offset, body_length)
+                offset = body_offset + body_length
+                self._index_dirty = True
+            self._size = offset
+
+    def _add(self, header: Dict, body_offset: int, body_length: int) -> None:
+        entry = ArchivedResponse(header['key'], header['url'], header['source'], header['status_code'],
+                                 header['headers'], header['fetched_at'], header['sha256'],
+                                 body_offset, body_length)
+        if entry.key not in self._latest:
+            self._order.append(entry.key)
+        self._latest[entry.key] = entry
+        self._records += 1
+
+    def save_index(self) -> None:
+        """Write the offset index next to the archive."""
+        with self._lock:
+            if not self._index_dirty:
+                return
+            index = {
+                'version': INDEX_VERSION,
+                'size': self._size,
+                'records': self._records,
+                'entries': [list(self._latest[key]) for key in self._order],
+            }
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, self.index_path)
+            self._index_dirty = False
+
+    # -- Writing -----------------------------------------------------------------
+
+    def append(self, key: str, url: str, source: str, status_code: int, headers: Dict[str, str],
+               content: bytes) -> bool:
+        """
+        Archive a response unless its body is already the latest archived for the key.
+
+        Args:
+            key: Cache key of the request (URL and query parameters)
+            url: Requested URL
+            source: Source name (e.g. "vnredlist")
+            status_code: HTTP status code
+            headers: Response headers
+            content: Raw response body
+
+        Returns:
+            True if a record was appended
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            latest = self._latest.get(key)
+            if latest is not None and latest.sha256 == digest and latest.status_code == status_code:
+                return False
+
+            if self._append_file is None:
+                self._open_for_append()
+            header = json.dumps({
+                'key': key, 'url': url, 'source': source, 'status_code': status_code,
+                'headers': dict(headers), 'fetched_at': time.time(), 'sha256': digest,
+            }, ensure_ascii=False).encode('utf-8')
+            self._append_file.write(RECORD_PREFIX.pack(RECORD_MAGIC, len(header), len(content)))
+            self._append_file.write(header)
+            self._append_file.write(content)
+            self._append_file.flush()
+
+            body_offset = self._size + RECORD_PREFIX.size + len(header)
+            self._add(json.loads(header), body_offset, len(content))
+            self._size = body_offset + len(content)
+            self._index_dirty = True
+            return True
+
+    def _open_for_append(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            with open(self.path, 'wb') as f:
+                f.write(FILE_HEADER)
+            self._size = len(FILE_HEADER)
+        self._append_file = open(self.path, 'r+b')
+        # Drop a record left incomplete by an interrupted run
+        self._append_file.truncate(self._size)
+        self._append_file.seek(self._size)
+
+    # -- Reading -----------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    @property
+    def record_count(self) -> int:
+        """Records in the archive, including older versions of a page."""
+        return self._records
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._latest
+
+    def lookup(self, key: str) -> Optional[ArchivedResponse]:
+        """Latest archived response for a cache key."""
+        return self._latest.get(key)
+
+    def entries(self, source: Optional[str] = None) -> Iterator[ArchivedResponse]:
+        """Latest archived response of every key, in the order keys were first archived."""
+        for key in self._order:
+            entry = self._latest[key]
+            if source is None or entry.source == source:
+                yield entry
+
+    def body(self, entry: ArchivedResponse) -> bytes:
+        """Body of an archived response, read through the memory map."""
+        with self._lock:
+            if self._mmap is None or len(self._mmap) < entry.body_offset + entry.body_length:
+                self._remap()
+            return self._mmap[entry.body_offset:entry.body_offset + entry.body_length]
+
+    def _remap(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap_file.close()
+        self._mmap_file = open(self.path, 'rb')
+        self._mmap = mmap.mmap(self._mmap_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        """Flush the index and release file handles."""
+        self.save_index()
+        with self._lock:
+            if self._append_file is not None:
+                self._append_file.close()
+                self._append_file = None
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap_file.close()
+                self._mmap = None
+
+
+def replay_vnredlist(archive: PageArchive, backend: Optional[str] = None) -> Tuple[Dict[str, Dict], float]:
+    """
+    Re-run the species page parsers over the archived vnredlist pages.
+
+    Args:
+        archive: Archive to replay
+        backend: HTML parser backend (None = fastest available)
+
+    Returns:
+        (results by URL with the conservation status and species details, seconds taken)
+    """
+    from vnredlist_parser import parse_species_page
+
+    start = time.perf_counter()
+    results = {}
+    for entry in archive.entries(source='vnredlist'):
+        if entry.status_code != 200:
+            continue
+        page = parse_species_page(archive.body(entry), backend=backend)
+        results[entry.url] = {
+            'conservation_status': page.conservation_status(),
+            'details': page.species_details(entry.url),
+        }
+    return results, time.perf_counter() - start
+
+
+def main():
+    """Main entry point."""
+    from vnredlist_parser import DEFAULT_BACKEND, PARSER_BACKENDS
+
+    parser = argparse.ArgumentParser(description="Inspect or replay a raw page archive.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    info_parser = commands.add_parser('info', help="Show what the archive holds")
+    info_parser.add_argument('archive')
+    replay_parser = commands.add_parser('replay', help="Re-run the vnredlist parsers over the archive")
+    replay_parser.add_argument('archive')
+    replay_parser.add_argument('--output', help="Write the parse results to this file (JSON)")
+    replay_parser.add_argument('--parser', choices=sorted(PARSER_BACKENDS), default=DEFAULT_BACKEND,
+                               help=f"HTML parser backend (default: {DEFAULT_BACKEND})")
+    for command_parser in (info_parser, replay_parser):
+        add_profile_arguments(command_parser)
+    args = parser.parse_args()
+    configure_profiling_from_args(args, getattr(args, 'output', None))
+
+    if not os.path.exists(args.archive):
+        raise SystemExit(f"✗ {args.archive} not found")
+    archive = PageArchive(args.archive)
+
+    if args.command == 'info':
+        sources: Dict[str, int] = {}
+        for entry in archive.entries():
+            sources[entry.source] = sources.get(entry.source, 0) + 1
+        print(f"Archive: {args.archive} ({os.path.getsize(args.archive) / (1024 * 1024):.1f} MB)")
+        print(f"  Pages: {len(archive)} ({archive.record_count} records including older versions)")
+        for source, count in sorted(sources.items()):
+            print(f"  {source}: {count}")
+    else:
+        results, elapsed = replay_vnredlist(archive, backend=args.parser)
+        statuses: Dict[str, int] = {}
+        for result in results.values():
+            status = result['conservation_status'] or 'None'
+            statuses[status] = statuses.get(status, 0) + 1
+        print(f"✓ Replayed {len(results)} pages in {elapsed:.2f}s ({len(results) / max(elapsed, 1e-9):.0f} pages/s)")
+        for status, count in sorted(statuses.items()):
+            print(f"  {status}: {count}")
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+            print(f"  Results saved to: {args.output}")
+
+    archive.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Profiling for script entry points.
+
+Every script's ``main()`` takes the same options:
+
+- ``--profile`` (or ``--profile cprofile``): deterministic profile of all threads
+  with cProfile, saved as ``<artifact>.prof`` (open with snakeviz, or convert
+  to a flame graph with flameprof or gprof2dot)
+- ``--profile sample``: statistical profile taken by sampling the stacks of all
+  threads every few milliseconds (wall clock, low overhead), saved as
+  ``<artifact>.folded`` in the collapsed-stack format read by flamegraph.pl,
+  inferno and speedscope
+- ``--profile-memory``: peak traced memory and the lines that allocated most,
+  with tracemalloc (slows the run down considerably)
+
+Profile files are written next to the script's artifact (e.g.
+``src/lib/iucn_status.json.prof``), or under .cache/profiles for scripts
+without one; ``--profile-output`` sets another path. The hottest functions are
+printed when the script exits.
+"""
+
+import argparse
+import atexit
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PROFILE_DIR = os.path.join(SCRIPT_DIR, '.cache', 'profiles')
+
+PROFILE_MODES = ('cprofile', 'sample')
+# Seconds between two stack samples
+SAMPLE_INTERVAL = 0.005
+DEFAULT_TOP = 20
+# From Python 3.12 cProfile is built on sys.monitoring: one profiler sees every thread,
+# and enabling a second one while it runs raises ValueError
+PROFILER_PER_THREAD = sys.version_info < (3, 12)
+
+
+def frame_label(code) -> str:
+    """Label of a code object in profiles: function (file:line)."""
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ThreadProfiler:
+    """
+    cProfile over the calling thread and every thread started while it runs.
+
+    Before Python 3.12 a profiler only sees the thread that enabled it, so each new
+    thread gets its own and the statistics are added up; later versions need one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles: List[cProfile.Profile] = []
+
+    def _profile_thread(self, frame, event, arg) -> None:
+        # First profiling event of a new thread: replace this hook with a profiler of its own
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def start(self) -> None:
+        profile = cProfile.Profile()
+        self._profiles.append(profile)
+        if PROFILER_PER_THREAD:
+            threading.setprofile(self._profile_thread)
+        profile.enable()
+
+    def stop(self) -> pstats.Stats:
+        """Stop profiling and return the statistics of all threads."""
+        self._profiles[0].disable()
+        if PROFILER_PER_THREAD:
+            threading.setprofile(None)
+        with self._lock:
+            profiles = list(self._profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+class StackSampler:
+    """Samples the stacks of all threads from a background thread."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Dict[Tuple[str, ...], int] = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                # Root first, with the thread as the outermost frame
+                stack.append(names.get(ident, str(ident)))
+                key = tuple(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._sample, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write_folded(self, path: str) -> None:
+        """Write the samples in collapsed-stack format: ``frame;frame;frame count`` per line."""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{';'.join(frame.replace(';', ':') for frame in stack)} {count}\n")
+
+    def hot_functions(self, top: int = DEFAULT_TOP) -> List[Tuple[str, int, int]]:
+        """Functions by samples on top of the stack: (function, own samples, samples on the stack)."""
+        own: Dict[str, int] = {}
+        total: Dict[str, int] = {}
+        for stack, count in self.stacks.items():
+            own[stack[-1]] = own.get(stack[-1], 0) + count
+            for frame in set(stack[1:]):
+                total[frame] = total.get(frame, 0) + count
+        ranked = sorted(own.items(), key=lambda item: item[1], reverse=True)[:top]
+        return [(frame, count, total.get(frame, count)) for frame, count in ranked]
+
+
+def hot_functions(stats: pstats.Stats, top: int = DEFAULT_TOP) -> List[Tuple[str, int, float, float]]:
+    """Functions with the most own time in a cProfile profile: (function, calls, own s, cumulative s)."""
+    rows = []
+    for (file_name, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        label = f"{name} ({os.path.basename(file_name)}:{line})" if line else name
+        rows.append((label, calls, own, cumulative))
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows[:top]
+
+
+class RunProfiler:
+    """Profiles the rest of a script run and reports when it ends."""
+
+    def __init__(self, output: str, mode: Optional[str] = 'cprofile', memory: bool = False, top: int = DEFAULT_TOP):
+        """
+        Args:
+            output: Path of the profile files without their extension (.prof or .folded is appended)
+            mode: 'cprofile', 'sample' or None (memory only)
+            memory: Track allocations with tracemalloc
+            top: Number of functions (and allocation sites) to print
+        """
+        self.output = output
+        self.mode = mode
+        self.memory = memory
+        self.top = top
+        self._profiler: Optional[ThreadProfiler] = None
+        self._sampler: Optional[StackSampler] = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        if self.memory:
+            tracemalloc.start()
+        if self.mode == 'cprofile':
+            self._profiler = ThreadProfiler()
+            self._profiler.start()
+        elif self.mode == 'sample':
+            self._sampler = StackSampler()
+            self._sampler.start()
+        self._started = time.perf_counter()
+
+    def stop(self) -> Dict:
+        """Stop profiling, write the profile file and return what was measured."""
+        report = {'seconds': time.perf_counter() - self._started, 'profile_path': None}
+        if self._profiler is not None:
+            stats = self._profiler.stop()
+            report['profile_path'] = f"{self.output}.prof"
+            stats.dump_stats(report['profile_path'])
+            report['hot_functions'] = hot_functions(stats, self.top)
+        if self._sampler is not None:
+            self._sampler.stop()
+            report['profile_path'] = f"{self.output}.folded"
+            self._sampler.write_folded(report['profile_path'])
+            report['samples'] = self._sampler.samples
+            report['hot_samples'] = self._sampler.hot_functions(self.top)
+        if self.memory:
+            _, report['peak_memory'] = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            report['allocations'] = [(f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                                      stat.size, stat.count)
+                                     for stat in snapshot.statistics('lineno')[:self.top]]
+        return report
+
+
+def print_report(report: Dict) -> None:
+    """Print the hottest functions and memory use of a profiled run."""
+    print(f"\nProfile ({report['seconds']:.1f}s):")
+    if 'hot_functions' in report:
+        print(f"  {'own s':>8} {'total s':>8} {'calls':>9}  function")
+        for label, calls, own, cumulative in report['hot_functions']:
+            print(f"  {own:8.3f} {cumulative:8.3f} {calls:9d}  {label}")
+    if 'hot_samples' in report:
+        samples = max(1, report['samples'])
+        print(f"  {report['samples']} samples every {SAMPLE_INTERVAL * 1000:.0f} ms (all threads, wall clock)")
+        print(f"  {'own':>6} {'total':>6}  function")
+        for label, own, total in report['hot_samples']:
+            print(f"  {own / samples:6.1%} {total / samples:6.1%}  {label}")
+    if 'peak_memory' in report:
+        print(f"  Peak traced memory: {report['peak_memory'] / (1024 * 1024):.1f} MB; largest allocations still held:")
+        for location, size, count in report['allocations']:
+            print(f"  {size / 1024:10.1f} KB {count:8d} blocks  {location}")
+    if report['profile_path']:
+        print(f"  Profile saved to: {report['profile_path']}")
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the profiling options to a script's argument parser."""
+    group = parser.add_argument_group('profiling')
+    group.add_argument('--profile', nargs='?', const='cprofile', choices=PROFILE_MODES,
+                       help="Profile the run with cProfile (default) or by sampling stacks, "
+                            "and print the hottest functions")
+    group.add_argument('--profile-memory', action='store_true',
+                       help="Report peak memory and the largest allocations (tracemalloc)")
+    group.add_argument('--profile-output', metavar='PATH',
+                       help="Profile file path without extension (default: next to the script's output)")
+    group.add_argument('--profile-top', type=int, default=DEFAULT_TOP, metavar='N',
+                       help=f"Number of functions to print (default: {DEFAULT_TOP})")
+
+
+def profile_output_path(artifact: Optional[str]) -> str:
+    """Where profile files of a run go: next to its artifact, else under .cache/profiles."""
+    if artifact:
+        return str(artifact)
+    os.makedirs(DEFAULT_PROFILE_DIR, exist_ok=True)
+    script = os.path.splitext(os.path.basename(sys.argv[0]))[0] or 'python'
+    return os.path.join(DEFAULT_PROFILE_DIR, script)
+
+
+def configure_profiling_from_args(args: argparse.Namespace, artifact: Optional[str] = None) -> Optional[RunProfiler]:
+    """
+    Start profiling the rest of the run if requested on the command line.
+
+    The report is printed and the profile file written when the script exits.
+
+    Args:
+        args: Parsed options (see ``add_profile_arguments``)
+        artifact: The script's main output file; profile files are written next to it
+
+    Returns:
+        The running profiler, or None when profiling is off
+    """
+    if not (args.profile or args.profile_memory):
+        return None
+
+    output = args.profile_output or profile_output_path(artifact)
+    directory = os.path.dirname(os.path.abspath(output))
+    os.makedirs(directory, exist_ok=True)
+    profiler = RunProfiler(output, args.profile, args.profile_memory, args.profile_top)
+    atexit.register(lambda: print_report(profiler.stop()))
+    profiler.start()
+    return profiler
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Token-bucket rate limiter shared by the scraping scripts.
+
+Lets several requests be in flight at once while keeping the overall request
+rate to a remote server below a fixed number of requests per second.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at ``rate`` tokens per second, up to ``capacity``.
+    Each call to ``acquire`` consumes one token and blocks until one is available.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate: Sustained number of tokens (requests) allowed per second
+            capacity: Maximum burst size
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until ``tokens`` tokens are available, then consume them."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return
+            time.sleep(wait)
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        Consume ``tokens`` tokens if they are available, without blocking.
+
+        Returns:
+            0 if the tokens were consumed, otherwise the seconds until they will be available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+
+            return (tokens - self._tokens) / self.rate
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Refresh manifest for incremental runs of the fetch scripts.
+
+The manifest records, for each species, when it was last fetched and a hash of its
+entries in the source law documents. An incremental run then only re-queries species
+that are new, whose source entries changed, or whose last fetch is too old, and
+merges the results into the existing output file.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from species_corpus import load_corpus
+
+
+def compute_source_hashes(lib_dir: str, json_files: List[str]) -> Dict[str, str]:
+    """
+    Hash the source entries of every species across a set of JSON files.
+
+    Args:
+        lib_dir: Path to the lib directory containing JSON files
+        json_files: JSON file names to read, in order
+
+    Returns:
+        Dictionary mapping scientific names to a SHA-256 hash of their entries
+    """
+    corpus = load_corpus(lib_dir, json_files)
+    return {
+        sci_name: hashlib.sha256(
+            json.dumps(source_entries, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        for sci_name, source_entries in corpus.by_name.items()
+    }
+
+
+class RefreshManifest:
+    """Per-species record of the last fetch time and source hash."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.species: Dict[str, Dict[str, str]] = {}
+
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.species = json.load(f).get('species', {})
+
+    def select_for_refresh(self, source_hashes: Dict[str, str],
+                           stale_after: Optional[timedelta] = None,
+                           since: Optional[datetime] = None) -> List[str]:
+        """
+        Pick the species that need to be fetched again.
+
+        A species is selected if it is not in the manifest, its source hash changed,
+        it was last fetched more than ``stale_after`` ago, or before ``since``.
+
+        Args:
+            source_hashes: Current source hash of every species
+            stale_after: Maximum age of a previous fetch
+            since: Re-fetch species last fetched before this time
+
+        Returns:
+            Sorted list of scientific names to fetch
+        """
+        now = datetime.now(timezone.utc)
+        selected = []
+
+        for sci_name, source_hash in source_hashes.items():
+            record = self.species.get(sci_name)
+            if record is None or record.get('source_hash') != source_hash:
+                selected.append(sci_name)
+                continue
+
+            last_fetched = datetime.fromisoformat(record['last_fetched'])
+            if stale_after is not None and now - last_fetched > stale_after:
+                selected.append(sci_name)
+            elif since is not None and last_fetched < since:
+                selected.append(sci_name)
+
+        return sorted(selected)
+
+    def mark_fetched(self, names: Iterable[str], source_hashes: Dict[str, str]) -> None:
+        """Record that species were fetched now with their current source hashes."""
+        now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        for sci_name in names:
+            if sci_name in source_hashes:
+                self.species[sci_name] = {
+                    'last_fetched': now,
+                    'source_hash': source_hashes[sci_name],
+                }
+
+    def prune(self, source_hashes: Dict[str, str]) -> None:
+        """Forget species that are no longer in any source file."""
+        self.species = {name: record for name, record in self.species.items() if name in source_hashes}
+
+    def save(self) -> None:
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'species': dict(sorted(self.species.items()))}, f, ensure_ascii=False, indent=2)
+
+
+def load_existing_records(output_path: str) -> Dict[str, Dict]:
+    """
+    Load a previously generated output file, keyed by scientific name.
+
+    Returns:
+        Dictionary mapping scientific names to output entries (empty if missing)
+    """
+    if not os.path.exists(output_path):
+        return {}
+
+    with open(output_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    return {entry['scientific_name']['value']: entry for entry in data}
+
+
+def parse_since(value: str) -> datetime:
+    """Parse a --since date (YYYY-MM-DD or ISO timestamp) as UTC."""
+    since = datetime.fromisoformat(value)
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return since
+
+
+def add_refresh_arguments(parser: argparse.ArgumentParser, default_manifest: str) -> None:
+    """Add the shared incremental refresh options to a script's argument parser."""
+    group = parser.add_argument_group('incremental refresh')
+    group.add_argument('--incremental', action='store_true',
+                       help="Only fetch species that are new or whose source entries changed")
+    group.add_argument('--stale-after', type=float, default=None, metavar='DAYS',
+                       help="Also re-fetch species last fetched more than DAYS ago (implies --incremental)")
+    group.add_argument('--since', type=parse_since, default=None, metavar='DATE',
+                       help="Also re-fetch species last fetched before DATE (implies --incremental)")
+    group.add_argument('--manifest', default=default_manifest,
+                       help=f"Refresh manifest path (default: {default_manifest})")
+
+
+def is_incremental(args: argparse.Namespace) -> bool:
+    return args.incremental or args.stale_after is not None or args.since is not None
+
+
+def stale_after_from_args(args: argparse.Namespace) -> Optional[timedelta]:
+    return timedelta(days=args.stale_after) if args.stale_after is not None else None
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Prebuilt search index over the scientific and common names of the law corpus.
+
+Searching by scanning every record means comparing the query with each Latin name
+and each diacritic-heavy Vietnamese common name. This module builds, once, an index
+over the species of the src/lib data files:
+
+- Names are accent-folded ("Hoàng đàn" → "hoang dan") and split into words.
+- A sorted term list maps each word to the species using it. A prefix query finds
+  its range of terms by binary search, so "ho dan" matches "Hoàng đàn".
+- A trigram index answers substring queries ("ang da").
+- Normalized scientific names (see ``normalize_scientific_name``) map to their
+  species, so authors, years and infraspecific ranks can be left out.
+
+Lookups only touch the terms and postings that match the query, so their cost
+depends on the size of the result rather than on the size of the corpus.
+
+Usage:
+    python search_index.py [--output PATH]
+    python search_index.py --query "ho dan"
+"""
+
+import argparse
+import bisect
+import json
+import os
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set
+
+from profiling import add_profile_arguments, configure_profiling_from_args
+from species_corpus import DECREE_FILES, DEFAULT_LIB_DIR, load_corpus, normalize_scientific_name
+
+
+FORMAT_NAME = 'species-search-index'
+FORMAT_VERSION = 1
+
+# Law documents for Vietnamese names, iucn_status.json for English names
+INDEX_FILES = DECREE_FILES + ['iucn_status.json']
+
+DEFAULT_OUTPUT = os.path.join(DEFAULT_LIB_DIR, 'species_search_index.json')
+
+NGRAM_SIZE = 3
+
+
+def fold_accents(text: str) -> str:
+    """
+    Lower-case text and strip diacritics, for matching typed queries.
+
+    Vietnamese "đ" is a separate letter rather than an accented "d", so it is
+    mapped explicitly.
+    """
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    decomposed = unicodedata.normalize('NFD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """Accent-folded words of a name."""
+    return re.findall(r'[a-z0-9]+', fold_accents(text))
+
+
+def ngrams(text: str, size: int = NGRAM_SIZE) -> Set[str]:
+    """Character n-grams of the folded words of a text, spaces included."""
+    folded = ' '.join(tokenize(text))
+    return {folded[i:i + size] for i in range(len(folded) - size + 1)}
+
+
+def build_index(corpus) -> Dict:
+    """
+    Build the search index of a species corpus.
+
+    Args:
+        corpus: SpeciesCorpus to index
+
+    Returns:
+        JSON-serializable index
+    """
+    docs = []
+    texts = []
+    postings: Dict[str, Set[int]] = {}
+    grams: Dict[str, Set[int]] = {}
+    names: Dict[str, List[int]] = {}
+
+    for doc_id, sci_name in enumerate(corpus.names()):
+        vi_names: List[str] = []
+        en_names: List[str] = []
+        for _, entry in corpus.entries(sci_name):
+            for field, found in (('common_name', vi_names), ('common_name_en', en_names)):
+                value = entry.get(field, {}).get('value', '').strip()
+                if value and value not in found:
+                    found.append(value)
+
+        docs.append([sci_name, vi_names[0] if vi_names else '', en_names[0] if en_names else ''])
+        searchable = [sci_name] + vi_names + en_names
+        texts.append('|'.join(' '.join(tokenize(text)) for text in searchable))
+
+        for text in searchable:
+            for term in tokenize(text):
+                postings.setdefault(term, set()).add(doc_id)
+            for gram in ngrams(text):
+                grams.setdefault(gram, set()).add(doc_id)
+        names.setdefault(normalize_scientific_name(sci_name).lower(), []).append(doc_id)
+
+    terms = sorted(postings)
+    return {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'docs': docs,
+        'texts': texts,
+        'terms': terms,
+        'postings': [sorted(postings[term]) for term in terms],
+        'ngrams': {gram: sorted(ids) for gram, ids in sorted(grams.items())},
+        'names': names,
+    }
+
+
+def write_index(index: Dict, path: str) -> int:
+    """Write an index as compact JSON; returns the size in bytes."""
+    data = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+class SearchIndex:
+    """Query API over a prebuilt search index."""
+
+    def __init__(self, index: Dict):
+        if index.get('format') != FORMAT_NAME or index.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Not a {FORMAT_NAME} v{FORMAT_VERSION} index")
+        self.docs: List[List[str]] = index['docs']
+        self.texts: List[str] = index['texts']
+        self.terms: List[str] = index['terms']
+        self.postings: List[List[int]] = index['postings']
+        self.ngrams: Dict[str, List[int]] = index['ngrams']
+        self.names: Dict[str, List[int]] = index['names']
+        self._doc_ids = {doc[0]: doc_id for doc_id, doc in enumerate(self.docs)}
+
+    @classmethod
+    def load(cls, path: str) -> 'SearchIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_corpus(cls, corpus) -> 'SearchIndex':
+        return cls(build_index(corpus))
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _result(self, doc_ids: Iterable[int]) -> List[Dict[str, str]]:
+        return [
+            {'scientific_name': self.docs[i][0], 'common_name': self.docs[i][1], 'common_name_en': self.docs[i][2]}
+            for i in sorted(doc_ids)
+        ]
+
+    def _prefix_ids(self, prefix: str) -> Set[int]:
+        """Species with a word starting with an already folded prefix."""
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + '￿', lo=start)
+        ids: Set[int] = set()
+        for position in range(start, end):
+            ids.update(self.postings[position])
+        return ids
+
+    def prefix(self, query: str) -> List[Dict[str, str]]:
+        """
+        Species having, for every word of the query, a word starting with it.
+
+        Args:
+            query: Words or word prefixes, with or without accents (e.g. "ho dan")
+
+        Returns:
+            Matching species (scientific_name, common_name, common_name_en), in corpus order
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        ids: Optional[Set[int]] = None
+        # Longest (most selective) words first, stopping as soon as nothing is left
+        for word in sorted(words, key=len, reverse=True):
+            matches = self._prefix_ids(word)
+            ids = matches if ids is None else ids & matches
+            if not ids:
+                return []
+        return self._result(ids)
+
+    def substring(self, query: str) -> List[Dict[str, str]]:
+        """
+        Species with a name containing the query, ignoring accents and case.
+
+        Queries shorter than the n-gram size are answered as prefix queries.
+        """
+        folded = ' '.join(tokenize(query))
+        if len(folded) < NGRAM_SIZE:
+            return self.prefix(query)
+        ids: Optional[Set[int]] = None
+        for gram in sorted(ngrams(folded), key=lambda g: len(self.ngrams.get(g, ()))):
+            matches = self.ngrams.get(gram)
+            if not matches:
+                return []
+            ids = set(matches) if ids is None else ids.intersection(matches)
+            if not ids:
+                return []
+        # Trigrams can match out of order; confirm on the folded names of the candidates
+        return self._result(i for i in ids if any(folded in text for text in self.texts[i].split('|')))
+
+    def scientific_name(self, name: str) -> List[Dict[str, str]]:
+        """Species by scientific name, ignoring authors, years, rank and case."""
+        return self._result(self.names.get(normalize_scientific_name(name).lower(), []))
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        Search species by any name: scientific name matches first, then word prefixes,
+        then substrings.
+
+        Args:
+            query: Search text as typed by a user
+            limit: Maximum number of results
+
+        Returns:
+            Matching species, without duplicates
+        """
+        # Prefix matches containing the whole query as a phrase come first ("te te" → "Tê tê java")
+        folded = ' '.join(tokenize(query))
+        prefix_matches = self.prefix(query)
+        phrase_matches = [match for match in prefix_matches
+                          if any(name.startswith(folded) or f' {folded}' in name
+                                 for name in self.texts[self._doc_ids[match['scientific_name']]].split('|'))]
+        phrase_names = {match['scientific_name'] for match in phrase_matches}
+        prefix_matches = phrase_matches + [match for match in prefix_matches
+                                           if match['scientific_name'] not in phrase_names]
+
+        results: List[Dict[str, str]] = []
+        seen: Set[str] = set()
+        for matches in (self.scientific_name(query), prefix_matches):
+            for match in matches:
+                if match['scientific_name'] not in seen:
+                    seen.add(match['scientific_name'])
+                    results.append(match)
+        if not results:
+            results = self.substring(query)
+        return results[:limit] if limit is not None else results
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Build or query the species search index.")
+    parser.add_argument('--lib-dir', default=DEFAULT_LIB_DIR, help=f"Data directory (default: {DEFAULT_LIB_DIR})")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f"Index path (default: {DEFAULT_OUTPUT})")
+    parser.add_argument('--query', help="Search the index at --output instead of building it")
+    parser.add_argument('--limit', type=int, default=20, help="Maximum results for --query (default: 20)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    configure_profiling_from_args(args, args.output)
+
+    if args.query is not None:
+        index = SearchIndex.load(args.output)
+        results = index.search(args.query, limit=args.limit)
+        print(f"Results for '{args.query}': {len(results)}")
+        for result in results:
+            print(f"  {result['scientific_name']} - {result['common_name']}")
+        return
+
+    corpus = load_corpus(args.lib_dir, INDEX_FILES)
+    for json_file in corpus.missing_files:
+        print(f"⚠ {json_file} not found, skipping")
+
+    index = build_index(corpus)
+    size = write_index(index, args.output)
+    print(f"✓ Wrote {args.output}")
+    print(f"  Species: {len(index['docs'])}")
+    print(f"  Words: {len(index['terms'])}, n-grams: {len(index['ngrams'])}")
+    print(f"  Size: {size / 1024:.0f} KB")
+
+
+if __name__ == '__main__':
+    main()
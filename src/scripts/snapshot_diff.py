@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Change detection between successive snapshots of a status file.
+
+The fetchers overwrite vnredlist_status.json and iucn_status.json on every run.
+This module compares two versions of such a file, keyed by scientific name, and
+reports added, removed and re-categorized species (e.g. EN → CR) as well as
+species whose entry changed otherwise. Both files are streamed; only a small
+index (key, status, hash of the record) of the old file is kept in memory.
+
+The comparison can also be written as a patch: the removed keys, the new or
+changed records, and where new records go. Applying the patch to the old file
+reproduces the new file byte for byte (the patch records the SHA-256 of both),
+so downstream caches can ship and apply the patch and reload only the affected
+species.
+
+Usage:
+    python snapshot_diff.py diff OLD NEW [--report PATH] [--patch PATH]
+    python snapshot_diff.py apply PATCH BASE [--output PATH]
+
+The fetchers take ``--changes PATH`` and ``--patch PATH`` to write the report and
+the patch for the run against the file they overwrite.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from json_stream import JsonArrayWriter, iter_json_array
+from profiling import add_profile_arguments, configure_profiling_from_args
+
+
+PATCH_FORMAT = 'species-snapshot-patch'
+PATCH_VERSION = 1
+
+# A record key: scientific name and occurrence number (1 unless a name repeats)
+Key = Tuple[str, int]
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def record_digest(record: Dict) -> str:
+    """Hash of a record's content, independent of file formatting."""
+    text = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def record_status(record: Dict) -> str:
+    """Status of a record: the values of its laws (e.g. "EN")."""
+    return ', '.join(law.get('value', '') for law in record.get('laws', []))
+
+
+def keyed_records(path: str):
+    """Yield (key, record) for the records of a status file, in file order."""
+    seen: Dict[str, int] = {}
+    for record in iter_json_array(path):
+        name = record.get('scientific_name', {}).get('value', '').strip()
+        seen[name] = seen.get(name, 0) + 1
+        yield (name, seen[name]), record
+
+
+def ends_with_newline(path: str) -> bool:
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+def detect_indent(path: str) -> Optional[int]:
+    """Indentation a JSON array file was written with, None for compact files."""
+    with open(path, 'r', encoding='utf-8') as f:
+        head = f.read(256)
+    if not head.startswith('[\n'):
+        return None
+    line = head[2:].split('\n', 1)[0]
+    return len(line) - len(line.lstrip(' '))
+
+
+class SnapshotIndex:
+    """Keys, statuses and record hashes of a status file, in file order."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.sha256 = file_sha256(path)
+        self.keys: List[Key] = []
+        self.entries: Dict[Key, Tuple[str, str]] = {}
+        for key, record in keyed_records(path):
+            self.keys.append(key)
+            self.entries[key] = (record_status(record), record_digest(record))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+def index_snapshot(path: str) -> Optional[SnapshotIndex]:
+    """Index of a status file, None if it does not exist or cannot be read."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return SnapshotIndex(path)
+    except (OSError, ValueError) as e:
+        print(f"⚠ Could not index {path}: {e}")
+        return None
+
+
+def diff_snapshot(old: SnapshotIndex, new_path: str) -> Tuple[Dict, Dict]:
+    """
+    Compare an indexed snapshot with a newer version of the file.
+
+    Args:
+        old: Index of the previous version
+        new_path: Path of the new version
+
+    Returns:
+        (report, patch): the report lists added, removed, recategorized and updated
+        species; the patch turns the old file into the new one
+    """
+    added, recategorized, updated = [], [], []
+    upserts = []
+    new_keys: List[Key] = []
+
+    for position, (key, record) in enumerate(keyed_records(new_path)):
+        new_keys.append(key)
+        status = record_status(record)
+        previous = old.entries.get(key)
+        if previous is None:
+            added.append({'scientific_name': key[0], 'status': status})
+            upserts.append({'key': list(key), 'position': position, 'new': True, 'record': record})
+            continue
+        if previous[1] != record_digest(record):
+            if previous[0] != status:
+                recategorized.append({'scientific_name': key[0], 'from': previous[0], 'to': status})
+            else:
+                updated.append({'scientific_name': key[0], 'status': status})
+        else:
+            continue
+        upserts.append({'key': list(key), 'position': position, 'record': record})
+
+    new_key_set = set(new_keys)
+    removed_keys = [key for key in old.keys if key not in new_key_set]
+    removed = [{'scientific_name': key[0], 'status': old.entries[key][0]} for key in removed_keys]
+
+    report = {
+        'old': {'path': old.path, 'sha256': old.sha256, 'records': len(old)},
+        'new': {'path': new_path, 'sha256': file_sha256(new_path), 'records': len(new_keys)},
+        'summary': {'added': len(added), 'removed': len(removed),
+                    'recategorized': len(recategorized), 'updated': len(updated)},
+        'added': added,
+        'removed': removed,
+        'recategorized': recategorized,
+        'updated': updated,
+    }
+
+    patch = {
+        'format': PATCH_FORMAT,
+        'version': PATCH_VERSION,
+        'base_sha256': old.sha256,
+        'target_sha256': report['new']['sha256'],
+        'indent': detect_indent(new_path),
+        'trailing_newline': ends_with_newline(new_path),
+        'remove': [list(key) for key in removed_keys],
+        'upsert': upserts,
+    }
+    # Records that did not change keep their relative order unless the file was reordered;
+    # only then does the patch need the full order
+    if _patched_order(old.keys, patch) != new_keys:
+        patch['order'] = [list(key) for key in new_keys]
+    return report, patch
+
+
+def _patched_order(base_keys: List[Key], patch: Dict) -> List[Key]:
+    """Key order after applying a patch without an explicit order."""
+    removed = {tuple(key) for key in patch['remove']}
+    kept = [key for key in base_keys if key not in removed]
+    # Added keys go to their positions in the new file; kept keys fill the gaps in order
+    added = {item['position']: tuple(item['key']) for item in patch['upsert'] if item.get('new')}
+    remaining = iter(kept)
+    return [added[position] if position in added else next(remaining)
+            for position in range(len(kept) + len(added))]
+
+
+def apply_patch(base_path: str, patch: Dict, output_path: str) -> int:
+    """
+    Apply a patch to the file it was made from.
+
+    Args:
+        base_path: The old version of the file
+        patch: Patch from ``diff_snapshot``
+        output_path: Where to write the new version (may be base_path)
+
+    Returns:
+        Number of records written
+
+    Raises:
+        ValueError: If the base file or the result do not match the patch's hashes
+    """
+    if patch.get('format') != PATCH_FORMAT or patch.get('version') != PATCH_VERSION:
+        raise ValueError(f"Not a {PATCH_FORMAT} v{PATCH_VERSION} patch")
+    if file_sha256(base_path) != patch['base_sha256']:
+        raise ValueError(f"{base_path} is not the file this patch was made from")
+
+    upserts = {tuple(item['key']): item['record'] for item in patch['upsert']}
+    removed = {tuple(key) for key in patch['remove']}
+
+    # Written next to the output and checked before it replaces anything
+    patched_path = f"{output_path}.patched"
+    with JsonArrayWriter(patched_path, indent=patch['indent']) as writer:
+        if 'order' in patch:
+            # Reordered file: unchanged records are looked up by key
+            order = [tuple(key) for key in patch['order']]
+            wanted = set(order) - set(upserts)
+            base_records = {key: record for key, record in keyed_records(base_path) if key in wanted}
+            for key in order:
+                writer.write(upserts[key] if key in upserts else base_records[key])
+        else:
+            # Kept records are in base order: stream the base file alongside the output,
+            # inserting added records at their positions
+            added = {item['position']: item['record'] for item in patch['upsert'] if item.get('new')}
+            position = 0
+            for key, record in keyed_records(base_path):
+                if key in removed:
+                    continue
+                while position in added:
+                    writer.write(added.pop(position))
+                    position += 1
+                writer.write(upserts.get(key, record))
+                position += 1
+            for position in sorted(added):
+                writer.write(added[position])
+    if patch.get('trailing_newline'):
+        with open(patched_path, 'a', encoding='utf-8') as f:
+            f.write('\n')
+
+    if file_sha256(patched_path) != patch['target_sha256']:
+        os.remove(patched_path)
+        raise ValueError(f"Patched {output_path} does not match the target of the patch")
+    os.replace(patched_path, output_path)
+    return writer.count
+
+
+def print_report(report: Dict, limit: int = 20) -> None:
+    """Print a summary of a snapshot comparison."""
+    summary = report['summary']
+    print(f"Changes since the previous snapshot: {summary['added']} added, {summary['removed']} removed, "
+          f"{summary['recategorized']} re-categorized, {summary['updated']} otherwise updated")
+    for item in report['recategorized'][:limit]:
+        print(f"  {item['scientific_name']}: {item['from'] or '-'} → {item['to'] or '-'}")
+    for item in report['added'][:limit]:
+        print(f"  + {item['scientific_name']} ({item['status'] or '-'})")
+    for item in report['removed'][:limit]:
+        print(f"  - {item['scientific_name']} ({item['status'] or '-'})")
+
+
+def write_json(path: str, data: Dict) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def add_change_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the change report options to a fetcher's argument parser."""
+    parser.add_argument('--changes', metavar='PATH',
+                        help="Write a report of the changes to the output file (JSON)")
+    parser.add_argument('--patch', metavar='PATH',
+                        help="Write a patch from the previous output file to the new one")
+
+
+def report_changes(previous: Optional[SnapshotIndex], path: str, args: argparse.Namespace) -> Optional[Dict]:
+    """
+    Report how a fetcher's output changed, after it was written.
+
+    Args:
+        previous: Index of the output file taken before it was overwritten
+        path: The output file
+        args: Parsed arguments (see ``add_change_arguments``)
+
+    Returns:
+        The report, None if there was no previous file
+    """
+    if previous is None:
+        return None
+    report, patch = diff_snapshot(previous, path)
+    print()
+    print_report(report)
+    if args.changes:
+        write_json(args.changes, report)
+        print(f"  Change report saved to: {args.changes}")
+    if args.patch:
+        write_json(args.patch, patch)
+        print(f"  Patch saved to: {args.patch}")
+    return report
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Compare status snapshots and apply patches.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    diff_parser = commands.add_parser('diff', help="Compare two versions of a status file")
+    diff_parser.add_argument('old', help="Previous version")
+    diff_parser.add_argument('new', help="New version")
+    diff_parser.add_argument('--report', help="Write the change report to this file (JSON)")
+    diff_parser.add_argument('--patch', help="Write a patch from OLD to NEW to this file")
+
+    apply_parser = commands.add_parser('apply', help="Apply a patch to the version it was made from")
+    apply_parser.add_argument('patch', help="Patch file")
+    apply_parser.add_argument('base', help="Version the patch was made from")
+    apply_parser.add_argument('--output', help="Where to write the result (default: overwrite BASE)")
+
+    for command_parser in (diff_parser, apply_parser):
+        add_profile_arguments(command_parser)
+    args = parser.parse_args()
+    configure_profiling_from_args(args)
+
+    if args.command == 'diff':
+        report, patch = diff_snapshot(SnapshotIndex(args.old), args.new)
+        print_report(report)
+        if args.report:
+            write_json(args.report, report)
+            print(f"✓ Report saved to: {args.report}")
+        if args.patch:
+            write_json(args.patch, patch)
+            print(f"✓ Patch saved to: {args.patch} ({os.path.getsize(args.patch) / 1024:.1f} KB, "
+                  f"new file {os.path.getsize(args.new) / 1024:.1f} KB)")
+        return
+
+    with open(args.patch, 'r', encoding='utf-8') as f:
+        patch = json.load(f)
+    output = args.output or args.base
+    try:
+        count = apply_patch(args.base, patch, output)
+    except ValueError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    print(f"✓ Patched {output}: {count} records")
+
+
+if __name__ == '__main__':
+    main()
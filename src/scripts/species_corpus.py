@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Shared loader for the species listed in the project's law data files (src/lib).
+
+Each JSON file is parsed once per process into a ``SpeciesCorpus`` that indexes the
+species by scientific name (exact and normalized), by family, order and class, and
+by the law document they are listed in. All scripts read species through this module
+so that they agree on which species exist and on the order they were first seen in.
+
+Parsed corpora are also saved as pickle snapshots under ``.cache/corpus``. A snapshot
+records the mtime, size and SHA-256 of every source file and is rebuilt automatically
+when any of them changes, so later runs skip JSON parsing and index building.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+DEFAULT_LIB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib')
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'corpus')
+
+# Changes whenever this module does, so snapshots of an older SpeciesCorpus are not loaded
+with open(__file__, 'rb') as _source:
+    SNAPSHOT_VERSION = hashlib.sha256(_source.read()).hexdigest()[:12]
+
+# Law documents (decrees and circulars), in priority order
+DECREE_FILES = [
+    'nd06_2019.json',
+    'nd160_2013.json',
+    'nd64_2019.json',
+    'nd84_2021.json',
+    'tt27_2025.json'
+]
+
+
+def normalize_scientific_name(name: str) -> str:
+    """Normalize scientific name for URL construction."""
+    # Remove author names and years (e.g., "Linnaeus, 1758")
+    name = re.sub(r'\s+[A-Z][a-z]+.*\d{4}.*$', '', name)
+    # Remove subspecies indicators and extra info
+    name = re.sub(r'\s+(var\.|subsp\.|f\.).*$', '', name)
+    # Clean up extra whitespace
+    name = ' '.join(name.split())
+    return name.strip()
+
+
+def _taxon_key(value: str) -> str:
+    """Index key for a taxon name (case varies between files)."""
+    return ' '.join(value.split()).upper()
+
+
+class SpeciesCorpus:
+    """Entries of a set of law data files, indexed by species."""
+
+    def __init__(self, lib_dir: str, files: List[str]):
+        """
+        Args:
+            lib_dir: Path to the lib directory containing JSON files
+            files: JSON file names to read, in priority order
+        """
+        self.lib_dir = lib_dir
+        self.files = list(files)
+        self.missing_files: List[str] = []
+        # Raw entries of every file that could be read
+        self.entries_by_file: Dict[str, List[Dict]] = {}
+
+        # Scientific name -> [(file, entry)], names in order of first appearance
+        self.by_name: Dict[str, List[Tuple[str, Dict]]] = {}
+        # Lower-cased normalized name (no author, year or infraspecific rank) -> names
+        self.by_normalized: Dict[str, List[str]] = {}
+        self.by_family: Dict[str, Set[str]] = {}
+        self.by_order: Dict[str, Set[str]] = {}
+        self.by_class: Dict[str, Set[str]] = {}
+        # Law document (file name without extension) -> names
+        self.by_law: Dict[str, Set[str]] = {}
+
+        for json_file in self.files:
+            file_path = os.path.join(lib_dir, json_file)
+            if not os.path.exists(file_path):
+                self.missing_files.append(json_file)
+                continue
+
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except json.JSONDecodeError as e:
+                print(f"Error reading {json_file}: {e}")
+                continue
+
+            self.entries_by_file[json_file] = data
+            for entry in data:
+                self._add(json_file, entry)
+
+    def _add(self, json_file: str, entry: Dict) -> None:
+        sci_name = entry.get('scientific_name', {}).get('value', '').strip()
+        if not sci_name:
+            return
+
+        if sci_name not in self.by_name:
+            self.by_name[sci_name] = []
+            self.by_normalized.setdefault(normalize_scientific_name(sci_name).lower(), []).append(sci_name)
+        self.by_name[sci_name].append((json_file, entry))
+
+        for field, index in (('family_latin', self.by_family), ('order_latin', self.by_order),
+                             ('class_latin', self.by_class)):
+            value = entry.get(field, '')
+            if value and value.strip():
+                index.setdefault(_taxon_key(value), set()).add(sci_name)
+
+        self.by_law.setdefault(os.path.splitext(json_file)[0], set()).add(sci_name)
+
+    def __len__(self) -> int:
+        return len(self.by_name)
+
+    def __contains__(self, sci_name: str) -> bool:
+        return sci_name in self.by_name
+
+    def names(self) -> List[str]:
+        """Unique scientific names in order of first appearance."""
+        return list(self.by_name)
+
+    def entries(self, sci_name: str) -> List[Tuple[str, Dict]]:
+        """All (file, entry) pairs for a species, in file priority order."""
+        return self.by_name.get(sci_name, [])
+
+    def first_entry(self, sci_name: str) -> Optional[Dict]:
+        """The entry for a species from the highest priority file listing it."""
+        entries = self.entries(sci_name)
+        return entries[0][1] if entries else None
+
+    def file_names(self, json_file: str) -> List[str]:
+        """Scientific names listed in a file, with duplicates, in file order."""
+        names = []
+        for entry in self.entries_by_file.get(json_file, []):
+            sci_name = entry.get('scientific_name', {}).get('value', '').strip()
+            if sci_name:
+                names.append(sci_name)
+        return names
+
+    def lookup(self, name: str) -> List[str]:
+        """
+        Find species by scientific name, ignoring authors, years, rank and case.
+
+        Args:
+            name: Scientific name as written in any source
+
+        Returns:
+            Matching scientific names as listed in the corpus
+        """
+        if name.strip() in self.by_name:
+            return [name.strip()]
+        return list(self.by_normalized.get(normalize_scientific_name(name).lower(), []))
+
+    def family(self, family: str) -> Set[str]:
+        return self.by_family.get(_taxon_key(family), set())
+
+    def order(self, order: str) -> Set[str]:
+        return self.by_order.get(_taxon_key(order), set())
+
+    def taxon_class(self, taxon_class: str) -> Set[str]:
+        return self.by_class.get(_taxon_key(taxon_class), set())
+
+    def law(self, document: str) -> Set[str]:
+        """Species listed in a law document, e.g. "nd06_2019"."""
+        return self.by_law.get(os.path.splitext(document)[0], set())
+
+    def common_names(self) -> Dict[str, str]:
+        """First non-empty Vietnamese common name of every species, in file priority order."""
+        common_names = {}
+        for sci_name, entries in self.by_name.items():
+            for _, entry in entries:
+                common_name = entry.get('common_name', {}).get('value', '').strip()
+                if common_name:
+                    common_names[sci_name] = common_name
+                    break
+        return common_names
+
+
+# Corpora already loaded in this process, with the (mtime, size) of their files
+_loaded: Dict[Tuple[str, Tuple[str, ...]], Tuple[Tuple, SpeciesCorpus]] = {}
+
+
+def _file_signature(lib_dir: str, files: Iterable[str]) -> Tuple:
+    signature = []
+    for json_file in files:
+        try:
+            stat = os.stat(os.path.join(lib_dir, json_file))
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def _file_hashes(lib_dir: str, files: Iterable[str]) -> Tuple:
+    hashes = []
+    for json_file in files:
+        try:
+            with open(os.path.join(lib_dir, json_file), 'rb') as f:
+                hashes.append(hashlib.sha256(f.read()).hexdigest())
+        except OSError:
+            hashes.append(None)
+    return tuple(hashes)
+
+
+def snapshot_path(lib_dir: str, files: Iterable[str], snapshot_dir: str = DEFAULT_SNAPSHOT_DIR) -> str:
+    """Path of the snapshot for a lib directory and list of files."""
+    key = json.dumps([os.path.abspath(lib_dir), list(files)])
+    return os.path.join(snapshot_dir, hashlib.sha256(key.encode('utf-8')).hexdigest()[:16] + '.pickle')
+
+
+def _read_snapshot(path: str, lib_dir: str, files: Tuple[str, ...], signature: Tuple) -> Optional[SpeciesCorpus]:
+    """
+    Load a snapshot if it was built from the current source files.
+
+    Files whose mtime or size differ are compared by SHA-256, so touching a file
+    without changing it does not invalidate the snapshot.
+    """
+    try:
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+    if snapshot.get('version') != SNAPSHOT_VERSION or snapshot.get('files') != files:
+        return None
+    corpus = snapshot['corpus']
+    corpus.lib_dir = lib_dir
+    if snapshot['signature'] != signature:
+        if snapshot['hashes'] != _file_hashes(lib_dir, files):
+            return None
+        # Same content with a new mtime: record it to skip hashing next time
+        _write_snapshot(path, lib_dir, files, signature, corpus)
+    return corpus
+
+
+def _write_snapshot(path: str, lib_dir: str, files: Tuple[str, ...], signature: Tuple,
+                    corpus: SpeciesCorpus) -> None:
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'files': files,
+        'signature': signature,
+        'hashes': _file_hashes(lib_dir, files),
+        'corpus': corpus,
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so concurrent runs never read a partial snapshot
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: could not write corpus snapshot {path}: {e}")
+
+
+def load_corpus(lib_dir: str = DEFAULT_LIB_DIR, files: Optional[List[str]] = None,
+                snapshot_dir: Optional[str] = DEFAULT_SNAPSHOT_DIR) -> SpeciesCorpus:
+    """
+    Load (or reuse) the species corpus of a set of law data files.
+
+    A corpus is parsed once per process and reused until one of its files changes.
+    Across processes it is loaded from a snapshot in ``snapshot_dir`` when the
+    snapshot matches the current files.
+
+    Args:
+        lib_dir: Path to the lib directory containing JSON files
+        files: JSON file names to read, in priority order (default: the law documents)
+        snapshot_dir: Directory of corpus snapshots (None to always parse the JSON files)
+
+    Returns:
+        SpeciesCorpus of the files
+    """
+    files = tuple(files or DECREE_FILES)
+    key = (os.path.abspath(lib_dir), files)
+    signature = _file_signature(lib_dir, files)
+
+    loaded = _loaded.get(key)
+    if loaded is not None and loaded[0] == signature:
+        return loaded[1]
+
+    corpus = None
+    path = snapshot_path(lib_dir, files, snapshot_dir) if snapshot_dir else None
+    if path is not None:
+        corpus = _read_snapshot(path, lib_dir, files, signature)
+
+    if corpus is None:
+        corpus = SpeciesCorpus(lib_dir, list(files))
+        if path is not None:
+            _write_snapshot(path, lib_dir, files, signature, corpus)
+
+    _loaded[key] = (signature, corpus)
+    return corpus
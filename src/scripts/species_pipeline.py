@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Streaming pipeline from the category crawl to species details.
+
+The stages run concurrently and are connected by bounded queues:
+
+    crawl category pages → species URLs → fetch detail pages → parse → write JSON
+
+Detail pages are fetched as soon as the first species link is found, instead of
+after the whole links CSV has been written. At most ``window`` species are in
+flight between the crawl and the JSON writer, so memory use does not grow with the
+number of species. Records are written in link order, in the format of
+vnredlist_species_details.json produced by extract_species_details.ipynb.
+
+Parsing a species page is CPU-bound. With ``parse_workers`` the detail threads only
+fetch pages and hand the HTML to a pool of processes, so parsing scales across
+cores; the main process does the I/O and writes the results, which are the same
+as when parsing on the detail threads. ``--from-links`` reprocesses the pages of
+an existing links CSV (e.g. from the cache with ``--cache-only``) without crawling.
+
+Usage:
+    python species_pipeline.py [--crawl-workers N] [--detail-workers N] [--rate R]
+    python species_pipeline.py --from-links vnredlist_all_species_links.csv --cache-only --parse-workers 4
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import requests
+
+import crawl_animal_links
+from crawl_animal_links import TARGET_URLS, crawl_categories
+from fetch_metrics import add_metrics_arguments, configure_metrics_from_args, get_metrics
+from http_cache import (add_cache_arguments, cached_get, cached_parse, configure_cache_from_args, get_cache,
+                        store_parse, stored_parse)
+from http_session import add_session_arguments, configure_session_from_args
+from json_stream import JsonArrayWriter, add_output_arguments, output_indent
+from profiling import add_profile_arguments, configure_profiling_from_args
+from rate_limit import TokenBucket
+from vnredlist_parser import PARSER_VERSION, parse_species_page
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT_JSON = os.path.join(SCRIPT_DIR, 'vnredlist_species_details.json')
+DEFAULT_FAILED_FILE = os.path.join(SCRIPT_DIR, 'failed_species_urls.txt')
+
+HEADERS = crawl_animal_links.HEADERS
+
+DEFAULT_CRAWL_WORKERS = 4
+DEFAULT_DETAIL_WORKERS = 4
+DEFAULT_RATE = 4.0
+# Most species between the crawl and the JSON writer
+DEFAULT_WINDOW = 64
+# Processes parsing species pages (0 = parse on the detail threads)
+DEFAULT_PARSE_WORKERS = 0
+
+# Name of stored parse results for species pages
+DETAILS_PARSE_NAME = f'species_details:{PARSER_VERSION}'
+
+# Marks the end of a queue
+_DONE = object()
+
+
+def fetch_species_response(url: str):
+    """
+    Fetch a species page.
+
+    Args:
+        url: The species page URL
+
+    Returns:
+        The response, None if the page could not be fetched
+    """
+    try:
+        response = cached_get(url, headers=HEADERS, timeout=15, source='vnredlist',
+                              throttle=crawl_animal_links.request_limiter)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"✗ Error fetching {url}: {e}")
+        return None
+    return response
+
+
+def parse_species_details(content: bytes, url: str) -> Dict:
+    """Extract species details from page HTML (runs in parse worker processes)."""
+    return parse_species_page(content).species_details(url)
+
+
+def timed_parse_species_details(content: bytes, url: str) -> Tuple[Dict, float]:
+    """Extract species details in a parse worker process, with the seconds spent parsing."""
+    start = time.perf_counter()
+    details = parse_species_details(content, url)
+    return details, time.perf_counter() - start
+
+
+def fetch_species_details(url: str) -> Optional[Dict]:
+    """
+    Fetch a species page and extract its details.
+
+    Args:
+        url: The species page URL
+
+    Returns:
+        Dictionary with species information, None if the page could not be fetched
+    """
+    response = fetch_species_response(url)
+    if response is None:
+        return None
+    return cached_parse(response, DETAILS_PARSE_NAME, lambda: parse_species_details(response.content, url))
+
+
+def parse_pool_context():
+    """
+    Start method of the parse processes.
+
+    The pool starts its processes on the first submit, when the feed and detail
+    threads already hold locks and connections; a forked copy of this process could
+    inherit a held lock and hang. Processes are started from a fork server (or
+    spawned where there is none) instead.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def run_pipeline(target_urls: List[str], output_json: str, links_csv: Optional[str] = None,
+                 crawl_workers: int = DEFAULT_CRAWL_WORKERS, detail_workers: int = DEFAULT_DETAIL_WORKERS,
+                 rate: Optional[float] = DEFAULT_RATE, window: int = DEFAULT_WINDOW,
+                 indent: Optional[int] = 2, parse_workers: int = DEFAULT_PARSE_WORKERS) -> Dict:
+    """
+    Crawl the categories and write the details of every species found.
+
+    Args:
+        target_urls: Category URLs to crawl
+        output_json: Species details JSON file, written as records complete
+        links_csv: Species links CSV, also written during the crawl (optional)
+        crawl_workers: Concurrent category page requests
+        detail_workers: Concurrent species page requests
+        rate: Maximum requests per second, shared by all stages (None = unthrottled)
+        window: Most species in flight between the crawl and the writer
+        indent: JSON indentation, None for compact output
+        parse_workers: Processes parsing species pages (0 = parse on the detail threads)
+
+    Returns:
+        Dictionary with the number of links and records, failed URLs and category statistics
+    """
+    crawl_animal_links.request_limiter = (
+        TokenBucket(rate=rate, capacity=crawl_workers + detail_workers) if rate else None
+    )
+
+    def crawl(emit_links: Callable[[List[Dict[str, str]]], None]) -> List[Dict]:
+        _, category_stats = crawl_categories(
+            target_urls, workers=crawl_workers, rate=None, species_csv=links_csv, on_rows=emit_links)
+        return category_stats
+
+    return _run_detail_stages(crawl, output_json, detail_workers, window, indent, parse_workers)
+
+
+def extract_details(urls: List[str], output_json: str, detail_workers: int = DEFAULT_DETAIL_WORKERS,
+                    rate: Optional[float] = DEFAULT_RATE, window: int = DEFAULT_WINDOW,
+                    indent: Optional[int] = 2, parse_workers: int = DEFAULT_PARSE_WORKERS) -> Dict:
+    """
+    Write the details of a list of species pages, without crawling.
+
+    Args:
+        urls: Species page URLs, in output order
+        output_json: Species details JSON file
+        detail_workers: Concurrent species page requests
+        rate: Maximum requests per second (None = unthrottled)
+        window: Most species in flight between fetching and the writer
+        indent: JSON indentation, None for compact output
+        parse_workers: Processes parsing species pages (0 = parse on the detail threads)
+
+    Returns:
+        Dictionary with the number of links and records and the failed URLs
+    """
+    crawl_animal_links.request_limiter = TokenBucket(rate=rate, capacity=detail_workers) if rate else None
+
+    def feed(emit_links: Callable[[List[Dict[str, str]]], None]) -> List[Dict]:
+        emit_links([{'url': url} for url in urls])
+        return []
+
+    return _run_detail_stages(feed, output_json, detail_workers, window, indent, parse_workers)
+
+
+def _run_detail_stages(feed: Callable[[Callable[[List[Dict[str, str]]], None]], List[Dict]],
+                       output_json: str, detail_workers: int, window: int, indent: Optional[int],
+                       parse_workers: int) -> Dict:
+    """
+    Fetch, parse and write the species pages whose links a feed emits.
+
+    Args:
+        feed: Function that emits rows with a 'url' through the callback it is given,
+            and returns category statistics
+        output_json: Species details JSON file
+        detail_workers: Concurrent species page requests
+        window: Most species in flight between the feed and the writer
+        indent: JSON indentation, None for compact output
+        parse_workers: Processes parsing species pages (0 = parse on the detail threads)
+
+    Returns:
+        Dictionary with the number of links and records, failed URLs and category statistics
+    """
+    links: queue.Queue = queue.Queue(maxsize=window)
+    results: queue.Queue = queue.Queue(maxsize=window)
+    in_flight = threading.Semaphore(window)
+    seen_urls: Set[str] = set()
+    feed_result: Dict = {}
+    metrics = get_metrics()
+    parse_pool = (ProcessPoolExecutor(max_workers=parse_workers, mp_context=parse_pool_context())
+                  if parse_workers > 0 else None)
+
+    def emit_links(rows: List[Dict[str, str]]) -> None:
+        # Runs on the feed thread; blocks while the window is full
+        for row in rows:
+            if row['url'] in seen_urls:
+                continue
+            seen_urls.add(row['url'])
+            in_flight.acquire()
+            links.put((len(seen_urls) - 1, row['url']))
+
+    def run_feed() -> None:
+        try:
+            feed_result['category_stats'] = feed(emit_links)
+        except Exception as e:
+            feed_result['error'] = e
+        finally:
+            for _ in range(detail_workers):
+                links.put(_DONE)
+
+    def fetch_details() -> None:
+        while True:
+            item = links.get()
+            if item is _DONE:
+                results.put(_DONE)
+                return
+            seq, url = item
+            response = None
+            try:
+                if parse_pool is None:
+                    details = fetch_species_details(url)
+                else:
+                    # Only the I/O happens here; the HTML is parsed in a worker process
+                    response = fetch_species_response(url)
+                    details = None
+                    if response is not None:
+                        start = time.perf_counter()
+                        found, details = stored_parse(response, DETAILS_PARSE_NAME)
+                        if found and metrics is not None:
+                            metrics.record_parse(DETAILS_PARSE_NAME, time.perf_counter() - start, reused=True)
+                        if not found:
+                            details = parse_pool.submit(timed_parse_species_details, response.content, url)
+            except Exception as e:
+                print(f"  ✗ Error extracting data from {url}: {e}")
+                details = None
+            results.put((seq, url, details, response))
+
+    threads = [threading.Thread(target=run_feed, name='feed', daemon=True)]
+    threads += [threading.Thread(target=fetch_details, name=f'details-{i}', daemon=True)
+                for i in range(detail_workers)]
+    for thread in threads:
+        thread.start()
+
+    # Write records in link order; out-of-order results wait in a buffer bounded by the window
+    failed_urls: List[str] = []
+    pending: Dict[int, tuple] = {}
+    next_seq = 0
+    finished_workers = 0
+    try:
+        with JsonArrayWriter(output_json, indent=indent) as writer:
+            while finished_workers < detail_workers:
+                item = results.get()
+                if item is _DONE:
+                    finished_workers += 1
+                    continue
+
+                pending[item[0]] = item
+                while next_seq in pending:
+                    _, url, details, response = pending.pop(next_seq)
+                    if isinstance(details, Future):
+                        try:
+                            details, seconds = details.result()
+                            if metrics is not None:
+                                metrics.record_parse(DETAILS_PARSE_NAME, seconds, reused=False)
+                            store_parse(response, DETAILS_PARSE_NAME, details)
+                        except Exception as e:
+                            print(f"  ✗ Error extracting data from {url}: {e}")
+                            details = None
+                    if details is not None:
+                        writer.write(details)
+                    else:
+                        failed_urls.append(url)
+                    next_seq += 1
+                    in_flight.release()
+
+                    if next_seq % 10 == 0:
+                        print(f"  [{next_seq}] records processed ({writer.count} written)")
+
+            for thread in threads:
+                thread.join()
+            # A failed crawl leaves the previous output file in place
+            if 'error' in feed_result:
+                raise feed_result['error']
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown(cancel_futures=True)
+
+    return {
+        'links': len(seen_urls),
+        'records': writer.count,
+        'failed_urls': failed_urls,
+        'category_stats': feed_result.get('category_stats', []),
+    }
+
+
+def load_link_urls(csv_path: str) -> List[str]:
+    """Species page URLs of a links CSV written by crawl_animal_links.py, in file order."""
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        return [row['url'] for row in csv.DictReader(f) if row.get('url')]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Crawl Vietnam Red List categories and extract species details.")
+    parser.add_argument('--crawl-workers', type=int, default=DEFAULT_CRAWL_WORKERS,
+                        help=f"Concurrent category page requests (default: {DEFAULT_CRAWL_WORKERS})")
+    parser.add_argument('--detail-workers', type=int, default=DEFAULT_DETAIL_WORKERS,
+                        help=f"Concurrent species page requests (default: {DEFAULT_DETAIL_WORKERS})")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f"Maximum requests per second across all stages (default: {DEFAULT_RATE})")
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW,
+                        help=f"Most species in flight between crawl and output (default: {DEFAULT_WINDOW})")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_JSON,
+                        help=f"Species details JSON (default: {DEFAULT_OUTPUT_JSON})")
+    parser.add_argument('--links-output', default=crawl_animal_links.DEFAULT_SPECIES_CSV,
+                        help=f"Species links CSV (default: {crawl_animal_links.DEFAULT_SPECIES_CSV})")
+    parser.add_argument('--parse-workers', type=int, default=DEFAULT_PARSE_WORKERS,
+                        help="Processes parsing species pages (default: 0, parse on the detail threads)")
+    parser.add_argument('--from-links', metavar='CSV',
+                        help="Extract the species of an existing links CSV instead of crawling")
+    add_output_arguments(parser)
+    add_cache_arguments(parser)
+    add_metrics_arguments(parser)
+    add_profile_arguments(parser)
+    add_session_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main():
+    """Main entry point."""
+    args = parse_args()
+    configure_cache_from_args(args, 'vnredlist')
+    configure_metrics_from_args(args)
+    configure_profiling_from_args(args, args.output)
+    configure_session_from_args(args, pool_size=args.crawl_workers + args.detail_workers)
+
+    if args.from_links:
+        urls = load_link_urls(args.from_links)
+        print(f"Extracting species details for {len(urls)} links from {args.from_links}...")
+        print("=" * 80)
+        stats = extract_details(urls, args.output, detail_workers=args.detail_workers, rate=args.rate,
+                                window=args.window, indent=output_indent(args, 2),
+                                parse_workers=args.parse_workers)
+    else:
+        print(f"Crawling {len(TARGET_URLS)} categories and extracting species details...")
+        print("=" * 80)
+        stats = run_pipeline(TARGET_URLS, args.output, links_csv=args.links_output,
+                             crawl_workers=args.crawl_workers, detail_workers=args.detail_workers,
+                             rate=args.rate, window=args.window, indent=output_indent(args, 2),
+                             parse_workers=args.parse_workers)
+
+    if stats['failed_urls']:
+        with open(DEFAULT_FAILED_FILE, 'w') as f:
+            f.write('\n'.join(stats['failed_urls']))
+
+    print("\n" + "=" * 80)
+    print(f"✓ Processing complete!")
+    print(f"  Species links found: {stats['links']}")
+    print(f"  Successfully extracted: {stats['records']} species -> {args.output}")
+    print(f"  Failed: {len(stats['failed_urls'])} species")
+    if stats['failed_urls']:
+        print(f"  Failed URLs saved to: {DEFAULT_FAILED_FILE}")
+
+    cache = get_cache()
+    if cache is not None:
+        print(f"  Responses served from cache: {cache.stats['hits']}")
+        print(f"  Pages unchanged since last fetch (HTTP 304): {cache.stats['not_modified']}")
+
+
+if __name__ == '__main__':
+    main()
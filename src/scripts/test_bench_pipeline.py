@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the pipeline benchmark runner.
+"""
+
+import os
+import sys
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_pipeline
+from bench_pipeline import compare, run_benchmarks
+
+
+def test_every_benchmark_runs_offline(tmp_path, monkeypatch):
+    monkeypatch.setattr(bench_pipeline, 'WORK_DIR', str(tmp_path))
+    results = run_benchmarks(repeat=1)
+
+    assert set(results['benchmarks']) == set(bench_pipeline.BENCHMARKS)
+    for result in results['benchmarks'].values():
+        assert result['rounds'] == 1 and result['items'] > 0
+        assert 0 < result['best'] <= result['median']
+
+
+def test_compare_flags_slowdowns_beyond_threshold():
+    baseline = {'benchmarks': {'corpus': {'best': 0.010}, 'names': {'best': 0.010}, 'merge': {'best': 0.010}}}
+    results = {'benchmarks': {'corpus': {'best': 0.012}, 'names': {'best': 0.014}, 'images': {'best': 0.001}}}
+
+    comparison = {item['name']: item for item in compare(results, baseline, threshold=0.25)}
+    # New benchmarks have nothing to compare with
+    assert set(comparison) == {'corpus', 'names'}
+    assert not comparison['corpus']['regressed']
+    assert comparison['names']['regressed']
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the checkpoint journal used by fetch_iucn_status --resume.
+"""
+
+import os
+import sys
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from checkpoint import CheckpointJournal
+
+
+def test_resume_appends_and_ignores_partial_line(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = CheckpointJournal(path)
+    journal.open()
+    journal.append({'scientific_name': 'Elephas maximus', 'status': 'success'})
+    journal.close()
+
+    # Simulate a crash in the middle of writing the second record
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"scientific_name": "Panthera ti')
+
+    assert list(CheckpointJournal(path).load()) == ['Elephas maximus']
+
+    with CheckpointJournal(path) as resumed:
+        resumed.open(resume=True)
+        resumed.append({'scientific_name': 'Panthera tigris', 'status': 'not_found'})
+
+    assert list(CheckpointJournal(path).load()) == ['Elephas maximus', 'Panthera tigris']
+
+
+def test_fresh_run_truncates_journal(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    with CheckpointJournal(path) as journal:
+        journal.open()
+        journal.append({'scientific_name': 'Elephas maximus', 'status': 'success'})
+
+    with CheckpointJournal(path) as journal:
+        journal.open(resume=False)
+
+    assert CheckpointJournal(path).load() == {}
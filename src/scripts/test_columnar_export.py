@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar export of the law corpus.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from columnar_export import EXPORT_FILES, ColumnarCorpus, build_artifact, write_artifact
+from species_corpus import DEFAULT_LIB_DIR
+
+
+def law(vi, en, value, note=''):
+    return {'name': {'vi': vi, 'en': en}, 'value': value, 'note': note}
+
+
+def species(name, family, laws, **extra):
+    record = {
+        'scientific_name': {'value': name, 'note': ''},
+        'common_name': {'value': f'Loài {name}', 'note': ''},
+        'family_latin': family,
+        'laws': laws,
+    }
+    record.update(extra)
+    return record
+
+
+FILES = {
+    'a.json': [
+        species('Manis javanica', 'MANIDAE', [law('Nghị định 06', 'Decree 06', 'IB'), law('CITES', 'CITES', 'I')]),
+        species('Manis pentadactyla', 'MANIDAE', []),
+    ],
+    'b.json': [
+        {'common_name_en': {'value': 'Sunda pangolin', 'note': 'x'},
+         'scientific_name': {'value': 'Manis javanica', 'note': ''}, 'note': 'CR'},
+    ],
+}
+
+
+def test_round_trip_preserves_records_and_key_order(tmp_path):
+    path = tmp_path / 'corpus.json'
+    write_artifact(build_artifact(FILES), str(path))
+    corpus = ColumnarCorpus.load(str(path))
+
+    assert len(corpus) == 3
+    assert corpus.files == ['a.json', 'b.json']
+    for name, records in FILES.items():
+        decoded = list(corpus.records(name))
+        assert json.dumps(decoded, ensure_ascii=False) == json.dumps(records, ensure_ascii=False)
+
+    assert corpus.record(2) == FILES['b.json'][0]
+    assert [r['note'] if 'note' in r else None for r in corpus.find('Manis javanica')] == [None, 'CR']
+    assert corpus.column('family_latin')[:2] == ['MANIDAE', 'MANIDAE']
+
+
+def test_rejects_other_formats():
+    with pytest.raises(ValueError):
+        ColumnarCorpus({'format': 'something-else', 'version': 1})
+
+
+@pytest.mark.skipif(not all(os.path.exists(os.path.join(DEFAULT_LIB_DIR, f)) for f in EXPORT_FILES),
+                    reason="law data files not available")
+def test_lib_corpus_is_much_smaller(tmp_path):
+    files = {}
+    source_bytes = 0
+    for name in EXPORT_FILES:
+        path = os.path.join(DEFAULT_LIB_DIR, name)
+        source_bytes += os.path.getsize(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            files[name] = json.load(f)
+
+    size = write_artifact(build_artifact(files), str(tmp_path / 'corpus.json'))
+    corpus = ColumnarCorpus.load(str(tmp_path / 'corpus.json'))
+
+    assert source_bytes / size >= 5
+    assert {name: list(corpus.records(name)) for name in EXPORT_FILES} == files
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the concurrent category crawler.
+"""
+
+import os
+import random
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import crawl_animal_links
+from crawl_animal_links import crawl_categories
+
+# Pages per category; "lop-loi" fails on its first page
+CATEGORIES = {
+    'http://vnredlist.vast.vn/dong-vat/nganh-a/lop-thu/': 3,
+    'http://vnredlist.vast.vn/dong-vat/nganh-a/lop-loi/': 0,
+    'http://vnredlist.vast.vn/thuc-vat/nganh-b/lop-thong/': 1,
+    'http://vnredlist.vast.vn/thuc-vat/nganh-b/lop-tue/': 2,
+}
+
+
+def fake_page(url):
+    """Listing page with two species links and pagination links to every page."""
+    for category_url, total_pages in CATEGORIES.items():
+        if url.startswith(category_url):
+            break
+    if total_pages == 0:
+        return None
+
+    time.sleep(random.uniform(0, 0.02))
+    page_num = int(url.rstrip('/').rsplit('/', 1)[-1]) if '/page/' in url else 1
+    slug = category_url.rstrip('/').rsplit('/', 1)[-1]
+    html = ''.join(
+        f'<h2><a href="http://vnredlist.vast.vn/{slug}-{page_num}-{i}/">{slug} {page_num} {i}</a></h2><p>Tên {i}</p>'
+        for i in range(2)
+    )
+    html += ''.join(f'<a href="{category_url}page/{n}/">{n}</a>' for n in range(2, total_pages + 1))
+    return BeautifulSoup(html, 'html.parser')
+
+
+def test_concurrent_crawl_streams_rows_in_sequential_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(crawl_animal_links, 'fetch_page', fake_page)
+    urls = list(CATEGORIES)
+    output = tmp_path / 'links.csv'
+
+    rows, stats = crawl_categories(urls, workers=1, rate=None)
+    concurrent_rows, concurrent_stats = crawl_categories(urls, workers=8, rate=None, species_csv=str(output))
+
+    assert concurrent_rows == rows
+    assert concurrent_stats == stats
+    assert [row['scientific_name'] for row in rows[:3]] == ['lop-thu 1 0', 'lop-thu 1 1', 'lop-thu 2 0']
+    assert [(s['total_pages'], s['species_count'], s['status']) for s in stats] == [
+        (3, 6, 'Success'), (0, 0, 'Failed'), (1, 2, 'Success'), (2, 4, 'Success')]
+
+    lines = output.read_text(encoding='utf-8-sig').splitlines()
+    assert lines[0] == 'scientific_name,common_name_vi,url,category,category_url'
+    assert len(lines) == len(rows) + 1
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Offline tests for create_vnredlist_json: concurrent mode must write the same file as sequential mode.
+"""
+
+import os
+import random
+import sys
+import time
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fetch_vnredlist_status
+from rate_limit import TokenBucket
+
+
+STATUSES = ['CR', 'EN', 'VU', None]
+
+
+def make_species(count):
+    return [
+        {
+            'scientific_name': {'value': f"Genus{i} species{i}", 'note': ''},
+            'common_name': {'value': f"Loài {i}", 'note': ''},
+            'family_latin': 'Elephantidae',
+            'note': '',
+        }
+        for i in range(count)
+    ]
+
+
+def fake_fetch(scientific_name):
+    # Finish out of order to exercise result re-ordering
+    time.sleep(random.uniform(0, 0.01))
+    status = STATUSES[int(scientific_name.split()[0][5:]) % len(STATUSES)]
+    return status, f"http://vnredlist.test/{scientific_name.lower().replace(' ', '-')}/" if status else None
+
+
+def test_concurrent_output_matches_sequential(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_vnredlist_status, 'fetch_species_status', fake_fetch)
+    species_list = make_species(40)
+
+    serial_path = tmp_path / 'serial.json'
+    concurrent_path = tmp_path / 'concurrent.json'
+    fetch_vnredlist_status.create_vnredlist_json(species_list, str(serial_path), delay=0)
+    fetch_vnredlist_status.create_vnredlist_json(species_list, str(concurrent_path), delay=0,
+                                                 workers=8, rate=1000)
+
+    assert serial_path.read_bytes() == concurrent_path.read_bytes()
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    # First token is available immediately, the other 10 take ~0.2 s
+    assert time.monotonic() - start >= 0.18
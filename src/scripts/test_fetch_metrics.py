@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the fetch metrics and trace, against the local stand-in server.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fetch_metrics
+import fetch_vnredlist_status
+import http_cache
+import http_session
+from fetch_metrics import FetchMetrics, configure_metrics, percentile
+from http_cache import ResponseCache
+from http_session import create_session
+from mock_server import MockServer
+
+
+def test_percentile():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == pytest.approx(50.5)
+    assert percentile(values, 99) == pytest.approx(99.01)
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+def test_requests_and_parses_are_traced(tmp_path, monkeypatch):
+    trace = tmp_path / 'trace.jsonl'
+    metrics = FetchMetrics(str(trace))
+    monkeypatch.setattr(fetch_metrics, 'fetch_metrics', metrics)
+    monkeypatch.setattr(http_cache, 'response_cache', ResponseCache(str(tmp_path / 'cache.sqlite')))
+    monkeypatch.setattr(http_session, '_session', create_session(max_retries=2, backoff_factor=0))
+    monkeypatch.setattr(fetch_vnredlist_status, 'species_cache', {})
+
+    with MockServer(rate_limit=1) as server:
+        monkeypatch.setattr(fetch_vnredlist_status, 'BASE_URL', server.base_url)
+        # The second page is throttled once (HTTP 429) and retried after Retry-After
+        assert fetch_vnredlist_status.fetch_conservation_status('Elephas maximus') == 'CR'
+        assert fetch_vnredlist_status.fetch_conservation_status('Panthera tigris') == 'CR'
+        # Served from the response cache, with the stored parse result
+        fetch_vnredlist_status.species_cache.clear()
+        assert fetch_vnredlist_status.fetch_conservation_status('Elephas maximus') == 'CR'
+
+    summary = metrics.close()
+    events = [json.loads(line) for line in trace.read_text(encoding='utf-8').splitlines()]
+    requests = [event for event in events if event['event'] == 'request']
+    parses = [event for event in events if event['event'] == 'parse']
+
+    assert [event['origin'] for event in requests] == ['network', 'network', 'cache']
+    assert [event['retries'] for event in requests] == [0, 1, 0]
+    assert requests[0]['bytes'] == os.path.getsize(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'vnredlist_pages', 'elephas-maximus.html'))
+    assert [event['reused'] for event in parses] == [False, False, True]
+    assert events[-1]['event'] == 'summary'
+
+    assert summary['requests'] == 3 and summary['retries'] == 1
+    assert summary['cache_hit_ratio'] == pytest.approx(1 / 3)
+    assert summary['network_latency']['count'] == 2
+    assert summary['network_latency']['p99'] >= 1.0  # includes the wait for Retry-After
+    assert summary['parse_time']['count'] == 2 and summary['parses_reused'] == 1
+
+
+def test_disabled_by_default():
+    configure_metrics(None)
+    assert fetch_metrics.get_metrics() is None
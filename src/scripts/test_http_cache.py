@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the on-disk HTTP response cache.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import http_cache
+from http_cache import CacheMiss, ResponseCache, cached_get, cached_parse
+
+
+class FakeResponse:
+    def __init__(self, url, status_code=200, content=b'<html></html>', headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = {'Content-Type': 'text/html; charset=utf-8'}
+        self.headers.update(headers or {})
+
+
+class FakeSession:
+    """Answers 304 when the request carries the expected ETag, 200 otherwise."""
+
+    def __init__(self, etag):
+        self.etag = etag
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append(headers or {})
+        if (headers or {}).get('If-None-Match') == self.etag:
+            return FakeResponse(url, status_code=304, content=b'', headers={'ETag': self.etag})
+        return FakeResponse(url, content=b'<h1>new</h1>', headers={'ETag': self.etag})
+
+
+def test_put_and_get_roundtrip(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    url = 'http://vnredlist.vast.vn/elephas-maximus/'
+    cache.put(url, None, 'vnredlist', FakeResponse(url, content='Phân hạng'.encode('utf-8')))
+
+    cached = cache.get(url, None, 'vnredlist')
+    assert cached.status_code == 200
+    assert cached.text == 'Phân hạng'
+    assert cached.from_cache
+
+
+def test_params_are_part_of_key(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    url = 'https://api.iucnredlist.org/api/v4/taxa/scientific_name'
+    cache.put(url, {'genus_name': 'Elephas', 'species_name': 'maximus'}, 'iucn',
+              FakeResponse(url, content=b'{"assessments": []}'))
+
+    assert cache.get(url, {'species_name': 'maximus', 'genus_name': 'Elephas'}, 'iucn') is not None
+    assert cache.get(url, {'genus_name': 'Panthera', 'species_name': 'tigris'}, 'iucn') is None
+
+
+def test_expired_entries_are_misses_unless_offline(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    url = 'http://vnredlist.vast.vn/elephas-maximus/'
+    ResponseCache(path, ttls={'vnredlist': -1}).put(url, None, 'vnredlist', FakeResponse(url))
+
+    assert ResponseCache(path, ttls={'vnredlist': -1}).get(url, None, 'vnredlist') is None
+    assert ResponseCache(path, ttls={'vnredlist': -1}, offline=True).get(url, None, 'vnredlist') is not None
+
+
+def test_transient_errors_are_not_cached(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    url = 'http://vnredlist.vast.vn/elephas-maximus/'
+    cache.put(url, None, 'vnredlist', FakeResponse(url, status_code=503))
+
+    assert cache.get(url, None, 'vnredlist') is None
+
+
+def test_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'), max_bytes=250)
+    for name in ['a', 'b']:
+        cache.put(f'http://x/{name}/', None, 'vnredlist', FakeResponse(f'http://x/{name}/', content=b'x' * 100))
+    # Touch "a" so that "b" becomes the least recently used entry
+    cache.get('http://x/a/', None, 'vnredlist')
+    cache.put('http://x/c/', None, 'vnredlist', FakeResponse('http://x/c/', content=b'x' * 100))
+
+    assert cache.get('http://x/a/', None, 'vnredlist') is not None
+    assert cache.get('http://x/b/', None, 'vnredlist') is None
+    assert cache.get('http://x/c/', None, 'vnredlist') is not None
+
+
+def test_cache_only_mode_never_uses_network(tmp_path, monkeypatch):
+    def no_network():
+        raise AssertionError("network used in cache-only mode")
+
+    monkeypatch.setattr(http_cache, 'get_session', no_network)
+    monkeypatch.setattr(http_cache, 'response_cache',
+                        ResponseCache(str(tmp_path / 'cache.sqlite'), offline=True))
+
+    with pytest.raises(CacheMiss):
+        cached_get('http://vnredlist.vast.vn/elephas-maximus/', source='vnredlist')
+
+
+def test_stale_entry_is_revalidated_with_conditional_get(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cache.sqlite')
+    url = 'http://vnredlist.vast.vn/elephas-maximus/'
+    ResponseCache(path).put(url, None, 'vnredlist',
+                            FakeResponse(url, content=b'<h1>old</h1>', headers={'ETag': '"v1"'}))
+
+    cache = ResponseCache(path, ttls={'vnredlist': -1})
+    session = FakeSession('"v1"')
+    monkeypatch.setattr(http_cache, 'get_session', lambda: session)
+    monkeypatch.setattr(http_cache, 'response_cache', cache)
+
+    response = cached_get(url, source='vnredlist')
+    assert session.requests[0]['If-None-Match'] == '"v1"'
+    assert response.status_code == 200
+    assert response.content == b'<h1>old</h1>'
+    assert response.not_modified
+    assert cache.stats['not_modified'] == 1
+
+
+def test_parse_result_reused_until_body_changes(tmp_path, monkeypatch):
+    url = 'http://vnredlist.vast.vn/elephas-maximus/'
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'), ttls={'vnredlist': -1})
+    cache.put(url, None, 'vnredlist', FakeResponse(url, headers={'ETag': '"v1"'}))
+    monkeypatch.setattr(http_cache, 'response_cache', cache)
+    calls = []
+
+    def parse():
+        calls.append(1)
+        return len(calls)
+
+    monkeypatch.setattr(http_cache, 'get_session', lambda: FakeSession('"v1"'))
+    assert cached_parse(cached_get(url, source='vnredlist'), 'status', parse) == 1
+    assert cached_parse(cached_get(url, source='vnredlist'), 'status', parse) == 1
+
+    # A changed page replaces the body and drops the stored parse result
+    monkeypatch.setattr(http_cache, 'get_session', lambda: FakeSession('"v2"'))
+    assert cached_parse(cached_get(url, source='vnredlist'), 'status', parse) == 2
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the image check stage, against a local HTTP server.
+"""
+
+import csv
+import os
+import struct
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import image_pipeline
+from image_pipeline import image_dimensions, run_image_stage
+from images_csv_to_json import csv_to_json
+
+
+def png(width, height):
+    return b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + struct.pack('>II', width, height) + b'\0' * 40
+
+
+def jpeg(width, height, exif_bytes=0):
+    exif = b'\xff\xe1' + struct.pack('>H', exif_bytes + 2) + b'\0' * exif_bytes
+    sof = b'\xff\xc0' + struct.pack('>HBHHB', 17, 8, height, width, 3) + b'\0' * 9
+    return b'\xff\xd8' + exif + sof + b'\xff\xda' + b'\0' * 100 + b'\xff\xd9'
+
+
+def test_image_dimensions():
+    assert image_dimensions(png(640, 480)) == (640, 480)
+    assert image_dimensions(jpeg(500, 375, exif_bytes=1000)) == (500, 375)
+    assert image_dimensions(b'GIF89a' + struct.pack('<HH', 32, 16)) == (32, 16)
+    webp = b'RIFF' + b'\0' * 4 + b'WEBPVP8X' + b'\0' * 8 + (799).to_bytes(3, 'little') + (599).to_bytes(3, 'little')
+    assert image_dimensions(webp) == (800, 600)
+    # Frame header not in the prefix yet
+    assert image_dimensions(jpeg(500, 375, exif_bytes=1000)[:500]) is None
+    assert image_dimensions(b'<html>Not found</html>') is None
+
+
+IMAGES = {
+    '/a/medium.png': png(640, 480),
+    '/b/medium.jpg': jpeg(500, 375, exif_bytes=3000),
+    '/c/medium.html': b'<html>moved</html>',
+}
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self, body_allowed):
+        ImageHandler.requests.append((self.command, self.path, self.headers.get('Range')))
+        content = IMAGES.get(self.path)
+        if content is None:
+            self.send_error(404)
+            return
+        start, end = 0, len(content) - 1
+        status = 200
+        if self.headers.get('Range'):
+            first, last = self.headers['Range'].split('=')[1].split('-')
+            start, end = int(first), min(int(last), end)
+            status = 206
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html' if self.path.endswith('.html') else 'image/jpeg')
+        self.send_header('Content-Length', str(end - start + 1))
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(content)}')
+        self.end_headers()
+        if body_allowed:
+            self.wfile.write(content[start:end + 1])
+
+    def do_HEAD(self):
+        self._respond(False)
+
+    def do_GET(self):
+        self._respond(True)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), ImageHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    ImageHandler.requests = []
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_stage_probes_once_and_reports_broken_links(server, tmp_path, monkeypatch):
+    # Small probe, so the JPEG frame header is past it
+    monkeypatch.setattr(image_pipeline, 'PROBE_BYTES', 1024)
+    urls = [f'{server}{path}' for path in IMAGES] + [f'{server}/missing/medium.jpg']
+    state = str(tmp_path / 'state.json')
+
+    results = run_image_stage(urls + urls[:1], state_path=state, workers=3)
+
+    png_url, jpeg_url, html_url, missing_url = urls
+    assert (results[png_url]['width'], results[png_url]['height']) == (640, 480)
+    assert results[png_url]['bytes'] == len(IMAGES['/a/medium.png'])
+    assert (results[jpeg_url]['width'], results[jpeg_url]['height']) == (500, 375)
+    assert results[jpeg_url]['bytes'] == len(IMAGES['/b/medium.jpg'])
+    assert results[html_url]['status'] == image_pipeline.STATUS_NOT_IMAGE
+    assert results[missing_url]['status'] == image_pipeline.STATUS_DEAD
+    assert image_pipeline.broken_images(results) == [html_url, missing_url]
+    # The PNG needed only its first 1 KB
+    assert ('GET', '/a/medium.png', 'bytes=0-1023') in ImageHandler.requests
+
+    # Second run: only the broken links are checked again
+    ImageHandler.requests = []
+    run_image_stage(urls, state_path=state, workers=3)
+    assert {path for _, path, _ in ImageHandler.requests} == {'/c/medium.html', '/missing/medium.jpg'}
+
+
+def test_csv_to_json_adds_image_fields(server, tmp_path):
+    csv_path = tmp_path / 'images.csv'
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Tên khoa học', 'URL ảnh', 'Tác giả', 'Nguồn'])
+        writer.writerow(['Tyto alba', f'{server}/a/medium.png', '(c) A', 'https://example.org/1'])
+        writer.writerow(['Tyto alba', f'{server}/missing/medium.jpg', '(c) B', 'https://example.org/2'])
+
+    results = run_image_stage(image_pipeline.read_image_urls(str(csv_path)), state_path=str(tmp_path / 's.json'))
+    data = csv_to_json(str(csv_path), str(tmp_path / 'images.json'), image_info=results)
+    assert data['Tyto alba'][0]['width'] == 640
+    assert 'width' not in data['Tyto alba'][1]
+
+    data = csv_to_json(str(csv_path), str(tmp_path / 'images.json'), image_info=results, drop_broken=True)
+    assert [image['attribute'] for image in data['Tyto alba']] == ['(c) A']
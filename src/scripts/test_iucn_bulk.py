@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the IUCN lookups against a local stand-in server that replays
+recorded API v4 responses from fixtures/iucn_api/responses.json.
+"""
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fetch_iucn_status
+import http_cache
+from rate_limit import TokenBucket
+
+RESPONSES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'iucn_api', 'responses.json')
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Answers each request with the recorded response for its path and query."""
+
+    responses = {}
+    requests = []
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        key = (url.path, tuple(sorted(parse_qsl(url.query))))
+        self.requests.append(key)
+
+        recorded = self.responses.get(key, {'status': 404, 'headers': {}, 'body': {'error': 'Not recorded'}})
+        body = json.dumps(recorded['body']).encode('utf-8')
+        self.send_response(recorded['status'])
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in recorded['headers'].items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def iucn_server(monkeypatch):
+    with open(RESPONSES_PATH, 'r', encoding='utf-8') as f:
+        ReplayHandler.responses = {
+            (item['path'], tuple(sorted(item['params'].items()))): item for item in json.load(f)
+        }
+    ReplayHandler.requests = []
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ReplayHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(fetch_iucn_status, 'IUCN_API_BASE_URL', f"http://127.0.0.1:{server.server_port}/api/v4")
+    monkeypatch.setattr(fetch_iucn_status, 'request_limiter', TokenBucket(rate=1000.0))
+    monkeypatch.setattr(http_cache, 'response_cache', None)
+    yield ReplayHandler.requests
+
+    server.shutdown()
+    server.server_close()
+
+
+def previous_entry(sci_name, family):
+    return {
+        'scientific_name': {'value': sci_name, 'note': ''},
+        'common_name_en': {'value': f'{sci_name} (English)', 'note': ''},
+        'kingdom_latin': 'ANIMALIA',
+        'class_latin': 'MAMMALIA',
+        'family_latin': family,
+    }
+
+
+def test_bulk_resolves_a_family_with_paged_listing(iucn_server):
+    existing = {name: previous_entry(name, 'FELIDAE')
+                for name in ['Panthera tigris', 'Panthera pardus', 'Neofelis nebulosa']}
+    existing['Elephas maximus'] = previous_entry('Elephas maximus', 'ELEPHANTIDAE')
+
+    resolved = fetch_iucn_status.resolve_in_bulk(sorted(existing), existing, min_group=3)
+
+    # Both pages of Felidae were listed; Elephantidae (one species) and the species
+    # missing from the listing are left to per-species lookups
+    assert [path for path, _ in iucn_server] == ['/api/v4/taxa/family/Felidae'] * 2
+    assert sorted(resolved) == ['Panthera pardus', 'Panthera tigris']
+
+    tiger = resolved['Panthera tigris']
+    assert tiger['category'] == 'EN'
+    assert tiger['assessment_id'] == 214862019  # global assessment preferred over regional
+    assert tiger['scope'] == 'Global'
+    assert tiger['common_name'] == 'Panthera tigris (English)'
+
+    entry = fetch_iucn_status.format_iucn_entry(tiger)
+    assert entry['family_latin'] == 'FELIDAE'
+    assert entry['laws'][0]['note'] == 'https://www.iucnredlist.org/species/15955/214862019'
+
+
+def test_per_species_lookup(iucn_server):
+    elephant = fetch_iucn_status.get_iucn_status('Elephas maximus')
+    assert elephant['status'] == 'success'
+    assert elephant['year_published'] == '2020'
+    assert elephant['common_name'] == 'Asian Elephant'
+
+    assert fetch_iucn_status.get_iucn_status('Nomen nudum')['status'] == 'not_found'
+
+
+def test_single_lookup_selects_like_bulk_mode(monkeypatch):
+    assessments = [
+        {'assessment_id': 1, 'latest': True, 'red_list_category_code': 'EN',
+         'scopes': [{'code': '2', 'description': {'en': 'Europe'}}]},
+        {'assessment_id': 2, 'latest': True, 'red_list_category_code': 'VU',
+         'scopes': [{'code': '1', 'description': {'en': 'Global'}}]},
+    ]
+
+    class Response:
+        status_code = 200
+
+        def json(self):
+            return {'taxon': {'common_names': []}, 'assessments': assessments}
+
+    monkeypatch.setattr(fetch_iucn_status, 'cached_get', lambda *args, **kwargs: Response())
+    result = fetch_iucn_status.get_iucn_status('Ursus arctos')
+    assert fetch_iucn_status.select_assessment(assessments)['assessment_id'] == 2
+    assert (result['assessment_id'], result['category'], result['scope']) == (2, 'VU', 'Global')
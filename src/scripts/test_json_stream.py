@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the incremental JSON array writer.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from json_stream import JsonArrayWriter, iter_json_array, write_json_array
+
+RECORDS = [
+    {'scientific_name': {'value': 'Panthera tigris', 'note': ''}, 'common_name': {'value': 'Hổ', 'note': ''},
+     'laws': [{'name': {'vi': 'IUCN', 'en': 'IUCN'}, 'value': 'EN', 'note': ''}]},
+    {'scientific_name': {'value': 'Elephas maximus', 'note': ''}, 'laws': [], 'note': ''},
+]
+
+
+@pytest.mark.parametrize('records', [[], RECORDS[:1], RECORDS])
+@pytest.mark.parametrize('indent', [2, 4])
+def test_pretty_output_is_identical_to_json_dump(tmp_path, records, indent):
+    path = tmp_path / 'out.json'
+    write_json_array(str(path), records, indent=indent)
+    assert path.read_text(encoding='utf-8') == json.dumps(records, ensure_ascii=False, indent=indent)
+
+
+def test_compact_output(tmp_path):
+    path = tmp_path / 'out.json'
+    write_json_array(str(path), RECORDS, indent=None)
+    text = path.read_text(encoding='utf-8')
+    assert json.loads(text) == RECORDS
+    assert '\n' not in text and ', ' not in text
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    path = tmp_path / 'out.json'
+    path.write_text('[]', encoding='utf-8')
+
+    with pytest.raises(RuntimeError):
+        with JsonArrayWriter(str(path)) as writer:
+            writer.write(RECORDS[0])
+            raise RuntimeError("interrupted")
+
+    assert path.read_text(encoding='utf-8') == '[]'
+    assert os.listdir(str(tmp_path)) == ['out.json']
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 1 << 16])
+@pytest.mark.parametrize('indent', [None, 2])
+def test_iter_json_array_reads_elements_across_chunks(tmp_path, chunk_size, indent):
+    path = tmp_path / 'out.json'
+    write_json_array(str(path), RECORDS * 3, indent=indent)
+    assert list(iter_json_array(str(path), chunk_size=chunk_size)) == RECORDS * 3
+
+
+@pytest.mark.parametrize('text', ['{}', '[{"a": 1}', '[{"a": 1},]', '[{"a": 1} {"b": 2}]'])
+def test_iter_json_array_rejects_malformed_files(tmp_path, text):
+    path = tmp_path / 'bad.json'
+    path.write_text(text, encoding='utf-8')
+    with pytest.raises(ValueError):
+        list(iter_json_array(str(path)))
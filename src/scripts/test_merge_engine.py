@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the cross-source merge engine.
+"""
+
+import os
+import sys
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from merge_engine import SourceTable, describe_change, merge_tables
+
+
+def law(name, value):
+    return {'name': {'vi': name, 'en': name}, 'value': value, 'note': ''}
+
+
+def entry(sci_name, common_name, laws, **extra):
+    record = {'scientific_name': {'value': sci_name, 'note': ''}, 'common_name': {'value': common_name, 'note': ''}}
+    record.update(extra)
+    record['laws'] = laws
+    return record
+
+
+def tables():
+    return [
+        SourceTable('nd06_2019.json', [
+            entry('Manis javanica', 'Tê tê', [law('Nhóm', 'IIB')], family_latin='MANIDAE'),
+            entry('Panthera tigris', 'Hổ', [law('Nhóm', 'IB')]),
+            entry('Sus scrofa', 'Lợn rừng', [law('Nhóm', 'IIB')]),
+        ]),
+        SourceTable('tt27_2025.json', [
+            entry('Manis javanica Desmarest, 1822', 'Tê tê java',
+                  [law('Loài thực vật rừng, động vật rừng nguy cấp, quý, hiếm', 'IB')]),
+            entry('Sus scrofa', 'Lợn Ỉ', [law('Loài thực vật rừng, động vật rừng nguy cấp, quý, hiếm', '')]),
+        ]),
+        SourceTable('iucn_status.json', [
+            entry('Manis javanica', 'Tê tê', [law('IUCN', 'CR')],
+                  common_name_en={'value': 'Sunda Pangolin', 'note': ''}),
+        ]),
+    ]
+
+
+def test_most_recent_document_wins():
+    merged, _ = merge_tables(tables())
+    by_name = {(r['scientific_name']['value'], r['common_name']['value']): r for r in merged}
+
+    manis = by_name[('Manis javanica Desmarest, 1822', 'Tê tê java')]
+    assert manis['documents'] == ['nd06_2019', 'tt27_2025', 'iucn_status']
+    # Missing fields come from older sources
+    assert manis['family_latin'] == 'MANIDAE'
+    assert manis['common_name_en']['value'] == 'Sunda Pangolin'
+    # Same category in two documents: the 2025 listing replaces the 2019 one
+    assert [(l['name']['vi'][:4], l['value']) for l in manis['laws']] == [('Loài', 'IB'), ('IUCN', 'CR')]
+    assert list(manis)[-2:] == ['laws', 'documents']
+
+    # Domestic species varieties stay separate
+    assert ('Sus scrofa', 'Lợn rừng') in by_name and ('Sus scrofa', 'Lợn Ỉ') in by_name
+    assert [r['scientific_name']['value'] for r in merged] == sorted(r['scientific_name']['value'] for r in merged)
+
+
+def test_changes_between_documents():
+    _, changes = merge_tables(tables())
+
+    assert [describe_change(c) for c in changes] == [
+        'Manis javanica Desmarest, 1822: Nhóm IIB → IB (nd06_2019 → tt27_2025)',
+        'Panthera tigris: Nhóm IB → not listed (nd06_2019 → tt27_2025)',
+        'Sus scrofa: Nhóm IIB → not listed (nd06_2019 → tt27_2025)',
+    ]
+    assert [c['change'] for c in changes] == ['changed', 'removed', 'removed']
+
+
+def test_merge_is_reproducible():
+    assert merge_tables(tables()) == merge_tables(tables())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the local stand-in server and the fetchers' base-URL overrides.
+"""
+
+import os
+import sys
+
+import pytest
+import requests
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import crawl_animal_links
+import fetch_iucn_status
+import fetch_vnredlist_status
+import http_cache
+import http_session
+from http_session import create_session
+from mock_server import MockServer, run_load_test, synthetic_category
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    monkeypatch.setattr(http_cache, 'response_cache', None)
+    monkeypatch.setattr(http_session, '_session', create_session(max_retries=0))
+    monkeypatch.setattr(fetch_vnredlist_status, 'species_cache', {})
+    monkeypatch.setattr(fetch_vnredlist_status, 'fetch_errors', set())
+    monkeypatch.setattr(fetch_iucn_status, 'request_limiter', None)
+
+
+def test_fetchers_use_recorded_and_synthesized_responses(offline, monkeypatch):
+    with MockServer(synthesize=True) as server:
+        monkeypatch.setattr(fetch_vnredlist_status, 'BASE_URL', server.base_url)
+        monkeypatch.setattr(fetch_iucn_status, 'IUCN_API_BASE_URL', server.iucn_base_url)
+
+        assert fetch_vnredlist_status.fetch_conservation_status('Elephas maximus') == 'CR'
+        assert fetch_vnredlist_status.fetch_conservation_status('Panthera tigris x3') == \
+            synthetic_category('Panthera tigris x3')
+
+        elephant = fetch_iucn_status.get_iucn_status('Elephas maximus')
+        assert (elephant['status'], elephant['common_name']) == ('success', 'Asian Elephant')
+        synthetic = fetch_iucn_status.get_iucn_status('Panthera tigris x3')
+        assert synthetic['category'] == synthetic_category('Panthera tigris x3')
+        assert server.snapshot() == {'requests': 4, '200': 4}
+
+
+def test_matched_name_fallback_stays_on_the_server(offline, monkeypatch):
+    requested = []
+
+    def recording_get(url, **kwargs):
+        requested.append(url)
+        return http_cache.cached_get(url, **kwargs)
+
+    monkeypatch.setattr(fetch_vnredlist_status, 'cached_get', recording_get)
+    monkeypatch.setattr(fetch_vnredlist_status, 'species_links_matcher', None)
+    with MockServer() as server:
+        monkeypatch.setattr(fetch_vnredlist_status, 'BASE_URL', server.base_url)
+        # No page at this spelling's slug; the crawled links (on vnredlist.vast.vn) list "Pseudoryx nghetinhensis"
+        status, page_url = fetch_vnredlist_status.fetch_species_status('Pseudoryx nghetinhense')
+
+    assert page_url == f'{server.base_url}/pseudoryx-nghetinhensis/' and status
+    assert len(requested) == 3
+    assert all(url.startswith(f'{server.base_url}/') for url in requested)
+    assert server.snapshot()['requests'] == 3
+
+def test_crawler_lists_the_recorded_species(offline, monkeypatch):
+    with MockServer() as server:
+        monkeypatch.setattr(crawl_animal_links, 'BASE_URL', server.base_url)
+        urls = [f"{server.base_url}{path}" for path in crawl_animal_links.CATEGORY_PATHS[:2]]
+        rows, stats = crawl_animal_links.crawl_categories(urls, workers=2, rate=None)
+
+    species = [f"{server.base_url}{path}" for path in sorted(server.pages)]
+    assert [row['url'] for row in rows] == species * 2
+    assert [(s['total_pages'], s['species_count'], s['status']) for s in stats] == [(3, 7, 'Success')] * 2
+
+
+def test_errors_and_throttling(offline, monkeypatch):
+    with MockServer(error_rate=1.0) as server:
+        monkeypatch.setattr(fetch_vnredlist_status, 'BASE_URL', server.base_url)
+        assert fetch_vnredlist_status.fetch_conservation_status('Elephas maximus') is None
+        assert fetch_vnredlist_status.fetch_errors == {'Elephas maximus'}
+
+    with MockServer(rate_limit=1) as server:
+        url = f'{server.base_url}/elephas-maximus/'
+        assert requests.get(url).status_code == 200
+        throttled = requests.get(url)
+        assert throttled.status_code == 429 and throttled.headers['Retry-After'] == '1'
+
+        # The shared session's retry policy waits for Retry-After and succeeds
+        session = create_session(max_retries=2, backoff_factor=0)
+        assert session.get(url).status_code == 200
+        assert server.snapshot()['429'] == 2
+
+
+def test_load_test_fetches_every_species(offline):
+    names = [f'Genus species{i}' for i in range(30)] + ['Elephas maximus']
+    with MockServer(synthesize=True) as server:
+        result = run_load_test(server, 'vnredlist', names, workers=4, rate=None)
+    assert result['species'] == 31
+    assert result['outcomes'] == {'found': 31, 'errors': 0, 'not_found': 0}
+    assert result['server']['requests'] == 31
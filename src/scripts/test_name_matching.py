@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for fuzzy name matching across sources.
+"""
+
+import os
+import sys
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fetch_vnredlist_status
+from name_matching import NameMatch, NameMatcher, levenshtein, reconcile, spelling_variant
+
+
+def test_levenshtein():
+    assert levenshtein('pinosida', 'pinopsida') == 1
+    assert levenshtein('kitten', 'sitting') == 3
+    assert levenshtein('kitten', 'sitting', max_distance=1) == 2
+    assert levenshtein('', 'abc') == 3
+
+
+def test_match_steps():
+    matcher = NameMatcher(['Panthera tigris', 'Manis javanica', 'Rheinartia ocellata', 'PINOPSIDA'])
+
+    assert matcher.match('Manis javanica') == NameMatch('Manis javanica', 'exact', 0)
+    assert matcher.match('manis javanica Desmarest, 1822') == NameMatch('Manis javanica', 'normalized', 0)
+    assert matcher.match('Panthera tigris corbetti') == NameMatch('Panthera tigris', 'binomial', 0)
+    assert matcher.match('Rheinardia ocellata') == NameMatch('Rheinartia ocellata', 'fuzzy', 1)
+    assert matcher.match('PINOSIDA') == NameMatch('PINOPSIDA', 'fuzzy', 1)
+    assert matcher.match('Anoectochilus acalcaratus') is None
+
+
+def test_taxonomy_breaks_ties():
+    names = ['Cyclemys oldhami', 'Cyclemys oldhamo']
+    taxonomy = {'Cyclemys oldhami': {'family': 'GEOEMYDIDAE'}, 'Cyclemys oldhamo': {'family': 'TESTUDINIDAE'}}
+
+    # Equally close and no taxonomy to tell them apart: ambiguous
+    assert NameMatcher(names).match('Cyclemys oldhamu') is None
+    matcher = NameMatcher(names, taxonomy)
+    assert matcher.match('Cyclemys oldhamu', {'family': 'TESTUDINIDAE'}).name == 'Cyclemys oldhamo'
+
+    matches = reconcile(['Cyclemys oldhamii', 'Unknown species'], matcher)
+    assert matches == {'Cyclemys oldhamii': NameMatch('Cyclemys oldhami', 'fuzzy', 1), 'Unknown species': None}
+
+
+def test_fuzzy_matches_limited_to_spelling_variants():
+    assert spelling_variant('Cyclemys oldhamii', 'Cyclemys oldhami')
+    assert spelling_variant('Rhacophorus nigropalmatus', 'Rhacophorus nigropalmata')
+    assert not spelling_variant('Paphiopedilum villosum', 'Paphiopedilum callosum')
+    assert not spelling_variant('Rheinardia ocellata', 'Rheinartia ocellata')
+    assert spelling_variant('Rheinardia ocellata', 'Rheinartia ocellata', genus_edits=1)
+
+    matcher = NameMatcher(['Paphiopedilum callosum', 'Cyclemys oldhami'])
+    assert matcher.match('Paphiopedilum villosum') == NameMatch('Paphiopedilum callosum', 'fuzzy', 2)
+    assert matcher.match('Paphiopedilum villosum', accept=spelling_variant) is None
+    assert matcher.match('Cyclemys oldhamii', accept=spelling_variant) == NameMatch('Cyclemys oldhami', 'fuzzy', 1)
+
+
+def test_species_page_found_by_name_variant(tmp_path, monkeypatch):
+    csv_path = tmp_path / 'links.csv'
+    csv_path.write_text('﻿scientific_name,common_name_vi,url,category,category_url\n'
+                        'Rheinartia ocellata,Trĩ sao,http://vnredlist.vast.vn/rheinartia-ocellata/,c,u\n',
+                        encoding='utf-8')
+    monkeypatch.setattr(fetch_vnredlist_status, 'SPECIES_LINKS_CSV', str(csv_path))
+    monkeypatch.setattr(fetch_vnredlist_status, 'species_links_matcher', None)
+
+    assert fetch_vnredlist_status.find_species_page('Rheinardia ocellata') == \
+        'http://vnredlist.vast.vn/rheinartia-ocellata/'
+    assert fetch_vnredlist_status.find_species_page('Panthera tigris') is None
+
+
+def test_species_page_not_taken_from_another_species_of_the_genus(tmp_path, monkeypatch):
+    csv_path = tmp_path / 'links.csv'
+    csv_path.write_text('scientific_name,common_name_vi,url,category,category_url\n'
+                        'Paphiopedilum callosum,Lan hài,http://vnredlist.vast.vn/paphiopedilum-callosum/,c,u\n',
+                        encoding='utf-8')
+    monkeypatch.setattr(fetch_vnredlist_status, 'SPECIES_LINKS_CSV', str(csv_path))
+    monkeypatch.setattr(fetch_vnredlist_status, 'species_links_matcher', None)
+
+    # Two edits apart, within the fuzzy distance of names this long, but another species
+    assert fetch_vnredlist_status.find_species_page('Paphiopedilum villosum') is None
+    assert fetch_vnredlist_status.find_species_page('Paphiopedilum callosa') == \
+        'http://vnredlist.vast.vn/paphiopedilum-callosum/'
+
+
+def test_entry_links_to_page_the_status_came_from(tmp_path, monkeypatch):
+    from mock_server import MockServer
+
+    monkeypatch.setattr(fetch_vnredlist_status, 'species_cache', {})
+    monkeypatch.setattr(fetch_vnredlist_status, 'species_links_matcher', None)
+    with MockServer() as server:
+        monkeypatch.setattr(fetch_vnredlist_status, 'BASE_URL', server.base_url)
+        csv_path = tmp_path / 'links.csv'
+        csv_path.write_text('scientific_name,common_name_vi,url,category,category_url\n'
+                            f'Elephas maximus,Voi,{server.base_url}/elephas-maximus/,c,u\n', encoding='utf-8')
+        monkeypatch.setattr(fetch_vnredlist_status, 'SPECIES_LINKS_CSV', str(csv_path))
+
+        # No page at the slug of this spelling; the status comes from the crawled link
+        status, page_url = fetch_vnredlist_status.fetch_species_status('Elephas maximum')
+
+    assert (status, page_url) == ('CR', f'{server.base_url}/elephas-maximus/')
+    species = {'scientific_name': {'value': 'Elephas maximum', 'note': ''}}
+    entry = fetch_vnredlist_status.build_vnredlist_entry(species, status, page_url)
+    assert entry['laws'][0]['note'] == f'{server.base_url}/elephas-maximus/'
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the raw page archive and replay mode.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import http_cache
+from http_cache import CacheMiss, cached_get, configure_archive
+from page_archive import PageArchive, replay_vnredlist
+from vnredlist_parser import parse_species_page
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'vnredlist_pages')
+
+
+class FakeResponse:
+    def __init__(self, url, content):
+        self.url = url
+        self.status_code = 200
+        self.content = content
+        self.headers = {'Content-Type': 'text/html; charset=utf-8'}
+
+
+class FixtureSession:
+    def __init__(self):
+        self.requests = 0
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests += 1
+        name = url.rstrip('/').rsplit('/', 1)[-1]
+        with open(os.path.join(FIXTURES, f'{name}.html'), 'rb') as f:
+            return FakeResponse(url, f.read())
+
+
+def test_append_deduplicates_and_survives_reopen(tmp_path):
+    path = str(tmp_path / 'pages.archive')
+    archive = PageArchive(path)
+    assert archive.append('k1', 'http://a/', 'vnredlist', 200, {}, b'one')
+    assert not archive.append('k1', 'http://a/', 'vnredlist', 200, {}, b'one')
+    assert archive.append('k1', 'http://a/', 'vnredlist', 200, {}, b'two')
+    assert archive.append('k2', 'http://b/', 'iucn', 200, {'ETag': 'x'}, b'{}')
+    archive.close()
+
+    # Without the index, a half-written record at the end is ignored and dropped on the next append
+    os.remove(f'{path}.idx')
+    with open(path, 'ab') as f:
+        f.write(b'PGR1\x00\x00')
+    reopened = PageArchive(path)
+    assert len(reopened) == 2 and reopened.record_count == 3
+    assert reopened.body(reopened.lookup('k1')) == b'two'
+    assert reopened.lookup('k2').headers == {'ETag': 'x'}
+    assert reopened.append('k3', 'http://c/', 'vnredlist', 404, {}, b'')
+    reopened.close()
+
+    final = PageArchive(path)
+    assert [entry.key for entry in final.entries()] == ['k1', 'k2', 'k3']
+    assert [entry.key for entry in final.entries(source='iucn')] == ['k2']
+    final.close()
+
+
+def test_empty_archive_file_is_an_empty_archive(tmp_path):
+    path = tmp_path / 'pages.archive'
+    path.write_bytes(b'')
+    archive = PageArchive(str(path))
+    assert len(archive) == 0
+    assert archive.append('k1', 'http://a/', 'vnredlist', 200, {}, b'one')
+    archive.close()
+
+    reopened = PageArchive(str(path))
+    assert reopened.body(reopened.lookup('k1')) == b'one'
+    reopened.close()
+
+
+def test_fetches_are_archived_and_replayed_offline(tmp_path, monkeypatch):
+    session = FixtureSession()
+    monkeypatch.setattr(http_cache, 'get_session', lambda: session)
+    monkeypatch.setattr(http_cache, 'response_cache', None)
+    urls = [f'http://vnredlist.vast.vn/{name[:-5]}/' for name in sorted(os.listdir(FIXTURES))]
+
+    archive = PageArchive(str(tmp_path / 'pages.archive'))
+    configure_archive(archive)
+    try:
+        live = [cached_get(url, source='vnredlist').content for url in urls]
+        archive.close()
+
+        replay = PageArchive(str(tmp_path / 'pages.archive'))
+        configure_archive(replay, replay=True)
+        assert [cached_get(url, source='vnredlist').content for url in urls] == live
+        assert session.requests == len(urls)
+        with pytest.raises(CacheMiss):
+            cached_get('http://vnredlist.vast.vn/not-archived/', source='vnredlist')
+
+        results, _ = replay_vnredlist(replay)
+        assert list(results) == urls
+        for url, content in zip(urls, live):
+            page = parse_species_page(content)
+            assert results[url] == {'conservation_status': page.conservation_status(),
+                                    'details': page.species_details(url)}
+        replay.close()
+    finally:
+        configure_archive(None)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the --profile option of the scripts.
+"""
+
+import argparse
+import os
+import pstats
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import profiling
+from profiling import RunProfiler, add_profile_arguments, configure_profiling_from_args
+
+
+def busy_worker(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+def run_workload():
+    with ThreadPoolExecutor(2) as executor:
+        list(executor.map(busy_worker, [0.1, 0.1]))
+    return [bytearray(1024) for _ in range(100)]
+
+
+def test_cprofile_covers_worker_threads(tmp_path):
+    profiler = RunProfiler(str(tmp_path / 'output.json'), 'cprofile', top=5)
+    profiler.start()
+    run_workload()
+    report = profiler.stop()
+
+    assert report['profile_path'] == str(tmp_path / 'output.json.prof')
+    stats = pstats.Stats(report['profile_path'])
+    functions = {name for _, _, name in stats.stats}
+    assert 'busy_worker' in functions
+    assert stats.stats[next(key for key in stats.stats if key[2] == 'busy_worker')][1] == 2
+    assert len(report['hot_functions']) == 5
+
+
+def test_sampling_writes_folded_stacks_and_tracks_memory(tmp_path):
+    profiler = RunProfiler(str(tmp_path / 'output'), 'sample', memory=True)
+    profiler.start()
+    held = run_workload()
+    report = profiler.stop()
+
+    assert report['samples'] > 0
+    lines = (tmp_path / 'output.folded').read_text(encoding='utf-8').splitlines()
+    assert any('busy_worker (test_profiling.py' in line for line in lines)
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) > 0 and ';' in stack
+    assert report['peak_memory'] >= len(held) * 1024
+
+
+def test_configure_from_args(tmp_path, monkeypatch):
+    parser = argparse.ArgumentParser()
+    add_profile_arguments(parser)
+    assert configure_profiling_from_args(parser.parse_args([])) is None
+
+    registered = []
+    monkeypatch.setattr(profiling.atexit, 'register', registered.append)
+    profiler = configure_profiling_from_args(parser.parse_args(['--profile', 'sample']), str(tmp_path / 'a.json'))
+    try:
+        assert profiler.output == str(tmp_path / 'a.json') and profiler.mode == 'sample'
+        assert len(registered) == 1
+    finally:
+        profiler.stop()
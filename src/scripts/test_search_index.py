@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the species search index.
+"""
+
+import json
+import os
+import sys
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from search_index import SearchIndex, build_index, fold_accents, write_index
+from species_corpus import load_corpus
+
+
+def entry(sci_name, common_name='', common_name_en=None):
+    record = {
+        'scientific_name': {'value': sci_name, 'note': ''},
+        'common_name': {'value': common_name, 'note': ''},
+    }
+    if common_name_en is not None:
+        record['common_name_en'] = {'value': common_name_en, 'note': ''}
+    return record
+
+
+def build(tmp_path):
+    files = {
+        'nd06_2019.json': [entry('Cupressus tonkinensis', 'Hoàng đàn hữu liên'),
+                           entry('Manis javanica Desmarest, 1822', 'Tê tê java')],
+        'nd84_2021.json': [entry('Fibraurea recisa', 'Hoàng đằng'), entry('Catopuma temminckii', 'Beo lửa')],
+        'iucn_status.json': [entry('Manis javanica Desmarest, 1822', 'Tê tê java', 'Sunda Pangolin')],
+    }
+    for name, data in files.items():
+        with open(tmp_path / name, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+    corpus = load_corpus(str(tmp_path), list(files), snapshot_dir=str(tmp_path / 'snapshots'))
+    path = tmp_path / 'index.json'
+    write_index(build_index(corpus), str(path))
+    return SearchIndex.load(str(path))
+
+
+def names(results):
+    return [result['scientific_name'] for result in results]
+
+
+def test_fold_accents():
+    assert fold_accents('Hoàng Đàn hữu liên') == 'hoang dan huu lien'
+
+
+def test_prefix_matches_accent_folded_words(tmp_path):
+    index = build(tmp_path)
+
+    assert names(index.prefix('ho dan')) == ['Cupressus tonkinensis', 'Fibraurea recisa']
+    assert names(index.prefix('HOÀNG ĐÀN')) == ['Cupressus tonkinensis', 'Fibraurea recisa']
+    assert names(index.prefix('pango')) == ['Manis javanica Desmarest, 1822']
+    assert index.prefix('ho xyz') == []
+
+
+def test_substring_and_scientific_name(tmp_path):
+    index = build(tmp_path)
+
+    assert names(index.substring('ang da')) == ['Cupressus tonkinensis', 'Fibraurea recisa']
+    assert index.substring('dan ang') == []
+    assert names(index.scientific_name('manis javanica')) == ['Manis javanica Desmarest, 1822']
+    assert index.scientific_name('Manis javanica')[0]['common_name_en'] == 'Sunda Pangolin'
+
+
+def test_search_ranks_phrase_matches_first(tmp_path):
+    index = build(tmp_path)
+
+    assert names(index.search('te te')) == ['Manis javanica Desmarest, 1822', 'Catopuma temminckii']
+    assert names(index.search('te te', limit=1)) == ['Manis javanica Desmarest, 1822']
+    assert names(index.search('onkinen')) == ['Cupressus tonkinensis']
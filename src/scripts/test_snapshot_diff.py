@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Offline tests for snapshot change detection and patches.
+"""
+
+import copy
+import os
+import sys
+
+import pytest
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from json_stream import write_json_array
+from snapshot_diff import SnapshotIndex, apply_patch, diff_snapshot, file_sha256
+
+
+def entry(sci_name, status, common_name=''):
+    return {
+        'scientific_name': {'value': sci_name, 'note': ''},
+        'common_name': {'value': common_name, 'note': ''},
+        'laws': [{'name': {'vi': 'Danh lục Đỏ Việt Nam', 'en': 'Vietnam Red List'}, 'value': status, 'note': ''}],
+    }
+
+
+OLD = [entry('Panthera tigris', 'EN'), entry('Elephas maximus', 'EN'), entry('Manis javanica', 'EN'),
+       entry('Sus scrofa', 'LC', 'Lợn rừng'), entry('Sus scrofa', 'LC', 'Lợn Ỉ')]
+
+
+def write(path, records, trailing_newline=False):
+    write_json_array(str(path), records, indent=2)
+    if trailing_newline:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('\n')
+    return str(path)
+
+
+def changed_records():
+    new = copy.deepcopy(OLD)
+    new[0]['laws'][0]['value'] = 'CR'
+    new[4]['common_name']['value'] = 'Lợn ỉ'
+    del new[1]
+    new.insert(2, entry('Pseudoryx nghetinhensis', 'CR'))
+    return new
+
+
+def test_report_lists_changes(tmp_path):
+    old = write(tmp_path / 'old.json', OLD)
+    new = write(tmp_path / 'new.json', changed_records())
+
+    report, _ = diff_snapshot(SnapshotIndex(old), new)
+
+    assert report['summary'] == {'added': 1, 'removed': 1, 'recategorized': 1, 'updated': 1}
+    assert report['recategorized'] == [{'scientific_name': 'Panthera tigris', 'from': 'EN', 'to': 'CR'}]
+    assert report['added'] == [{'scientific_name': 'Pseudoryx nghetinhensis', 'status': 'CR'}]
+    assert report['removed'] == [{'scientific_name': 'Elephas maximus', 'status': 'EN'}]
+    # Repeated names are told apart by occurrence
+    assert report['updated'] == [{'scientific_name': 'Sus scrofa', 'status': 'LC'}]
+
+
+@pytest.mark.parametrize('reorder', [False, True])
+@pytest.mark.parametrize('trailing_newline', [False, True])
+def test_patch_reproduces_new_file(tmp_path, reorder, trailing_newline):
+    old = write(tmp_path / 'old.json', OLD, trailing_newline)
+    records = changed_records()
+    if reorder:
+        records = records[1:] + records[:1]
+    new = write(tmp_path / 'new.json', records, trailing_newline)
+
+    _, patch = diff_snapshot(SnapshotIndex(old), new)
+    assert ('order' in patch) == reorder
+    # Only the changed records are shipped
+    assert len(patch['upsert']) == 3
+
+    assert apply_patch(old, patch, old) == len(records)
+    assert file_sha256(old) == file_sha256(new)
+    assert sorted(os.listdir(str(tmp_path))) == ['new.json', 'old.json']
+
+
+def test_patch_refuses_other_base(tmp_path):
+    old = write(tmp_path / 'old.json', OLD)
+    new = write(tmp_path / 'new.json', changed_records())
+    _, patch = diff_snapshot(SnapshotIndex(old), new)
+
+    with pytest.raises(ValueError):
+        apply_patch(new, patch, str(tmp_path / 'out.json'))
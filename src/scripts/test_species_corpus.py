@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the shared species corpus loader.
+"""
+
+import json
+import os
+import sys
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import species_corpus
+from species_corpus import load_corpus
+
+
+def entry(sci_name, common_name='', family=''):
+    return {
+        'scientific_name': {'value': sci_name, 'note': ''},
+        'common_name': {'value': common_name, 'note': ''},
+        'family_latin': family,
+        'laws': []
+    }
+
+
+def write_lib(lib_dir):
+    files = {
+        'nd06_2019.json': [entry('Panthera tigris', 'Hổ', 'Felidae'), entry('Elephas maximus', '', 'ELEPHANTIDAE')],
+        'nd84_2021.json': [entry('Elephas maximus', 'Voi châu Á', 'Elephantidae'), entry(' Panthera tigris ')],
+    }
+    for name, data in files.items():
+        with open(os.path.join(lib_dir, name), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+
+def test_indexes(tmp_path):
+    write_lib(str(tmp_path))
+    corpus = load_corpus(str(tmp_path), snapshot_dir=str(tmp_path / 'snapshots'))
+
+    assert corpus.names() == ['Panthera tigris', 'Elephas maximus']
+    assert 'nd160_2013.json' in corpus.missing_files
+    assert [f for f, _ in corpus.entries('Panthera tigris')] == ['nd06_2019.json', 'nd84_2021.json']
+    assert corpus.family('Elephantidae') == {'Elephas maximus'}
+    assert corpus.law('nd84_2021') == {'Panthera tigris', 'Elephas maximus'}
+    assert corpus.lookup('Panthera tigris Linnaeus, 1758') == ['Panthera tigris']
+    assert corpus.common_names() == {'Panthera tigris': 'Hổ', 'Elephas maximus': 'Voi châu Á'}
+
+
+def test_loaded_once_until_files_change(tmp_path):
+    write_lib(str(tmp_path))
+    corpus = load_corpus(str(tmp_path), snapshot_dir=str(tmp_path / 'snapshots'))
+    assert load_corpus(str(tmp_path), snapshot_dir=str(tmp_path / 'snapshots')) is corpus
+
+    with open(os.path.join(str(tmp_path), 'tt27_2025.json'), 'w', encoding='utf-8') as f:
+        json.dump([entry('Cuora trifasciata')], f)
+    reloaded = load_corpus(str(tmp_path), snapshot_dir=str(tmp_path / 'snapshots'))
+    assert reloaded is not corpus
+    assert 'Cuora trifasciata' in reloaded
+
+
+def test_snapshot_reused_across_processes_until_content_changes(tmp_path, monkeypatch):
+    write_lib(str(tmp_path))
+    snapshot_dir = str(tmp_path / 'snapshots')
+    names = load_corpus(str(tmp_path), snapshot_dir=snapshot_dir).names()
+
+    def no_parsing(*args):
+        raise AssertionError("JSON files parsed despite a valid snapshot")
+
+    # A new process: nothing loaded in memory yet, and the JSON files only touched
+    monkeypatch.setattr(species_corpus, '_loaded', {})
+    monkeypatch.setattr(species_corpus.SpeciesCorpus, '__init__', no_parsing)
+    os.utime(os.path.join(str(tmp_path), 'nd06_2019.json'))
+    assert load_corpus(str(tmp_path), snapshot_dir=snapshot_dir).names() == names
+
+    monkeypatch.undo()
+    monkeypatch.setattr(species_corpus, '_loaded', {})
+    with open(os.path.join(str(tmp_path), 'nd06_2019.json'), 'w', encoding='utf-8') as f:
+        json.dump([entry('Cuora trifasciata')], f)
+    assert load_corpus(str(tmp_path), snapshot_dir=snapshot_dir).names()[0] == 'Cuora trifasciata'
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the streaming crawl → details pipeline.
+"""
+
+import json
+import os
+import sys
+import threading
+
+from bs4 import BeautifulSoup
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import crawl_animal_links
+import fetch_metrics
+import http_cache
+import species_pipeline
+from fetch_metrics import FetchMetrics
+from http_cache import ResponseCache
+from species_pipeline import DETAILS_PARSE_NAME, run_pipeline
+
+CATEGORY_URLS = [f'http://vnredlist.vast.vn/dong-vat/nganh-a/lop-{i}/' for i in range(3)]
+
+
+def test_details_stream_while_crawling(tmp_path, monkeypatch):
+    first_details = threading.Event()
+
+    def fake_page(url):
+        category = CATEGORY_URLS.index(url)
+        if category == len(CATEGORY_URLS) - 1:
+            # The last category only completes once detail fetching has started
+            assert first_details.wait(timeout=5)
+        html = ''.join(f'<h2><a href="http://vnredlist.vast.vn/species-{category}-{i}/">S {category} {i}</a></h2>'
+                       for i in range(5))
+        # Species 0-0 is also listed in every other category
+        html += '<h2><a href="http://vnredlist.vast.vn/species-0-0/">S 0 0</a></h2>'
+        return BeautifulSoup(html, 'html.parser')
+
+    def fake_details(url):
+        first_details.set()
+        if url.endswith('-1-3/'):
+            return None
+        return {'scientific_name': {'value': url.rstrip('/').rsplit('/', 1)[-1], 'note': ''}}
+
+    monkeypatch.setattr(crawl_animal_links, 'fetch_page', fake_page)
+    monkeypatch.setattr(species_pipeline, 'fetch_species_details', fake_details)
+
+    output = tmp_path / 'details.json'
+    stats = run_pipeline(CATEGORY_URLS, str(output), crawl_workers=2, detail_workers=3, rate=None, window=4)
+
+    records = json.loads(output.read_text(encoding='utf-8'))
+    expected = [f'species-{c}-{i}' for c in range(3) for i in range(5) if (c, i) != (1, 3)]
+    assert [record['scientific_name']['value'] for record in records] == expected
+    assert stats['links'] == 15
+    assert stats['failed_urls'] == ['http://vnredlist.vast.vn/species-1-3/']
+    assert [category['species_count'] for category in stats['category_stats']] == [6, 6, 6]
+
+
+class FakeResponse:
+    def __init__(self, content, cache_key=None):
+        self.content = content
+        self.cache_key = cache_key
+
+
+def test_process_pool_parsing_matches_serial(tmp_path, monkeypatch):
+    fixtures = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'vnredlist_pages')
+    pages = {}
+    for name in sorted(os.listdir(fixtures)) * 3:
+        url = f'http://vnredlist.vast.vn/{name[:-5]}-{len(pages)}/'
+        with open(os.path.join(fixtures, name), 'rb') as f:
+            pages[url] = f.read()
+    missing = 'http://vnredlist.vast.vn/missing/'
+
+    monkeypatch.setattr(species_pipeline, 'fetch_species_response',
+                        lambda url: FakeResponse(pages[url]) if url in pages else None)
+
+    urls = list(pages)[:5] + [missing] + list(pages)[5:]
+    outputs = []
+    for parse_workers in (0, 2):
+        output = tmp_path / f'details-{parse_workers}.json'
+        stats = species_pipeline.extract_details(urls, str(output), detail_workers=3, rate=None, window=4,
+                                                 parse_workers=parse_workers)
+        assert stats['failed_urls'] == [missing]
+        outputs.append(output.read_bytes())
+
+    assert outputs[0] == outputs[1]
+    assert len(json.loads(outputs[0])) == len(pages)
+
+
+def test_process_pool_parses_are_timed(tmp_path, monkeypatch):
+    fixtures = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'vnredlist_pages')
+    pages = {}
+    for name in sorted(os.listdir(fixtures))[:3]:
+        with open(os.path.join(fixtures, name), 'rb') as f:
+            pages[f'http://vnredlist.vast.vn/{name[:-5]}/'] = f.read()
+    metrics = FetchMetrics()
+    monkeypatch.setattr(fetch_metrics, 'fetch_metrics', metrics)
+    monkeypatch.setattr(http_cache, 'response_cache', ResponseCache(str(tmp_path / 'cache.sqlite')))
+    monkeypatch.setattr(species_pipeline, 'fetch_species_response', lambda url: FakeResponse(pages[url], url))
+
+    # The second run reuses the results stored by the worker processes
+    for _ in range(2):
+        species_pipeline.extract_details(list(pages), str(tmp_path / 'details.json'), detail_workers=2,
+                                         rate=None, window=4, parse_workers=2)
+
+    assert [event['name'] for event in metrics.parses] == [DETAILS_PARSE_NAME] * 6
+    assert sorted(event['reused'] for event in metrics.parses) == [False] * 3 + [True] * 3
+    assert all(event['seconds'] > 0 for event in metrics.parses if not event['reused'])
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the species page parser backends, using the saved pages in fixtures/.
+"""
+
+import glob
+import os
+import sys
+
+import pytest
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_parsers import DEFAULT_PAGES_DIR, parse_legacy
+from vnredlist_parser import PARSER_BACKENDS, parse_species_page
+
+PAGES = sorted(glob.glob(os.path.join(DEFAULT_PAGES_DIR, '*.html')))
+
+
+def read_page(slug):
+    with open(os.path.join(DEFAULT_PAGES_DIR, f'{slug}.html'), 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('backend', sorted(PARSER_BACKENDS))
+@pytest.mark.parametrize('path', PAGES, ids=os.path.basename)
+def test_backend_matches_original_parser(backend, path):
+    with open(path, 'rb') as f:
+        content = f.read()
+    page = parse_species_page(content, backend=backend)
+
+    assert (page.conservation_status(), page.species_details(path)) == parse_legacy(path, content)
+
+
+@pytest.mark.parametrize('backend', sorted(PARSER_BACKENDS))
+def test_status_sources(backend):
+    # Status under the "Phân hạng bảo tồn" heading
+    assert parse_species_page(read_page('elephas-maximus'), backend).conservation_status() == 'CR'
+    # Status only in the "Thông tin đánh giá" section
+    assert parse_species_page(read_page('pseudoryx-nghetinhensis'), backend).conservation_status() == 'CR'
+    # No status on the page
+    assert parse_species_page(read_page('paramesotriton-deloustali'), backend).conservation_status() is None
+
+
+def test_species_details():
+    details = parse_species_page(read_page('elephas-maximus')).species_details('http://vnredlist.vast.vn/elephas-maximus/')
+
+    assert details['scientific_name']['value'] == 'Elephas maximus'
+    assert details['common_name']['value'] == 'Voi châu á'
+    assert details['family_latin'] == 'ELEPHANTIDAE'
+    assert details['laws'][0]['value'] == 'CR'
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Parser for Vietnam Red List (vnredlist.vast.vn) species pages.
+
+Each page is parsed once into a lightweight section index: the page title and, for
+every h3/h4 heading, the text of the element that follows it. Conservation status,
+taxonomy and the other species details are then read from the index instead of
+re-scanning the document for every field.
+
+Two parser backends are available:
+
+- ``lxml``: fast C parser, used by default when lxml is installed
+- ``bs4``: BeautifulSoup with the standard library ``html.parser``
+"""
+
+import hashlib
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Union
+
+from bs4 import BeautifulSoup, UnicodeDammit
+
+try:
+    import lxml.html
+except ImportError:  # lxml is optional, fall back to BeautifulSoup
+    lxml = None
+
+
+# Conservation status codes used by the Vietnam Red List
+STATUS_PATTERN = re.compile(r'\b(CR|EN|VU|NT|LC|DD|EW|EX|NE)\b')
+
+# Status inside the "Thông tin đánh giá" (assessment information) section
+ASSESSMENT_STATUS_PATTERN = re.compile(r'Phân hạng[:\s]+([A-Z]{1,2})')
+ASSESSMENT_HEADING_PATTERN = re.compile(r'Thông tin đánh giá')
+
+# Map Vietnamese headings to taxonomy keys (exact matches)
+TAXONOMY_HEADINGS = {
+    'Giới': 'kingdom',
+    'Ngành': 'phylum',
+    'Lớp': 'class',
+    'Bộ': 'order',
+    'Họ': 'family'
+}
+
+
+class HeadingSection(NamedTuple):
+    """An h3/h4 heading and the text of the element following it."""
+
+    # Heading text as is, and with every string stripped and joined
+    text: str
+    stripped: str
+    # Text of the next sibling element (whitespace collapsed), None if there is none
+    next_text: Optional[str]
+    # Text of the next <p> or <div> sibling (stripped), None if there is none
+    next_block_text: Optional[str]
+
+
+class SpeciesPage:
+    """Section index of a species page."""
+
+    def __init__(self, title: Optional[str], headings: List[HeadingSection],
+                 assessment_text: Optional[str]):
+        """
+        Args:
+            title: Stripped text of the first <h1>, None if the page has none
+            headings: Every h3/h4 heading in document order
+            assessment_text: Text of the first <div> after the "Thông tin đánh giá" <h2>
+        """
+        self.title = title
+        self.headings = headings
+        self.assessment_text = assessment_text
+
+    def text_after_heading(self, heading_text: str) -> str:
+        """
+        Text of the element after the first heading containing ``heading_text``.
+
+        Args:
+            heading_text: The heading text to search for (case-insensitive)
+
+        Returns:
+            Extracted text or empty string
+        """
+        heading_text = heading_text.lower()
+        for heading in self.headings:
+            if heading_text in heading.stripped.lower() and heading.next_text is not None:
+                return heading.next_text
+        return ""
+
+    def conservation_status(self) -> Optional[str]:
+        """
+        Conservation status code from the "Phân hạng bảo tồn" heading, falling back
+        to the assessment information section.
+
+        Returns:
+            Conservation status code (e.g., "CR", "EN", "VU") or None if not found
+        """
+        for heading in self.headings:
+            if 'Phân hạng bảo tồn' in heading.text and heading.next_block_text is not None:
+                status_match = STATUS_PATTERN.search(heading.next_block_text)
+                if status_match:
+                    return status_match.group(1)
+
+        if self.assessment_text is not None:
+            status_match = ASSESSMENT_STATUS_PATTERN.search(self.assessment_text)
+            if status_match:
+                return status_match.group(1)
+
+        return None
+
+    def taxonomy(self) -> Dict[str, str]:
+        """
+        Extract taxonomic classification information.
+
+        Returns:
+            Dictionary with taxonomic ranks
+        """
+        taxonomy = {}
+        for en_key in TAXONOMY_HEADINGS.values():
+            taxonomy[f'{en_key}_latin'] = ''
+            taxonomy[f'{en_key}_vi'] = ''
+
+        for heading in self.headings:
+            en_key = TAXONOMY_HEADINGS.get(heading.stripped)
+            if en_key and heading.next_text is not None:
+                taxonomy[f'{en_key}_latin'] = heading.next_text.upper()
+
+        return taxonomy
+
+    def scientific_name(self) -> str:
+        """Scientific name from the page title, without author and year."""
+        if self.title is None:
+            return ''
+
+        # Keep only the first 2-3 words (genus, species, and possibly subspecies)
+        sci_name = self.title
+        parts = sci_name.split()
+        if len(parts) >= 2:
+            # Check if third word starts with lowercase (subspecies) or uppercase (author)
+            if len(parts) >= 3 and parts[2][0].islower():
+                sci_name = ' '.join(parts[:3])
+            else:
+                sci_name = ' '.join(parts[:2])
+        return sci_name
+
+    def species_details(self, url: str) -> Dict:
+        """
+        Extract all species details in the structure of the other data files.
+
+        Args:
+            url: The species page URL
+
+        Returns:
+            Dictionary with species information
+        """
+        species_data = {
+            'scientific_name': {'value': self.scientific_name(), 'note': ''},
+            'common_name': {'value': self.text_after_heading('Tên việt nam'), 'note': ''},
+        }
+        species_data.update(self.taxonomy())
+        species_data['note'] = ''
+        species_data['laws'] = []
+
+        # Try multiple possible headings
+        status = self.text_after_heading('Phân hạng bảo tồn')
+        if not status:
+            status = self.text_after_heading('Phân hạng')
+
+        # Extract just the status code (CR, EN, VU, etc.)
+        status_match = STATUS_PATTERN.search(status) if status else None
+        if status_match:
+            species_data['laws'].append({
+                'name': {
+                    'vi': 'Danh lục Đỏ Việt Nam',
+                    'en': 'Vietnam Red List'
+                },
+                'value': status_match.group(1),
+                'note': url
+            })
+
+        return species_data
+
+
+def _collapse(text: str) -> str:
+    return ' '.join(text.split())
+
+
+def _index_bs4(content: Union[bytes, str]) -> SpeciesPage:
+    """Build the section index with BeautifulSoup."""
+    soup = BeautifulSoup(content, 'html.parser')
+
+    title_tag = soup.find('h1')
+    title = title_tag.get_text(strip=True) if title_tag else None
+
+    headings = []
+    for heading in soup.find_all(['h3', 'h4']):
+        next_elem = heading.find_next_sibling()
+        next_block = heading.find_next_sibling(['p', 'div'])
+        headings.append(HeadingSection(
+            text=heading.get_text(),
+            stripped=heading.get_text(strip=True),
+            next_text=_collapse(next_elem.get_text(separator=' ', strip=True)) if next_elem else None,
+            next_block_text=next_block.get_text().strip() if next_block else None,
+        ))
+
+    assessment_text = None
+    assessment_heading = soup.find('h2', string=ASSESSMENT_HEADING_PATTERN)
+    if assessment_heading:
+        section_content = assessment_heading.find_next('div')
+        if section_content:
+            assessment_text = section_content.get_text()
+
+    return SpeciesPage(title, headings, assessment_text)
+
+
+def _lxml_strings(element) -> List[str]:
+    """Stripped, non-empty text strings of an element (like bs4's strip=True)."""
+    return [s.strip() for s in element.itertext() if s.strip()]
+
+
+def _lxml_next_element(element, tags=None):
+    """Next sibling element, skipping comments, optionally restricted to some tags."""
+    sibling = element.getnext()
+    while sibling is not None:
+        if isinstance(sibling.tag, str) and (tags is None or sibling.tag in tags):
+            return sibling
+        sibling = sibling.getnext()
+    return None
+
+
+def _lxml_single_string(element) -> Optional[str]:
+    """Equivalent of bs4's ``Tag.string``: the text of an element with a single child."""
+    while True:
+        if len(element) == 0:
+            return element.text
+        if len(element) > 1 or element.text or element[0].tail or not isinstance(element[0].tag, str):
+            return None
+        element = element[0]
+
+
+def _index_lxml(content: Union[bytes, str]) -> SpeciesPage:
+    """Build the section index with lxml."""
+    if isinstance(content, bytes):
+        content = UnicodeDammit(content, ['utf-8']).unicode_markup
+    root = lxml.html.fromstring(content)
+
+    title_tag = root.find('.//h1')
+    title = ''.join(_lxml_strings(title_tag)) if title_tag is not None else None
+
+    headings = []
+    for heading in root.iter('h3', 'h4'):
+        next_elem = _lxml_next_element(heading)
+        next_block = _lxml_next_element(heading, ('p', 'div'))
+        strings = _lxml_strings(heading)
+        headings.append(HeadingSection(
+            text=''.join(heading.itertext()),
+            stripped=''.join(strings),
+            next_text=_collapse(' '.join(_lxml_strings(next_elem))) if next_elem is not None else None,
+            next_block_text=''.join(next_block.itertext()).strip() if next_block is not None else None,
+        ))
+
+    assessment_text = None
+    for h2 in root.iter('h2'):
+        h2_string = _lxml_single_string(h2)
+        if h2_string and ASSESSMENT_HEADING_PATTERN.search(h2_string):
+            section_content = h2.xpath('following::div[1]')
+            if section_content:
+                assessment_text = ''.join(section_content[0].itertext())
+            break
+
+    return SpeciesPage(title, headings, assessment_text)
+
+
+PARSER_BACKENDS: Dict[str, Callable[[Union[bytes, str]], SpeciesPage]] = {'bs4': _index_bs4}
+if lxml is not None:
+    PARSER_BACKENDS['lxml'] = _index_lxml
+
+DEFAULT_BACKEND = 'lxml' if 'lxml' in PARSER_BACKENDS else 'bs4'
+
+# Changes whenever this module does, so parse results cached by an older parser are not reused
+with open(__file__, 'rb') as _source:
+    PARSER_VERSION = hashlib.sha256(_source.read()).hexdigest()[:12]
+
+
+def parse_species_page(content: Union[bytes, str], backend: Optional[str] = None) -> SpeciesPage:
+    """
+    Parse a species page into a section index.
+
+    Args:
+        content: Raw page HTML
+        backend: Parser backend name ("lxml" or "bs4"); defaults to the fastest available
+
+    Returns:
+        SpeciesPage index of the page
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend: {backend} (available: {', '.join(PARSER_BACKENDS)})")
+    return PARSER_BACKENDS[backend](content)